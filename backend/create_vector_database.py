@@ -1,10 +1,15 @@
 import os
+import sys
+import hashlib
 import logging
+import uuid
 
 import requests
 from dotenv import load_dotenv
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
+from qdrant_client.models import PointStruct, Distance, VectorParams, PointIdsList
+
+from services.ollama_service import OllamaService
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,25 +23,9 @@ VECTOR_SIZE = int(os.getenv("QDRANT_VECTOR_SIZE", "768"))
 
 OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
 EMBED_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
-EMB_URL = f"{OLLAMA_URL}/api/embeddings"
-
+UPSERT_BATCH = int(os.getenv("QDRANT_UPSERT_BATCH", "128"))
 
-def get_embedding(text: str):
-    # 1) input
-    try:
-        r = requests.post(EMB_URL, json={"model": EMBED_MODEL, "input": text}, timeout=60)
-        if r.ok:
-            data = r.json()
-            emb = data.get("embedding") or (data.get("data") or [{}])[0].get("embedding")
-            if emb:
-                return emb
-    except Exception:
-        pass
-    # 2) prompt
-    r = requests.post(EMB_URL, json={"model": EMBED_MODEL, "prompt": text}, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    return data.get("embedding") or (data.get("data") or [{}])[0].get("embedding")
+UI_TERMS = ["רשימת הזמנות","רשימת ספקים","הזמנה חדשה","חיבורים","בקשות ממתינות","ניהול מוצרים"]
 
 
 def split_text_into_chunks(text: str, chunk_size=300, overlap=50):
@@ -52,6 +41,106 @@ def split_text_into_chunks(text: str, chunk_size=300, overlap=50):
     return out
 
 
+def split_into_sections(text: str):
+    """
+    חלוקה לפי כותרות (#) ושורות [HOWTO] – כל קטע נחתך בנפרד,
+    כך שעריכה במקום אחד בקובץ משנה רק את הקטעים של אותו סעיף
+    """
+    sections = []
+    title, lines, has_body = "", [], False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#") or stripped.startswith("[HOWTO]"):
+            if has_body:
+                sections.append((title, "\n".join(lines)))
+                lines = []
+            # כותרת בלי תוכן (למשל "##" ישר אחרי "#") מצטרפת לסעיף הבא
+            title, has_body = stripped.lstrip("#").strip(), False
+            lines.append(line)
+        else:
+            lines.append(line)
+            has_body = has_body or bool(stripped)
+    if has_body:
+        sections.append((title, "\n".join(lines)))
+    return sections
+
+
+def split_knowledge(text: str, chunk_size=300, overlap=50):
+    """[(title, chunk)] – חלונות מילים בתוך כל סעיף"""
+    out = []
+    for title, body in split_into_sections(text):
+        for chunk in split_text_into_chunks(body, chunk_size=chunk_size, overlap=overlap):
+            out.append((title, chunk))
+    return out
+
+
+def content_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+
+def point_id(chunk_hash: str) -> str:
+    """מזהה נקודה דטרמיניסטי מהתוכן ומהמודל – מודל אחר = נקודות חדשות"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{EMBED_MODEL}:{chunk_hash}"))
+
+
+def chunk_payload(chunk: str, title: str = "") -> dict:
+    role = "Any"
+    if "[OWNER]" in chunk:
+        role = "StoreOwner"
+    elif "[SUPPLIER]" in chunk:
+        role = "Supplier"
+
+    return {
+        "text": chunk,
+        "type": "how_to" if "[HOWTO]" in chunk else "doc",
+        "role": role,
+        "title": title or chunk.split("\n", 1)[0].strip(),
+        "ui_terms": [t for t in UI_TERMS if t in chunk],
+        "content_hash": content_hash(chunk),
+        "embed_model": EMBED_MODEL,
+    }
+
+
+def ensure_collection(client: QdrantClient, full: bool) -> bool:
+    """יוצר את האוסף אם חסר / בגודל וקטור אחר / ב---full. מחזיר True אם נוצר מחדש"""
+    if not full:
+        try:
+            info = client.get_collection(COLLECTION_NAME)
+            size = getattr(info.config.params.vectors, "size", None)
+            if size == VECTOR_SIZE:
+                return False
+            logger.info(f"vector size changed ({size} → {VECTOR_SIZE}), recreating collection")
+        except Exception:
+            logger.info("collection not found, creating")
+
+    try:
+        client.delete_collection(COLLECTION_NAME)
+    except Exception:
+        pass
+    client.create_collection(
+        collection_name=COLLECTION_NAME,
+        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+    )
+    return True
+
+
+def existing_points(client: QdrantClient) -> dict:
+    """{id: payload} של כל הנקודות באוסף (בלי וקטורים)"""
+    out, offset = {}, None
+    while True:
+        points, offset = client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=256,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for p in points:
+            out[str(p.id)] = p.payload or {}
+        if offset is None:
+            return out
+
+
 def main():
     # בדיקות זמינות
     try:
@@ -75,54 +164,58 @@ def main():
     with open(KNOWLEDGE_FILE, "r", encoding="utf-8") as f:
         content = f.read()
 
-    chunks = split_text_into_chunks(content, chunk_size=300, overlap=50)
-    logger.info(f"chunks: {len(chunks)}")
-
-    client = QdrantClient(QDRANT_URL)
-
-    # צור/אתחל אוסף
-    try:
-        client.delete_collection(COLLECTION_NAME)
-    except Exception:
-        pass
-
-    client.create_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
-    )
-
-    points = []
-    UI_TERMS = ["רשימת הזמנות","רשימת ספקים","הזמנה חדשה","חיבורים","בקשות ממתינות","ניהול מוצרים"]
+    full = "--full" in sys.argv[1:]
 
-    for i, chunk in enumerate(chunks):
-        emb = get_embedding(chunk)
-        if not emb:
-            continue
+    desired = {}
+    for title, chunk in split_knowledge(content, chunk_size=300, overlap=50):
+        payload = chunk_payload(chunk, title)
+        desired[point_id(payload["content_hash"])] = payload
+    logger.info(f"chunks: {len(desired)}")
 
-        role = "Any"
-        if "[OWNER]" in chunk:
-            role = "StoreOwner"
-        elif "[SUPPLIER]" in chunk:
-            role = "Supplier"
-
-        meta = {
-            "text": chunk,
-            "type": "how_to" if "[HOWTO]" in chunk else "doc",
-            "role": role,
-            "title": chunk.split("\n", 1)[0].strip(),
-            "ui_terms": [t for t in UI_TERMS if t in chunk]
-        }
-
-        points.append(PointStruct(id=i, vector=emb, payload=meta))
-
-    if not points:
-        logger.error("no points to upsert")
-        return 1
+    client = QdrantClient(QDRANT_URL)
+    recreated = ensure_collection(client, full)
+    existing = {} if recreated else existing_points(client)
+
+    new_ids = [pid for pid in desired if pid not in existing]
+    stale_ids = [pid for pid in existing if pid not in desired]
+    # אותו תוכן אבל מטא-דאטה שהשתנתה (למשל title) – עדכון payload בלי embedding
+    changed_meta = [pid for pid in desired if pid in existing and existing[pid] != desired[pid]]
+    logger.info(f"new/changed: {len(new_ids)}, stale: {len(stale_ids)}, "
+                f"unchanged: {len(desired) - len(new_ids)}, payload updates: {len(changed_meta)}")
+
+    # embeddings רק לקטעים חדשים/שהשתנו – באצוות דרך /api/embed
+    texts = [desired[pid]["text"] for pid in new_ids]
+    embeddings = OllamaService().get_embeddings_batch(texts, truncate=False) if texts else []
+
+    points = [
+        PointStruct(id=pid, vector=emb, payload=desired[pid])
+        for pid, emb in zip(new_ids, embeddings) if emb
+    ]
+    if len(points) < len(new_ids):
+        logger.warning(f"{len(new_ids) - len(points)} chunks failed to embed")
+        if not points and not existing:
+            logger.error("no points to upsert")
+            return 1
+
+    for start in range(0, len(points), UPSERT_BATCH):
+        client.upsert(
+            collection_name=COLLECTION_NAME,
+            points=points[start:start + UPSERT_BATCH],
+            wait=True,
+        )
+
+    for pid in changed_meta:
+        client.overwrite_payload(collection_name=COLLECTION_NAME, payload=desired[pid], points=[pid])
+
+    # מחיקת קטעים שכבר לא בקובץ – רק אחרי שהחדשים נכנסו
+    for start in range(0, len(stale_ids), UPSERT_BATCH):
+        client.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=PointIdsList(points=stale_ids[start:start + UPSERT_BATCH]),
+            wait=True,
+        )
 
-    client.upsert(collection_name=COLLECTION_NAME, points=points)
-    client = QdrantClient(url=QDRANT_URL)
     info = client.get_collection(COLLECTION_NAME)
-    client.upsert(collection_name=COLLECTION_NAME, points=points)
     logger.info(f"done. points_count={info.points_count}")
     return 0
 
@@ -0,0 +1,115 @@
+# backend/database/async_session.py
+"""
+שכבת DB אסינכרונית לראוטרים "חמים"
+DB_ASYNC=1 → engine אסינכרוני אמיתי (mssql+aioodbc, או sqlite+aiosqlite מקומית).
+אחרת (או אם הדרייבר לא מותקן) – עטיפה של ה-Session הסינכרוני שמריצה כל קריאה
+ב-threadpool, כך שהראוטים נכתבים פעם אחת (await db.execute(...)) ואף פעם לא חוסמים את ה-event loop.
+"""
+
+import logging
+import os
+from typing import Any, AsyncIterator
+
+from starlette.concurrency import run_in_threadpool
+
+from database import query_metrics
+from database.session import DATABASE_URL, SessionLocal, engine_kwargs, _env_bool
+
+logger = logging.getLogger(__name__)
+
+
+def _async_url(url: str) -> str:
+    if url.startswith("mssql+pyodbc"):
+        return "mssql+aioodbc" + url[len("mssql+pyodbc"):]
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if _env_bool("DB_ASYNC", "false"):
+    try:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+        async_kwargs = dict(pool_pre_ping=True, pool_recycle=engine_kwargs["pool_recycle"])
+        if ASYNC_DATABASE_URL.startswith("mssql"):
+            async_kwargs.update(
+                pool_size=engine_kwargs["pool_size"],
+                max_overflow=engine_kwargs["max_overflow"],
+                pool_timeout=engine_kwargs["pool_timeout"],
+            )
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, **async_kwargs)
+        # אותה מדידת שאילתות כמו ב-engine הסינכרוני
+        query_metrics.install(async_engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+        logger.info(f"Async DB engine enabled ({async_engine.dialect.name}+{async_engine.dialect.driver})")
+    except Exception as e:  # דרייבר חסר (aioodbc/aiosqlite) וכו'
+        async_engine = None
+        AsyncSessionLocal = None
+        logger.warning(f"Async DB engine unavailable, using threadpool fallback: {e}")
+
+
+class ThreadpoolSession:
+    """
+    ממשק AsyncSession מינימלי מעל Session סינכרוני: כל קריאה ל-DB רצה ב-threadpool.
+    מאפשר לכתוב ראוט async אחד שעובד גם בלי דרייבר אסינכרוני.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def execute(self, statement, params=None, **kw) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kw)
+
+    async def scalar(self, statement, params=None, **kw) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, statement, params, **kw)
+
+    async def scalars(self, statement, params=None, **kw) -> Any:
+        return await run_in_threadpool(self.sync_session.scalars, statement, params, **kw)
+
+    async def get(self, entity, ident, **kw) -> Any:
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kw)
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, instance, attribute_names=None):
+        await run_in_threadpool(self.sync_session.refresh, instance, attribute_names)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+    async def run_sync(self, fn, *args, **kw) -> Any:
+        """כמו AsyncSession.run_sync: fn(session, *args) עם ה-Session הסינכרוני"""
+        return await run_in_threadpool(fn, self.sync_session, *args, **kw)
+
+
+# טיפוס הפרמטר בראוטים: AsyncSession או ThreadpoolSession (אותו ממשק)
+AsyncDBSession = Any
+
+
+async def get_async_db() -> AsyncIterator[AsyncDBSession]:
+    """Dependency: AsyncSession אמיתי אם DB_ASYNC פעיל, אחרת ThreadpoolSession"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+    # expire_on_commit=False – כמו ב-AsyncSession: קריאת שדות אחרי commit לא מפעילה SELECT חוסם
+    session = ThreadpoolSession(SessionLocal(expire_on_commit=False))
+    try:
+        yield session
+    finally:
+        await session.close()
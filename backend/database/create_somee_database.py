@@ -4,6 +4,7 @@
 - יוצר את כלל הטבלאות הדרושות לפרויקט.
 - דואג לשדרוג טבלת products עם stock + is_active.
 - מוסיף נתוני דמו בסיסיים (אופציונלי).
+- בונה מחדש את מוני המשתמשים (user_stats) ואת סיכומי האנליטיקה.
 - מציג סיכום מצב מסד הנתונים.
 
 להרצה:
@@ -169,10 +170,66 @@ def create_tables() -> bool:
             status NVARCHAR(20) NOT NULL CHECK (status IN (N'בתהליך', N'הושלמה', N'בוצעה')),
             supplier_id INT NOT NULL,
             created_date DATETIME DEFAULT GETDATE(),
+            updated_at DATETIME NULL DEFAULT GETDATE(),
+            total_amount DECIMAL(12,2) NULL,
+            idempotency_key NVARCHAR(64) NULL,
             FOREIGN KEY (owner_id) REFERENCES users(id),
             FOREIGN KEY (supplier_id) REFERENCES users(id)
         )""")
 
+        # שדרוג orders קיימת – סכום הזמנה שמור
+        cur.execute("""
+        IF NOT EXISTS (
+            SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA='dbo' AND TABLE_NAME='orders' AND COLUMN_NAME='total_amount'
+        )
+        ALTER TABLE [dbo].[orders] ADD total_amount DECIMAL(12,2) NULL
+        """)
+
+        # updated_at – watermark לסנכרון אינקרמנטלי ("מה השתנה מאז")
+        _exec_many(cur, (
+            """
+            IF NOT EXISTS (
+                SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA='dbo' AND TABLE_NAME='orders' AND COLUMN_NAME='updated_at'
+            )
+            ALTER TABLE [dbo].[orders] ADD updated_at DATETIME NULL CONSTRAINT df_orders_updated_at DEFAULT GETDATE()
+            """,
+            """
+            UPDATE [dbo].[orders] SET updated_at = created_date WHERE updated_at IS NULL
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_orders_supplier_updated')
+            CREATE INDEX ix_orders_supplier_updated ON [dbo].[orders] (supplier_id, updated_at)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_orders_owner_updated')
+            CREATE INDEX ix_orders_owner_updated ON [dbo].[orders] (owner_id, updated_at)
+            """,
+        ))
+
+        # מפתח idempotency ליצירת הזמנה (ייחודי לבעל חנות, רק כשקיים)
+        _exec_many(cur, (
+            """
+            IF NOT EXISTS (
+                SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA='dbo' AND TABLE_NAME='orders' AND COLUMN_NAME='idempotency_key'
+            )
+            ALTER TABLE [dbo].[orders] ADD idempotency_key NVARCHAR(64) NULL
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ux_orders_owner_idempotency')
+            CREATE UNIQUE INDEX ux_orders_owner_idempotency ON [dbo].[orders] (owner_id, idempotency_key)
+            WHERE idempotency_key IS NOT NULL
+            """,
+        ))
+
+        # אינדקס לעימוד (keyset) של הזמנות ספק לפי תאריך
+        cur.execute("""
+        IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_orders_supplier_created')
+        CREATE INDEX ix_orders_supplier_created ON [dbo].[orders] (supplier_id, created_date DESC, id DESC)
+        """)
+
         # 6) ORDER_ITEMS
         cur.execute("""
         IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='order_items' AND xtype='U')
@@ -181,10 +238,38 @@ def create_tables() -> bool:
             product_id INT NOT NULL,
             order_id   INT NOT NULL,
             quantity   INT NOT NULL,
+            unit_price DECIMAL(10,2) NULL,
             FOREIGN KEY (product_id) REFERENCES products(id),
             FOREIGN KEY (order_id)   REFERENCES orders(id)
         )""")
 
+        # שדרוג order_items קיימת – snapshot של מחיר היחידה בעת ההזמנה
+        cur.execute("""
+        IF NOT EXISTS (
+            SELECT 1 FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA='dbo' AND TABLE_NAME='order_items' AND COLUMN_NAME='unit_price'
+        )
+        ALTER TABLE [dbo].[order_items] ADD unit_price DECIMAL(10,2) NULL
+        """)
+
+        # מילוי רטרואקטיבי (פעם אחת) – לפי המחיר הנוכחי, הכי קרוב שיש לרשומות ישנות
+        _exec_many(cur, (
+            """
+            UPDATE oi SET oi.unit_price = p.unit_price
+            FROM [dbo].[order_items] oi JOIN [dbo].[products] p ON p.id = oi.product_id
+            WHERE oi.unit_price IS NULL
+            """,
+            """
+            UPDATE o SET o.total_amount = t.total
+            FROM [dbo].[orders] o
+            JOIN (
+                SELECT order_id, SUM(quantity * unit_price) AS total
+                FROM [dbo].[order_items] GROUP BY order_id
+            ) t ON t.order_id = o.id
+            WHERE o.total_amount IS NULL
+            """,
+        ))
+
         # 7) SUPPLIER_CITIES
         cur.execute("""
         IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='supplier_cities' AND xtype='U')
@@ -221,6 +306,104 @@ def create_tables() -> bool:
             FOREIGN KEY (supplier_id) REFERENCES users(id)
         )""")
 
+        # אינדקסים לחיפוש ספקים לפי אזור שירות ("מי משרת את עיר/מחוז X")
+        _exec_many(cur, (
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_supplier_cities_city')
+            CREATE INDEX ix_supplier_cities_city ON [dbo].[supplier_cities] (city_id, supplier_id)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_supplier_districts_district')
+            CREATE INDEX ix_supplier_districts_district ON [dbo].[supplier_districts] (district_id, supplier_id)
+            """,
+        ))
+
+        # 10) USER_STATS – מוני לוח בקרה לכל משתמש, מתעדכנים בטרנזקציה של נתיבי הכתיבה
+        cur.execute("""
+        IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='user_stats' AND xtype='U')
+        CREATE TABLE [dbo].[user_stats](
+            user_id               INT NOT NULL PRIMARY KEY,
+            products_count        INT NOT NULL DEFAULT 0,
+            out_of_stock_products INT NOT NULL DEFAULT 0,
+            total_orders          INT NOT NULL DEFAULT 0,
+            in_progress_orders    INT NOT NULL DEFAULT 0,
+            done_orders           INT NOT NULL DEFAULT 0,
+            completed_orders      INT NOT NULL DEFAULT 0,
+            connected_links       INT NOT NULL DEFAULT 0,
+            pending_links         INT NOT NULL DEFAULT 0,
+            updated_at            DATETIME2 NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )""")
+
+        # 11) ANALYTICS ROLLUP – סיכומים יומיים; לוחות הבקרה לא סורקים orders/order_items
+        _exec_many(cur, (
+            """
+            IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='analytics_supplier_daily' AND xtype='U')
+            CREATE TABLE [dbo].[analytics_supplier_daily](
+                supplier_id      INT NOT NULL,
+                day              DATE NOT NULL,
+                orders_count     INT NOT NULL,
+                completed_orders INT NOT NULL,
+                units            INT NOT NULL,
+                revenue          DECIMAL(14,2) NOT NULL,
+                PRIMARY KEY (supplier_id, day)
+            )""",
+            """
+            IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='analytics_product_daily' AND xtype='U')
+            CREATE TABLE [dbo].[analytics_product_daily](
+                product_id   INT NOT NULL,
+                day          DATE NOT NULL,
+                supplier_id  INT NOT NULL,
+                orders_count INT NOT NULL,
+                units        INT NOT NULL,
+                revenue      DECIMAL(14,2) NOT NULL,
+                PRIMARY KEY (product_id, day)
+            )""",
+            """
+            IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='analytics_city_daily' AND xtype='U')
+            CREATE TABLE [dbo].[analytics_city_daily](
+                city_id      INT NOT NULL,
+                day          DATE NOT NULL,
+                orders_count INT NOT NULL,
+                revenue      DECIMAL(14,2) NOT NULL,
+                PRIMARY KEY (city_id, day)
+            )""",
+            """
+            IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='analytics_rollup_state' AND xtype='U')
+            CREATE TABLE [dbo].[analytics_rollup_state](
+                name         NVARCHAR(64) NOT NULL PRIMARY KEY,
+                watermark    DATETIME NULL,
+                refreshed_at DATETIME NULL,
+                last_mode    NVARCHAR(16) NULL
+            )""",
+            # מחיקה/טווחים לפי יום בכל הטבלאות; top מוצרים לספק
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_analytics_supplier_daily_day')
+            CREATE INDEX ix_analytics_supplier_daily_day ON [dbo].[analytics_supplier_daily] (day)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_analytics_product_daily_day')
+            CREATE INDEX ix_analytics_product_daily_day ON [dbo].[analytics_product_daily] (day) INCLUDE (supplier_id, units, revenue)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_analytics_product_daily_supplier')
+            CREATE INDEX ix_analytics_product_daily_supplier ON [dbo].[analytics_product_daily] (supplier_id, day)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_analytics_city_daily_day')
+            CREATE INDEX ix_analytics_city_daily_day ON [dbo].[analytics_city_daily] (day)
+            """,
+            # הרענון האינקרמנטלי: "אילו ימים השתנו" ופריטים לפי הזמנה
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_orders_updated')
+            CREATE INDEX ix_orders_updated ON [dbo].[orders] (updated_at) INCLUDE (created_date)
+            """,
+            """
+            IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name='ix_order_items_order')
+            CREATE INDEX ix_order_items_order ON [dbo].[order_items] (order_id) INCLUDE (product_id, quantity, unit_price)
+            """,
+        ))
+
         conn.commit()
         conn.close()
         print("✅ טבלאות נוצרו/שודרגו בהצלחה.")
@@ -268,6 +451,36 @@ def insert_demo_data() -> bool:
         return False
 
 
+def rebuild_stats() -> bool:
+    """בנייה מחדש של user_stats מהנתונים (Idempotent – אפשר להריץ שוב לתיקון סטייה)."""
+    try:
+        print("🔢 בניית מוני משתמשים (user_stats)...")
+        from sqlalchemy.orm import Session
+        from services.user_stats_service import rebuild_user_stats
+        with Session(_alchemy_engine()) as db:
+            rows = rebuild_user_stats(db)
+        print(f"✅ user_stats: {rows} משתמשים.")
+        return True
+    except Exception as e:
+        print(f"❌ שגיאה בבניית user_stats: {e}")
+        return False
+
+
+def rebuild_analytics() -> bool:
+    """בנייה מלאה של טבלאות הסיכום לאנליטיקה (השרת ממשיך אינקרמנטלית מכאן)."""
+    try:
+        print("📊 בניית סיכומי אנליטיקה...")
+        from sqlalchemy.orm import Session
+        from services.analytics_rollup import refresh_rollup
+        with Session(_alchemy_engine()) as db:
+            refresh_rollup(db, full=True)
+        print("✅ סיכומי אנליטיקה נבנו.")
+        return True
+    except Exception as e:
+        print(f"❌ שגיאה בבניית סיכומי אנליטיקה: {e}")
+        return False
+
+
 def show_summary():
     """הצגת סיכום קצר (counts + רשימת ספקים)."""
     try:
@@ -315,6 +528,8 @@ def main():
     if not create_tables():
         return
     insert_demo_data()
+    rebuild_stats()
+    rebuild_analytics()
     show_summary()
 
     print("\n🎉 הסתיים. אפשר להפעיל את השרת FastAPI ולבדוק את ה-API.")
@@ -0,0 +1,106 @@
+# backend/database/query_metrics.py
+"""
+מדידת שאילתות לכל בקשת HTTP
+hook על before/after_cursor_execute סופר שאילתות וזמן DB לבקשה הנוכחית (ContextVar),
+ומצבר סטטיסטיקה לכל route – לאיתור N+1 תחת עומס אמיתי
+"""
+
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# בקשה עם יותר שאילתות מזה נרשמת ללוג (חשד ל-N+1)
+QUERY_WARN_COUNT = int(os.getenv("DB_QUERY_WARN_COUNT", "20"))
+
+
+class RequestDBStats:
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_current: ContextVar[Optional[RequestDBStats]] = ContextVar("request_db_stats", default=None)
+
+
+def begin_request() -> RequestDBStats:
+    """
+    פתיחת מונה לבקשה. האובייקט עצמו משותף (mutable) – כך שגם route סינכרוני
+    שרץ ב-threadpool (עם עותק של ה-context) מעדכן את אותו מונה.
+    """
+    stats = RequestDBStats()
+    _current.set(stats)
+    return stats
+
+
+def install(engine: Engine):
+    """רישום ה-hooks על ה-engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+class RouteMetrics:
+    """סטטיסטיקה מצטברת לכל route (בזיכרון התהליך)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, stats: RequestDBStats, duration: float):
+        with self._lock:
+            m = self._routes.setdefault(route, {
+                "requests": 0, "queries": 0, "db_time_ms": 0.0,
+                "total_time_ms": 0.0, "max_queries": 0, "max_db_time_ms": 0.0,
+            })
+            db_ms = stats.db_time * 1000
+            m["requests"] += 1
+            m["queries"] += stats.queries
+            m["db_time_ms"] += db_ms
+            m["total_time_ms"] += duration * 1000
+            m["max_queries"] = max(m["max_queries"], stats.queries)
+            m["max_db_time_ms"] = max(m["max_db_time_ms"], db_ms)
+
+        if stats.queries > QUERY_WARN_COUNT:
+            logger.warning(f"{route}: {stats.queries} queries in one request ({stats.db_time * 1000:.0f}ms DB)")
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for route, m in self._routes.items():
+                n = m["requests"] or 1
+                out[route] = {
+                    **{k: round(v, 2) if isinstance(v, float) else v for k, v in m.items()},
+                    "avg_queries": round(m["queries"] / n, 2),
+                    "avg_db_time_ms": round(m["db_time_ms"] / n, 2),
+                }
+            # הכבדים ביותר ב-DB קודם
+            return dict(sorted(out.items(), key=lambda kv: kv[1]["db_time_ms"], reverse=True))
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_metrics = RouteMetrics()
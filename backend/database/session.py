@@ -4,6 +4,7 @@ from urllib.parse import quote_plus
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base  # ⬅️ הוספנו
+from database import query_metrics
 
 load_dotenv()
 
@@ -26,16 +27,30 @@ if not DATABASE_URL:
         f"PWD={DB_PASSWORD};"
         "Encrypt=yes;"
         "TrustServerCertificate=yes;"
-        "Connection Timeout=30;"
+        f"Connection Timeout={os.getenv('DB_CONNECT_TIMEOUT', '30')};"
     )
     DATABASE_URL = "mssql+pyodbc:///?odbc_connect=" + quote_plus(odbc_str)
 
-engine = create_engine(
-    DATABASE_URL,
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+# הגדרות pool – שרת MSSQL מרוחק, לכן כדאי לכוונן לפי העומס
+engine_kwargs = dict(
     pool_pre_ping=True,
-    pool_recycle=300,
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", "30")),
     future=True,
 )
+if DATABASE_URL.startswith("mssql+pyodbc"):
+    # executemany ב-batch אחד של ODBC במקום round-trip לכל שורה
+    engine_kwargs["fast_executemany"] = _env_bool("DB_FAST_EXECUTEMANY", "true")
+
+engine = create_engine(DATABASE_URL, **engine_kwargs)
+
+# ספירת שאילתות וזמן DB לכל בקשה (X-DB-Queries / X-DB-Time-ms, /metrics/db)
+query_metrics.install(engine)
 
 # ⬅️ זה ה-Bas e שהמודלים (Product וכו') צריכים
 Base = declarative_base()
@@ -6,6 +6,8 @@ from routers.orders_router import router as orders_router
 from routers.products_router import router as products_router
 from routers.users_router import router as users_router
 from routers.owner_links_router import router as owner_links_router
+from routers.events_router import router as events_router
+from routers.analytics_router import router as analytics_router
 
 # תת-שערים
 from routers.images_gateway_router import router as images_gateway_router    # שרת התמונות
@@ -18,6 +20,8 @@ gateway_router.include_router(users_router)           # /gateway/users/...
 gateway_router.include_router(owner_links_router)     # /gateway/owner-links/...
 gateway_router.include_router(products_router)        # /gateway/products/...
 gateway_router.include_router(orders_router)          # /gateway/orders/...
+gateway_router.include_router(events_router)          # /gateway/events/stream (SSE)
+gateway_router.include_router(analytics_router)       # /gateway/analytics/... (טבלאות סיכום)
 
 # External services routers
 gateway_router.include_router(images_gateway_router)  # /gateway/images/...
@@ -1,12 +1,15 @@
 # backend/main.py
+import asyncio
 import os
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 from contextlib import asynccontextmanager
 
 # חיבור לבסיס הנתונים
 from database.session import engine
+from database import query_metrics
 
 # ⬅️ שער אחוד שמאגד את כל הראוטרים (DB, AI, ותמונות) תחת /gateway/*
 from gateway.gateway_router import gateway_router
@@ -49,6 +52,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
 
+    # אינדקס אזורי שירות בזיכרון (אם נכשל – ייטען בעצלות בבקשה הראשונה)
+    from database.session import SessionLocal
+    from services.service_area_index import service_area_index
+    if service_area_index.load(SessionLocal):
+        print("✅ Service area index loaded")
+
+    # רענון טבלאות הסיכום לאנליטיקה ברקע (ANALYTICS_ROLLUP=0 – כבוי, למשל ב-workers נוספים)
+    rollup_task = None
+    if os.getenv("ANALYTICS_ROLLUP", "1") != "0":
+        from services.analytics_rollup import rollup_loop
+        rollup_task = asyncio.create_task(rollup_loop(SessionLocal))
+        print("📊 Analytics rollup scheduled")
+
     # בדיקת Cloudinary
     if HAS_CLOUDINARY:
         try:
@@ -62,7 +78,7 @@ async def lifespan(app: FastAPI):
     if HAS_CHAT_AI:
         try:
             # בדיקת תקינות השירותים
-            health = _chat_service.health_check()
+            health = await _chat_service.health_check_async()
             qdrant_status = "✅" if health.get("qdrant_connected") else "❌"
             ollama_status = "✅" if health.get("ollama_ready") else "❌"
             
@@ -79,6 +95,14 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("🛑 Shutting down…")
+    if rollup_task is not None:
+        rollup_task.cancel()
+        try:
+            await rollup_task
+        except asyncio.CancelledError:
+            pass
+    from services.http_client import aclose_async_client
+    await aclose_async_client()
 
 
 def create_app() -> FastAPI:
@@ -98,6 +122,53 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # מדידת DB לכל בקשה: מספר שאילתות וזמן DB בכותרות התגובה + מצבר לפי route
+    @app.middleware("http")
+    async def db_timing(request: Request, call_next):
+        stats = query_metrics.begin_request()
+        start = time.perf_counter()
+        response = await call_next(request)
+        # בקשות שלא התאימו ל-route (404, סורקים) – מפתח אחד, לא URL גולמי לכל כתובת
+        route = request.scope.get("route")
+        route_key = f"{request.method} {getattr(route, 'path', None) or '<unmatched>'}"
+
+        if "content-length" in response.headers:
+            duration = time.perf_counter() - start
+            response.headers["X-DB-Queries"] = str(stats.queries)
+            response.headers["X-DB-Time-ms"] = f"{stats.db_time * 1000:.1f}"
+            query_metrics.route_metrics.record(route_key, stats, duration)
+            return response
+
+        # סטרימינג (SSE, צ'אט מוזרם, יצוא) – הגוף רץ אחרי הכותרות; נרשם כשהוא מסתיים
+        body = response.body_iterator
+
+        async def _measured_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                query_metrics.route_metrics.record(route_key, stats, time.perf_counter() - start)
+
+        response.body_iterator = _measured_body()
+        return response
+
+    @app.get("/metrics/db")
+    async def db_metrics(reset: bool = False):
+        """סטטיסטיקת DB לפי route (ממוין לפי זמן DB מצטבר) ומצב ה-pool"""
+        data = {
+            "pool": engine.pool.status(),
+            "routes": query_metrics.route_metrics.snapshot(),
+        }
+        if reset:
+            query_metrics.route_metrics.reset()
+        return data
+
+    @app.get("/metrics/cache")
+    async def cache_metrics():
+        """סטטיסטיקת מטמונים לפי namespace (גודל, פגיעות, פינויים, backend משותף)"""
+        from services.cache_layer import cache_registry
+        return cache_registry.stats()
+
     # בריאות מערכת כללית
     @app.get("/health")
     async def health():
@@ -134,7 +205,7 @@ def create_app() -> FastAPI:
         # Chat AI
         if HAS_CHAT_AI:
             try:
-                chat_health = _chat_service.health_check()
+                chat_health = await _chat_service.health_check_async()
                 status["chat_ai"] = {
                     "qdrant": "connected" if chat_health.get("qdrant_connected") else "disconnected",
                     "ollama": "ready" if chat_health.get("ollama_ready") else "not ready",
@@ -1,5 +1,5 @@
 # backend/models/order_item_model.py
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from database.session import Base
 
@@ -9,6 +9,7 @@ class OrderItem(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     order_id   = Column(Integer, ForeignKey("orders.id"), nullable=False)
     quantity   = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=True)  # מחיר בעת ההזמנה (NULL ברשומות ישנות)
 
     order   = relationship("Order", back_populates="items")
     product = relationship("Product")
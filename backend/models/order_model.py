@@ -1,9 +1,9 @@
 # backend/models/order_model.py
-from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
 from sqlalchemy.types import Unicode
 from sqlalchemy.orm import relationship
 from database.session import Base
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 
 class Order(Base):
     __tablename__ = "orders"
@@ -12,7 +12,21 @@ class Order(Base):
     supplier_id  = Column(Integer, ForeignKey("users.id"), nullable=False)
     status       = Column(Unicode(20), nullable=False)  # "בתהליך" / "הושלמה" / "בוצעה"
     created_date = Column(DateTime, server_default=func.now(), nullable=False)
+    updated_at   = Column(DateTime, server_default=func.now(), onupdate=func.now())  # watermark לסנכרון
+    total_amount = Column(Float, nullable=True)  # נשמר ביצירה; NULL בהזמנות ישנות
+    idempotency_key = Column(Unicode(64), nullable=True)  # מניעת כפילות בניסיונות חוזרים של הלקוח
 
     owner    = relationship("User", foreign_keys=[owner_id])
     supplier = relationship("User", foreign_keys=[supplier_id])
     items    = relationship("OrderItem", cascade="all, delete-orphan", back_populates="order")
+
+    __table_args__ = (
+        # keyset pagination: WHERE supplier_id = ? ORDER BY created_date DESC, id DESC
+        Index("ix_orders_supplier_created", "supplier_id", "created_date", "id"),
+        Index("ix_orders_supplier_updated", "supplier_id", "updated_at"),
+        Index("ix_orders_owner_updated", "owner_id", "updated_at"),
+        Index("ux_orders_owner_idempotency", "owner_id", "idempotency_key", unique=True,
+              mssql_where=text("idempotency_key IS NOT NULL")),
+    )
+    # id + created_date/updated_at (server default) חוזרים כבר ב-INSERT (OUTPUT) – בלי refresh נוסף
+    __mapper_args__ = {"eager_defaults": True}
@@ -1,15 +1,21 @@
 from database.session import Base
-from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint
+from sqlalchemy import Column, Integer, ForeignKey, PrimaryKeyConstraint, Index
 from database.session import Base
 
 class SupplierCity(Base):
     __tablename__ = "supplier_cities"
     supplier_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     city_id     = Column(Integer, ForeignKey("cities.id"), primary_key=True)
-    __table_args__ = (PrimaryKeyConstraint("supplier_id", "city_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("supplier_id", "city_id"),
+        Index("ix_supplier_cities_city", "city_id", "supplier_id"),  # "מי משרת את עיר X"
+    )
 
 class SupplierDistrict(Base):
     __tablename__ = "supplier_districts"
     supplier_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     district_id = Column(Integer, ForeignKey("districts.id"), nullable=False)
-    __table_args__ = (PrimaryKeyConstraint("supplier_id", "district_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("supplier_id", "district_id"),
+        Index("ix_supplier_districts_district", "district_id", "supplier_id"),
+    )
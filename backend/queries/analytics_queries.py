@@ -1,11 +1,163 @@
-from sqlalchemy.orm import Session
+# backend/queries/analytics_queries.py
+"""
+שאילתות לוחות הבקרה – רק מטבלאות הסיכום (services/analytics_rollup), אף פעם לא מ-orders.
+הטבלאות מכילות שורה לכל (ספק/מוצר/עיר × יום), כך שעלות השאילתה תלויה בטווח הימים ולא בנפח ההזמנות.
+fill rate = הזמנות שהושלמו / כל ההזמנות באותו טווח.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+
+from database.async_session import AsyncDBSession
+
+
+def _since(days: int) -> date:
+    return date.today() - timedelta(days=max(1, int(days)) - 1)
+
+
+def _fill_rate(completed, total) -> float:
+    return round(completed / total, 4) if total else 0.0
+
 
 class AnalyticsQueries:
-    async def get_suppliers_by_category_stats(self, db: Session):
-        return []
-    
-    async def get_top_rated_suppliers(self, db: Session, limit: int):
-        return []
-    
-    async def get_suppliers_by_location(self, db: Session):
-        return []
\ No newline at end of file
+    async def get_supplier_revenue(self, db: AsyncDBSession, supplier_id: int,
+                                   days: int = 30) -> List[Dict[str, Any]]:
+        """סדרה יומית לספק אחד (רק ימים עם הזמנות)"""
+        rows = (await db.execute(text("""
+            SELECT day, orders_count, completed_orders, units, revenue
+            FROM analytics_supplier_daily
+            WHERE supplier_id = :supplier_id AND day >= :since
+            ORDER BY day
+        """), {"supplier_id": supplier_id, "since": _since(days)})).fetchall()
+        return [{
+            "day": r.day.isoformat(),
+            "orders": r.orders_count,
+            "completed_orders": r.completed_orders,
+            "units": r.units,
+            "revenue": float(r.revenue),
+            "fill_rate": _fill_rate(r.completed_orders, r.orders_count),
+        } for r in rows]
+
+    async def get_suppliers_by_category_stats(self, db: AsyncDBSession,
+                                              days: int = 30) -> List[Dict[str, Any]]:
+        """
+        סיכום לכל ספק בטווח. אין במערכת קטגוריות ספקים – הקיבוץ הוא לפי ספק,
+        וזו גם הטבלה שממנה נגזר ה-fill rate.
+        """
+        rows = (await db.execute(text("""
+            SELECT a.supplier_id, u.company_name,
+                   SUM(a.orders_count) AS orders_count,
+                   SUM(a.completed_orders) AS completed_orders,
+                   SUM(a.units) AS units,
+                   SUM(a.revenue) AS revenue
+            FROM analytics_supplier_daily a
+            JOIN users u ON u.id = a.supplier_id
+            WHERE a.day >= :since
+            GROUP BY a.supplier_id, u.company_name
+            ORDER BY revenue DESC
+        """), {"since": _since(days)})).fetchall()
+        return [self._supplier_row(r) for r in rows]
+
+    async def get_top_rated_suppliers(self, db: AsyncDBSession, limit: int = 10,
+                                      days: int = 30) -> List[Dict[str, Any]]:
+        """הספקים המובילים בטווח – לפי הכנסות (אין דירוגים במערכת)"""
+        rows = (await db.execute(text("""
+            SELECT TOP (:limit) a.supplier_id, u.company_name,
+                   SUM(a.orders_count) AS orders_count,
+                   SUM(a.completed_orders) AS completed_orders,
+                   SUM(a.units) AS units,
+                   SUM(a.revenue) AS revenue
+            FROM analytics_supplier_daily a
+            JOIN users u ON u.id = a.supplier_id
+            WHERE a.day >= :since
+            GROUP BY a.supplier_id, u.company_name
+            ORDER BY revenue DESC, orders_count DESC
+        """), {"limit": limit, "since": _since(days)})).fetchall()
+        return [self._supplier_row(r) for r in rows]
+
+    @staticmethod
+    def _supplier_row(r) -> Dict[str, Any]:
+        return {
+            "supplier_id": r.supplier_id,
+            "company_name": r.company_name,
+            "orders": r.orders_count,
+            "completed_orders": r.completed_orders,
+            "units": r.units,
+            "revenue": float(r.revenue),
+            "fill_rate": _fill_rate(r.completed_orders, r.orders_count),
+        }
+
+    async def get_top_products(self, db: AsyncDBSession, limit: int = 10, days: int = 30,
+                               supplier_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """המוצרים המובילים לפי יחידות שהוזמנו (כל המערכת או ספק אחד)"""
+        supplier_filter = "AND a.supplier_id = :supplier_id" if supplier_id is not None else ""
+        rows = (await db.execute(text(f"""
+            SELECT TOP (:limit) a.product_id, p.product_name, a.supplier_id,
+                   SUM(a.orders_count) AS orders_count,
+                   SUM(a.units) AS units,
+                   SUM(a.revenue) AS revenue
+            FROM analytics_product_daily a
+            LEFT JOIN products p ON p.id = a.product_id
+            WHERE a.day >= :since {supplier_filter}
+            GROUP BY a.product_id, p.product_name, a.supplier_id
+            ORDER BY units DESC, revenue DESC
+        """), {"limit": limit, "since": _since(days), "supplier_id": supplier_id})).fetchall()
+        return [{
+            "product_id": r.product_id,
+            "name": r.product_name,
+            "supplier_id": r.supplier_id,
+            "orders": r.orders_count,
+            "units": r.units,
+            "revenue": float(r.revenue),
+        } for r in rows]
+
+    async def get_suppliers_by_location(self, db: AsyncDBSession, days: int = 30,
+                                        level: str = "city") -> List[Dict[str, Any]]:
+        """הזמנות והכנסות לפי מיקום החנות המזמינה – עיר או מחוז (level='district')"""
+        if level == "district":
+            sql = """
+                SELECT d.id AS location_id, d.name_he AS name,
+                       SUM(a.orders_count) AS orders_count, SUM(a.revenue) AS revenue
+                FROM analytics_city_daily a
+                LEFT JOIN cities c ON c.id = a.city_id
+                LEFT JOIN districts d ON d.id = c.district_id
+                WHERE a.day >= :since
+                GROUP BY d.id, d.name_he
+                ORDER BY orders_count DESC
+            """
+        else:
+            sql = """
+                SELECT a.city_id AS location_id, c.name_he AS name,
+                       SUM(a.orders_count) AS orders_count, SUM(a.revenue) AS revenue
+                FROM analytics_city_daily a
+                LEFT JOIN cities c ON c.id = a.city_id
+                WHERE a.day >= :since
+                GROUP BY a.city_id, c.name_he
+                ORDER BY orders_count DESC
+            """
+        rows = (await db.execute(text(sql), {"since": _since(days)})).fetchall()
+        return [{
+            "location_id": r.location_id or None,  # 0/NULL – חנות בלי עיר
+            "name": r.name or "לא ידוע",
+            "orders": r.orders_count,
+            "revenue": float(r.revenue),
+        } for r in rows]
+
+    async def rollup_status(self, db: AsyncDBSession) -> Dict[str, Any]:
+        row = (await db.execute(text("""
+            SELECT watermark, refreshed_at, last_mode
+            FROM analytics_rollup_state WHERE name = 'orders'
+        """))).fetchone()
+        if not row:
+            return {"built": False}
+        return {
+            "built": True,
+            "watermark": row.watermark,
+            "refreshed_at": row.refreshed_at,
+            "last_mode": row.last_mode,
+        }
+
+
+analytics_queries = AnalyticsQueries()
@@ -0,0 +1,68 @@
+# backend/routers/analytics_router.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+
+from database.session import SessionLocal
+from database.async_session import get_async_db, AsyncDBSession
+from queries.analytics_queries import analytics_queries
+from services.analytics_rollup import refresh_rollup_with
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+# כל הנתיבים קוראים רק מטבלאות הסיכום (analytics_*_daily), לא מההזמנות עצמן
+
+@router.get("/suppliers/top")
+async def top_suppliers(
+    limit: int = Query(default=10, ge=1, le=100),
+    days: int = Query(default=30, ge=1, le=3660),
+    db: AsyncDBSession = Depends(get_async_db)
+):
+    return await analytics_queries.get_top_rated_suppliers(db, limit=limit, days=days)
+
+@router.get("/suppliers/summary")
+async def suppliers_summary(
+    days: int = Query(default=30, ge=1, le=3660),
+    db: AsyncDBSession = Depends(get_async_db)
+):
+    return await analytics_queries.get_suppliers_by_category_stats(db, days=days)
+
+@router.get("/suppliers/{supplier_id}/revenue")
+async def supplier_revenue(
+    supplier_id: int,
+    days: int = Query(default=30, ge=1, le=3660),
+    db: AsyncDBSession = Depends(get_async_db)
+):
+    return await analytics_queries.get_supplier_revenue(db, supplier_id, days=days)
+
+@router.get("/products/top")
+async def top_products(
+    limit: int = Query(default=10, ge=1, le=100),
+    days: int = Query(default=30, ge=1, le=3660),
+    supplier_id: Optional[int] = Query(default=None),
+    db: AsyncDBSession = Depends(get_async_db)
+):
+    return await analytics_queries.get_top_products(db, limit=limit, days=days, supplier_id=supplier_id)
+
+@router.get("/locations")
+async def orders_by_location(
+    days: int = Query(default=30, ge=1, le=3660),
+    level: str = Query(default="city", pattern="^(city|district)$"),
+    db: AsyncDBSession = Depends(get_async_db)
+):
+    return await analytics_queries.get_suppliers_by_location(db, days=days, level=level)
+
+@router.get("/status")
+async def rollup_status(db: AsyncDBSession = Depends(get_async_db)):
+    return await analytics_queries.rollup_status(db)
+
+@router.post("/refresh")
+async def refresh(full: bool = Query(default=False)):
+    """רענון ידני (אינקרמנטלי, או full=true לבנייה מחדש); לא רץ במקביל לרענון אחר"""
+    try:
+        result = await run_in_threadpool(refresh_rollup_with, SessionLocal, full)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"שגיאה ברענון האנליטיקה: {e}")
+    if result.get("skipped"):
+        raise HTTPException(status_code=409, detail="רענון אנליטיקה כבר רץ כעת")
+    return result
@@ -1,11 +1,17 @@
 # החלף בקובץ backend/routers/gateway_router_chat.py
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
-from database.session import get_db
+from database.session import get_db, SessionLocal
 from services.chat_service import ChatService
+from services.http_client import llm_limiter
+from services.embedding_store import get_embedding_store
+from services.user_profile_service import user_profiles
 from typing import Optional, Dict, Any
+import json
 import logging
 
 # הגדרת לוגר
@@ -31,12 +37,26 @@ class ChatResponse(BaseModel):
     dynamic_context_used: Optional[bool] = None  # חדש
     error_code: Optional[str] = None
     response_time: Optional[float] = None
+    from_cache: Optional[bool] = None
+    semantic_similarity: Optional[float] = None
 
 class HealthCheckResponse(BaseModel):
     status: str
     services: dict
     timestamp: str
 
+async def _load_user_context(db: Session, user_id: int) -> Dict[str, Any]:
+    """נתוני משתמש + מונים מספק הפרופילים המשותף; DB (ב-threadpool) רק בפספוס מטמון"""
+    try:
+        profile = user_profiles.cached(user_id)
+        if profile is None:
+            profile = await run_in_threadpool(user_profiles.get, db, user_id)
+        return dict(profile) if profile else {}
+    except Exception as e:
+        logger.warning(f"לא ניתן לקבל נתוני משתמש מבסיס הנתונים: {e}")
+        return {}
+
+
 @router.post("/message", response_model=ChatResponse)
 async def send_chat_message(
     chat_data: ChatMessageRequest,
@@ -51,69 +71,11 @@ async def send_chat_message(
     try:
         logger.info(f"קבלת הודעת צ'אט מהמשתמש {chat_data.user_id}: {chat_data.message[:50]}...")
         
-        # אם יש נתוני משתמש מהפרונט, נשתמש בהם
-        user_context = chat_data.user_context or {}
-        
-        # אם אין נתוני משתמש, ננסה לקבל אותם מבסיס הנתונים
-        if not user_context:
-            try:
-                from sqlalchemy import text
-                user_query = text("""
-                    SELECT id, username, company_name, contact_name, phone, userType,
-                           city_id, street, house_number, opening_time, closing_time
-                    FROM users WHERE id = :user_id
-                """)
-                
-                user_result = db.execute(user_query, {"user_id": chat_data.user_id}).fetchone()
-                
-                if user_result:
-                    user_context = {
-                        "id": user_result.id,
-                        "username": user_result.username,
-                        "company_name": user_result.company_name,
-                        "contact_name": user_result.contact_name,
-                        "phone": user_result.phone,
-                        "userType": user_result.userType,
-                        "city_id": user_result.city_id,
-                        "street": user_result.street,
-                        "house_number": user_result.house_number,
-                        "opening_time": str(user_result.opening_time) if user_result.opening_time else None,
-                        "closing_time": str(user_result.closing_time) if user_result.closing_time else None
-                    }
-                    
-                    # הוספת נתונים ספציפיים לסוג המשתמש
-                    if user_result.userType == "Supplier":
-                        # ספירת מוצרים והזמנות
-                        stats = db.execute(text("""
-                            SELECT 
-                                (SELECT COUNT(*) FROM products WHERE supplier_id = :user_id AND is_active = 1) as products,
-                                (SELECT COUNT(*) FROM orders WHERE supplier_id = :user_id AND status IN (N'בתהליך', N'בוצעה')) as active_orders,
-                                (SELECT COUNT(*) FROM products WHERE supplier_id = :user_id AND stock = 0 AND is_active = 1) as out_of_stock
-                        """), {"user_id": chat_data.user_id}).fetchone()
-                        
-                        if stats:
-                            user_context.update({
-                                "products_count": stats.products or 0,
-                                "active_orders": stats.active_orders or 0,
-                                "out_of_stock_products": stats.out_of_stock or 0
-                            })
-                    
-                    elif user_result.userType == "StoreOwner":
-                        # ספירת הזמנות וספקים
-                        stats = db.execute(text("""
-                            SELECT 
-                                (SELECT COUNT(*) FROM orders WHERE owner_id = :user_id AND status IN (N'בתהליך', N'בוצעה')) as active_orders,
-                                (SELECT COUNT(*) FROM owner_supplier_links WHERE owner_id = :user_id AND status = 'APPROVED') as connected_suppliers
-                        """), {"user_id": chat_data.user_id}).fetchone()
-                        
-                        if stats:
-                            user_context.update({
-                                "active_orders": stats.active_orders or 0,
-                                "connected_suppliers": stats.connected_suppliers or 0
-                            })
-                            
-            except Exception as e:
-                logger.warning(f"לא ניתן לקבל נתוני משתמש מבסיס הנתונים: {e}")
+        # פרופיל + מונים (user_stats) מהמטמון המשותף; נתוני הפרונט (פרטי ההתחברות) גוברים
+        user_context = {
+            **await _load_user_context(db, chat_data.user_id),
+            **(chat_data.user_context or {}),
+        }
         
         # עיבוד ההודעה דרך שירות הצ'אט המשודרג
         result = await chat_service.process_chat_message_with_context(
@@ -132,7 +94,9 @@ async def send_chat_message(
                 user_type=result.get("user_type"),
                 contexts_found=result.get("contexts_found", 0),
                 dynamic_context_used=result.get("dynamic_context_used", False),  # חדש
-                response_time=result.get("response_time")
+                response_time=result.get("response_time"),
+                from_cache=result.get("from_cache", False),
+                semantic_similarity=result.get("semantic_similarity")
             )
         else:
             logger.warning(f"כשל בעיבוד הודעה למשתמש {chat_data.user_id}: {result['message']}")
@@ -150,6 +114,39 @@ async def send_chat_message(
             detail=f"שגיאה בעיבוד הודעת הצ'אט: {str(e)}"
         )
 
+@router.post("/message/stream")
+async def stream_chat_message(chat_data: ChatMessageRequest):
+    """
+    כמו /message, אבל התשובה מוזרמת כ-NDJSON (אירוע JSON בכל שורה):
+    {"type": "token", "text": ...} עם כל קטע מה-LLM, ובסוף {"type": "done", ...}
+    בפורמט של ChatResponse (+ first_token_time)
+    """
+    logger.info(f"קבלת הודעת צ'אט (stream) מהמשתמש {chat_data.user_id}: {chat_data.message[:50]}...")
+
+    async def ndjson():
+        # Session משלו: dependency עם yield נסגר לפני שגוף ה-StreamingResponse רץ
+        db = SessionLocal()
+        try:
+            user_context = {
+                **await _load_user_context(db, chat_data.user_id),
+                **(chat_data.user_context or {}),
+            }
+            async for event in chat_service.stream_chat_message_with_context(
+                user_id=chat_data.user_id,
+                message=chat_data.message,
+                user_context=user_context,
+                db=db
+            ):
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        finally:
+            await run_in_threadpool(db.close)
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """
@@ -161,7 +158,7 @@ async def health_check():
         from datetime import datetime
         
         logger.info("בדיקת תקינות שירותי הצ'אט")
-        health = chat_service.health_check()
+        health = await chat_service.health_check_async()
         
         overall_status = "healthy" if all(health.values()) else "degraded"
         
@@ -187,7 +184,7 @@ async def health_check():
 async def get_status():
     """מידע מהיר על מצב הצ'אט"""
     try:
-        health = chat_service.health_check()
+        health = await chat_service.health_check_async()
         return {
             "online": True,
             "qdrant_connected": health.get("qdrant_connected", False),
@@ -199,6 +196,19 @@ async def get_status():
             "error": str(e)
         }
 
+@router.get("/metrics")
+async def get_chat_metrics():
+    """מצב התור מול ה-LLM (רצות/ממתינות, זמני המתנה), מטמון החיפוש ב-Qdrant, מאגר ה-embeddings, שיעור הפגיעה של המטמון הסמנטי ומטמון הפרופילים"""
+    store = get_embedding_store()
+    store_stats = await run_in_threadpool(store.stats) if store is not None else None
+    return {
+        "llm": llm_limiter.stats(),
+        "qdrant_search_cache": chat_service.qdrant_service.cache_stats(),
+        "embedding_store": store_stats,
+        "semantic_cache": chat_service.semantic_cache.stats(),
+        "user_profiles": user_profiles.stats(),
+    }
+
 @router.get("/info")
 async def get_chat_info():
     """מידע על יכולות הצ'אט"""
@@ -214,6 +224,7 @@ async def get_chat_info():
             "הסבר על תהליכים עסקיים",
             "עזרה בניהול מוצרים והזמנות",
             "הדרכה לביצוע פעולות במערכת",
-            "תמיכה ביצירת קשרים עם ספקים/בעלי חנויות"
+            "תמיכה ביצירת קשרים עם ספקים/בעלי חנויות",
+            "תשובות בהזרמה (POST /message/stream)"
         ]
     }
\ No newline at end of file
@@ -1,10 +1,23 @@
 # backend/routers/orders_router.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, func, text, bindparam, update, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import base64
 
-from database.session import get_db
-from schemas.orders import OrderResponse, OrderItemResponse, OrderCreate, OrderStatusUpdate
+from database.session import get_db, SessionLocal
+from database.async_session import get_async_db, AsyncDBSession
+from services.events_service import event_broker
+from services import orders_export
+from services.user_profile_service import user_profiles
+from services.user_stats_service import lock_user_stats, refresh_user_stats
+from schemas.orders import (
+    OrderResponse, OrderItemResponse, OrderCreate, OrderStatusUpdate, OrderStatus,
+    OrdersBulkStatusUpdate, BulkStatusItemResult, OrdersBulkStatusResponse, OrdersChangesResponse,
+)
 from models.order_model import Order
 from models.order_item_model import OrderItem
 from models.product_model import Product
@@ -12,11 +25,17 @@ from models.user_model import User
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+def _item_price(it: OrderItem) -> float:
+    # מחיר שנשמר בעת ההזמנה; רשומות ישנות (לפני snapshot) – מחיר המוצר הנוכחי
+    if it.unit_price is not None:
+        return float(it.unit_price)
+    return float(it.product.unit_price)
+
 def _order_to_response(o: Order) -> OrderResponse:
     items: List[OrderItemResponse] = []
     total = 0.0
     for it in o.items:
-        price = float(it.product.unit_price)
+        price = _item_price(it)
         item_total = price * it.quantity
         total += item_total
         items.append(OrderItemResponse(
@@ -35,102 +54,452 @@ def _order_to_response(o: Order) -> OrderResponse:
         supplier_id=o.supplier_id,
         status=o.status,
         created_date=o.created_date,
+        updated_at=o.updated_at,
         items=items,
+        total_amount=float(o.total_amount) if o.total_amount is not None else total
+    )
+
+def _order_to_summary(o: Order, total: float) -> OrderResponse:
+    """תצוגת סיכום – ללא פריטים (לא טוען order_items/products)"""
+    return OrderResponse(
+        id=o.id,
+        owner_id=o.owner_id,
+        owner_name=o.owner.contact_name if o.owner else None,
+        owner_company=o.owner.company_name if o.owner else None,
+        supplier_id=o.supplier_id,
+        status=o.status,
+        created_date=o.created_date,
+        updated_at=o.updated_at,
+        items=[],
         total_amount=total
     )
 
+def _missing_totals_stmt(order_ids: List[int]):
+    return (
+        select(
+            OrderItem.order_id,
+            func.sum(OrderItem.quantity * func.coalesce(OrderItem.unit_price, Product.unit_price)),
+        )
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id.in_(order_ids))
+        .group_by(OrderItem.order_id)
+    )
+
+def _summary_totals(db: Session, orders: List[Order]) -> Dict[int, float]:
+    """
+    סכומי הזמנות לתצוגת סיכום: מהעמודה orders.total_amount,
+    ולהזמנות ישנות שאין להן סכום שמור – SUM אחד בצד ה-SQL.
+    """
+    totals = {o.id: float(o.total_amount) for o in orders if o.total_amount is not None}
+    missing = [o.id for o in orders if o.total_amount is None]
+    if missing:
+        rows = db.execute(_missing_totals_stmt(missing)).all()
+        totals.update({oid: float(t or 0) for oid, t in rows})
+    return totals
+
+async def _summary_totals_async(db: AsyncDBSession, orders: List[Order]) -> Dict[int, float]:
+    totals = {o.id: float(o.total_amount) for o in orders if o.total_amount is not None}
+    missing = [o.id for o in orders if o.total_amount is None]
+    if missing:
+        rows = (await db.execute(_missing_totals_stmt(missing))).all()
+        totals.update({oid: float(t or 0) for oid, t in rows})
+    return totals
+
+# ---------- cursor (keyset על created_date, id) ----------
+def _encode_cursor(o: Order) -> str:
+    raw = f"{o.created_date.isoformat()}|{o.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created, oid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created), int(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="cursor לא תקין")
+
 @router.get("/supplier/{supplier_id}", response_model=List[OrderResponse])
-def get_supplier_orders(supplier_id: int, db: Session = Depends(get_db)):
+async def get_supplier_orders(
+    supplier_id: int,
+    response: Response,
+    status: Optional[List[OrderStatus]] = Query(default=None),
+    owner_id: Optional[int] = Query(default=None),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=50, ge=1, le=500),
+    include_items: bool = Query(default=True),
+    db: AsyncDBSession = Depends(get_async_db),
+):
+    """
+    רשימת הזמנות לספק, מסוננת בצד השרת ומחולקת לעמודים.
+    העמוד הבא מתקבל ע"י שליחת ה-cursor שחוזר בכותרת X-Next-Cursor.
+    include_items=false מחזיר סיכום בלבד (סכום מ-orders.total_amount, בלי פריטים).
+    """
+    q = select(Order).where(Order.supplier_id == supplier_id)
+    if status:
+        q = q.where(Order.status.in_(status))
+    if owner_id is not None:
+        q = q.where(Order.owner_id == owner_id)
+    if date_from:
+        q = q.where(Order.created_date >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        # date_to כולל – עד תחילת היום שאחריו
+        q = q.where(Order.created_date < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    if cursor:
+        c_date, c_id = _decode_cursor(cursor)
+        q = q.where(or_(
+            Order.created_date < c_date,
+            and_(Order.created_date == c_date, Order.id < c_id),
+        ))
+
+    # selectinload במקום joinedload על items – joinedload על collection עם LIMIT מכפיל שורות
+    q = q.options(joinedload(Order.owner))
+    if include_items:
+        q = q.options(selectinload(Order.items).joinedload(OrderItem.product))
+    orders = (await db.execute(
+        q.order_by(Order.created_date.desc(), Order.id.desc()).limit(limit + 1)
+    )).scalars().all()
+
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    if has_more:
+        response.headers["X-Next-Cursor"] = _encode_cursor(orders[-1])
+    if not include_items:
+        totals = await _summary_totals_async(db, orders)
+        return [_order_to_summary(o, totals.get(o.id, 0.0)) for o in orders]
+    return [_order_to_response(o) for o in orders]
+
+@router.get("/owner/{owner_id}", response_model=List[OrderResponse])
+def get_owner_orders(owner_id: int, include_items: bool = Query(default=True), db: Session = Depends(get_db)):
+    q = db.query(Order).options(joinedload(Order.supplier))
+    if include_items:
+        q = q.options(joinedload(Order.items).joinedload(OrderItem.product))
     orders = (
-        db.query(Order)
-        .options(
-            joinedload(Order.owner),
-            joinedload(Order.items).joinedload(OrderItem.product),
-        )
-        .filter(Order.supplier_id == supplier_id)
+        q.filter(Order.owner_id == owner_id)
         .order_by(Order.created_date.desc())
         .all()
     )
-    return [_order_to_response(o) for o in orders]
+    totals = _summary_totals(db, orders) if not include_items else {}
+    out: List[OrderResponse] = []
+    for o in orders:
+        resp = _order_to_response(o) if include_items else _order_to_summary(o, totals.get(o.id, 0.0))
+        out.append(_as_owner_view(resp, o))
+    return out
 
-@router.get("/owner/{owner_id}", response_model=List[OrderResponse])
-def get_owner_orders(owner_id: int, db: Session = Depends(get_db)):
+def _as_owner_view(resp: OrderResponse, o: Order) -> OrderResponse:
+    # שמירת תאימות ל-UI: בשאילתה הישנה הצגת פרטי הספק בשדות owner_*
+    resp.owner_name = o.supplier.contact_name if o.supplier else resp.owner_name
+    resp.owner_company = o.supplier.company_name if o.supplier else resp.owner_company
+    return resp
+
+# ---------- סנכרון אינקרמנטלי: רק הזמנות שנוצרו/השתנו מאז watermark ----------
+# updated_at נחתם ב-GETDATE() בזמן הכתיבה ולא ב-commit: טרנזקציה עם חותמת מוקדמת
+# יכולה להתגלות אחרי שכבר נקראה שורה מאוחרת יותר. ה-watermark לא מתקדם מעבר
+# ל"עכשיו פחות חפיפה", כך שהסנכרון הבא קורא שוב את החלון הזה (כמו ב-analytics_rollup)
+SYNC_OVERLAP = timedelta(minutes=5)
+
+def _changed_orders(db: Session, since: datetime, *filters) -> Tuple[List[Order], datetime]:
+    """
+    הזמנות עם updated_at >= since. ההשוואה כוללת (>=) וה-watermark נשאר SYNC_OVERLAP
+    מאחורי שעון השרת – רשומות נשלחות שוב, המיזוג בצד הלקוח לפי id כך שכפילות לא מזיקה
+    ולא מפספסים עדכון שבוצע לו commit באיחור.
+    """
+    server_now = db.execute(text("SELECT GETDATE()")).scalar()
     orders = (
         db.query(Order)
         .options(
+            joinedload(Order.owner),
             joinedload(Order.supplier),
-            joinedload(Order.items).joinedload(OrderItem.product),
+            selectinload(Order.items).joinedload(OrderItem.product),
         )
-        .filter(Order.owner_id == owner_id)
-        .order_by(Order.created_date.desc())
+        .filter(Order.updated_at >= since, *filters)
+        .order_by(Order.updated_at)
         .all()
     )
-    # שמירת תאימות ל-UI: בשאילתה הישנה הצגת פרטי הספק בשדות owner_*
-    out: List[OrderResponse] = []
-    for o in orders:
-        resp = _order_to_response(o)
-        resp.owner_name = o.supplier.contact_name if o.supplier else resp.owner_name
-        resp.owner_company = o.supplier.company_name if o.supplier else resp.owner_company
-        out.append(resp)
-    return out
+    max_seen = max((o.updated_at for o in orders if o.updated_at), default=since)
+    watermark = min(max_seen, server_now - SYNC_OVERLAP)
+    return orders, watermark
+
+@router.get("/supplier/{supplier_id}/changes", response_model=OrdersChangesResponse)
+def get_supplier_order_changes(supplier_id: int, since: datetime = Query(...), db: Session = Depends(get_db)):
+    orders, watermark = _changed_orders(db, since, Order.supplier_id == supplier_id)
+    return OrdersChangesResponse(orders=[_order_to_response(o) for o in orders], watermark=watermark)
+
+@router.get("/owner/{owner_id}/changes", response_model=OrdersChangesResponse)
+def get_owner_order_changes(owner_id: int, since: datetime = Query(...), db: Session = Depends(get_db)):
+    orders, watermark = _changed_orders(db, since, Order.owner_id == owner_id)
+    return OrdersChangesResponse(
+        orders=[_as_owner_view(_order_to_response(o), o) for o in orders],
+        watermark=watermark,
+    )
+
+# ---------- יצוא עמודתי (Arrow/Parquet) בסטרימינג מה-DB ----------
+@router.get("/export")
+def export_orders(
+    kind: str = Query(default="orders", pattern="^(orders|items)$"),
+    format: str = Query(default="parquet", pattern="^(arrow|parquet)$"),
+    owner_id: Optional[int] = Query(default=None),
+    supplier_id: Optional[int] = Query(default=None),
+    history: Optional[bool] = Query(default=None),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    batch_size: int = Query(default=orders_export.DEFAULT_BATCH_SIZE, ge=100, le=50000),
+):
+    """
+    הזמנות (kind=orders) או שורות פריטים (kind=items) כ-Arrow IPC stream / Parquet.
+    history=true – רק הושלמה, false – רק פעילות, בלי – הכול. date_to כולל.
+    """
+    if not orders_export.HAS_PYARROW:
+        raise HTTPException(status_code=503, detail="יצוא עמודתי לא זמין בשרת (pyarrow לא מותקן)")
+    if owner_id is None and supplier_id is None:
+        raise HTTPException(status_code=400, detail="נדרש owner_id או supplier_id")
+
+    stream = orders_export.stream_export(
+        SessionLocal, kind, format,
+        owner_id=owner_id, supplier_id=supplier_id, history=history,
+        date_from=datetime.combine(date_from, datetime.min.time()) if date_from else None,
+        date_to=datetime.combine(date_to + timedelta(days=1), datetime.min.time()) if date_to else None,
+        batch_size=batch_size,
+    )
+    filename = f"orders_{kind}_{owner_id or supplier_id}.{format}"
+    return StreamingResponse(
+        stream,
+        media_type=orders_export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+def _load_order_full(db: Session, order_id: int) -> Optional[Order]:
+    return (
+        db.query(Order)
+        .options(joinedload(Order.owner), joinedload(Order.items).joinedload(OrderItem.product))
+        .get(order_id)
+    )
+
+def _find_by_idempotency_key(db: Session, owner_id: int, key: str) -> Optional[Order]:
+    oid = (
+        db.query(Order.id)
+        .filter(Order.owner_id == owner_id, Order.idempotency_key == key)
+        .scalar()
+    )
+    return _load_order_full(db, oid) if oid else None
 
 @router.post("/", response_model=OrderResponse, status_code=201)
-def create_order(order: OrderCreate, owner_id: int, db: Session = Depends(get_db)):
-    owner = db.query(User).filter(User.id == owner_id, User.userType == "StoreOwner").first()
-    if not owner:
+def create_order(
+    order: OrderCreate,
+    owner_id: int,
+    response: Response,
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key", max_length=64),
+    db: Session = Depends(get_db),
+):
+    """
+    יצירת הזמנה. Idempotency-Key (אופציונלי): ניסיון חוזר עם אותו מפתח
+    מחזיר את ההזמנה שכבר נוצרה (200) במקום ליצור כפילות.
+    """
+    if idempotency_key:
+        existing = _find_by_idempotency_key(db, owner_id, idempotency_key)
+        if existing:
+            response.status_code = 200
+            return _order_to_response(existing)
+
+    # בעל החנות והספק בשאילתה אחת
+    users = {
+        u.id: u for u in
+        db.query(User).filter(User.id.in_([owner_id, order.supplier_id])).all()
+    }
+    owner = users.get(owner_id)
+    if not owner or owner.userType != "StoreOwner":
         raise HTTPException(status_code=404, detail="בעל חנות לא נמצא")
-    supplier = db.query(User).filter(User.id == order.supplier_id, User.userType == "Supplier").first()
-    if not supplier:
+    supplier = users.get(order.supplier_id)
+    if not supplier or supplier.userType != "Supplier":
         raise HTTPException(status_code=404, detail="ספק לא נמצא")
 
-    o = Order(owner_id=owner_id, supplier_id=order.supplier_id, status="בוצעה")
-    db.add(o)
-    db.flush()
-
+    # בדיקת כל המוצרים ב-IN אחד במקום SELECT לכל שורה
+    product_ids = {item.product_id for item in order.items}
+    products = {
+        p.id: p for p in
+        db.query(Product)
+        .filter(Product.id.in_(product_ids), Product.supplier_id == order.supplier_id)
+        .all()
+    }
     for item in order.items:
-        p = (
-            db.query(Product)
-            .filter(Product.id == item.product_id, Product.supplier_id == order.supplier_id)
-            .first()
-        )
-        if not p:
-            db.rollback()
+        if item.product_id not in products:
             raise HTTPException(status_code=400, detail=f"מוצר {item.product_id} לא נמצא או לא שייך לספק")
-        db.add(OrderItem(order_id=o.id, product_id=p.id, quantity=item.quantity))
 
-    db.commit()
-    db.refresh(o)  # חשוב: מביא את created_date (ושאר ברירות־מחדל מה-DB)
+    # נעילת המונים של שני הצדדים לפני ה-INSERT (ראו user_stats_service)
+    lock_user_stats(db, [owner_id, order.supplier_id])
 
-    # אם את רוצה להמשיך ולהחזיר עם פרטי מוצרים טעונים מראש – אפשר להשאיר את השאילתה,
-    # אבל זה כבר לא חובה בשביל created_date.
-    # להעדפה על שמירת ה-joinedload, אפשר:
-    o = (
-        db.query(Order)
-        .options(joinedload(Order.owner), joinedload(Order.items).joinedload(OrderItem.product))
-        .get(o.id)
+    o = Order(
+        owner_id=owner_id,
+        supplier_id=order.supplier_id,
+        status="בוצעה",
+        idempotency_key=idempotency_key,
+    )
+    o.owner = owner
+    o.supplier = supplier
+    total = 0.0
+    for item in order.items:
+        p = products[item.product_id]
+        # snapshot של המחיר – שינוי מחיר עתידי לא ישנה הזמנות קיימות
+        price = float(p.unit_price)
+        total += price * item.quantity
+        o.items.append(OrderItem(product=p, quantity=item.quantity, unit_price=price))
+    o.total_amount = total
+    db.add(o)
+
+    try:
+        # INSERT של ההזמנה + INSERT מרובה-שורות לפריטים; id/created_date חוזרים ב-OUTPUT
+        db.flush()
+        resp = _order_to_response(o)
+        owner_view = _as_owner_view(resp.model_copy(), o)
+        refresh_user_stats(db, [owner_id, order.supplier_id])
+        db.commit()
+    except IntegrityError:
+        # מרוץ בין שני ניסיונות עם אותו מפתח – האינדקס הייחודי עצר את השני
+        db.rollback()
+        existing = _find_by_idempotency_key(db, owner_id, idempotency_key) if idempotency_key else None
+        if not existing:
+            raise
+        response.status_code = 200
+        return _order_to_response(existing)
+
+    user_profiles.invalidate(owner_id, order.supplier_id)
+    _publish_order_created(resp, owner_view)
+    return resp
+
+# ---------- אירועי push (SSE) – נשלחים רק אחרי commit ----------
+def _publish_order_created(resp: OrderResponse, owner_view: OrderResponse):
+    event_broker.publish([resp.supplier_id], "order_created", {"order": resp.model_dump(mode="json")})
+    event_broker.publish([resp.owner_id], "order_created", {"order": owner_view.model_dump(mode="json")})
+
+def _publish_order_status(order_id: int, owner_id: int, supplier_id: int, status: str):
+    event_broker.publish(
+        [owner_id, supplier_id], "order_status",
+        {"order_id": order_id, "owner_id": owner_id, "supplier_id": supplier_id, "status": status},
     )
 
-    return _order_to_response(o)
 
+def _decrement_stock_for_orders(db: Session, order_ids: List[int]) -> List[Dict[str, int]]:
+    """
+    הורדת מלאי לכל המוצרים בהזמנות בפקודת UPDATE אחת (set-based).
+    ה-UPDATE קורא וכותב את המלאי תחת נעילת שורה באותה פקודה – שני עדכונים
+    מקבילים על אותו מוצר מתבצעים בזה אחר זה ולא "מאבדים" הורדה.
+    מחזיר את רמות המלאי החדשות.
+    """
+    if not order_ids:
+        return []
+    rows = db.execute(
+        text("""
+            UPDATE p
+            SET p.stock = CASE WHEN p.stock > oi.qty THEN p.stock - oi.qty ELSE 0 END
+            OUTPUT inserted.id AS product_id, inserted.stock AS stock
+            FROM products p WITH (ROWLOCK)
+            JOIN (
+                SELECT product_id, SUM(quantity) AS qty
+                FROM order_items
+                WHERE order_id IN :order_ids
+                GROUP BY product_id
+            ) oi ON oi.product_id = p.id
+        """).bindparams(bindparam("order_ids", expanding=True)),
+        {"order_ids": list(order_ids)},
+    ).fetchall()
+    return [{"product_id": r.product_id, "stock": r.stock} for r in rows]
 
 @router.put("/{order_id}/status", response_model=dict)
 def update_order_status(order_id: int, status_update: OrderStatusUpdate, supplier_id: int, db: Session = Depends(get_db)):
     o = db.query(Order).filter(Order.id == order_id, Order.supplier_id == supplier_id).first()
     if not o:
         raise HTTPException(status_code=404, detail="הזמנה לא נמצאה או אינה שייכת לך")
-    
-    # בדיקה ועדכון מלאי לפני שינוי הסטטוס
-    if o.status == "בוצעה" and status_update.status == "בתהליך":
-        # הורדת מלאי עבור כל פריט בהזמנה
-        for item in o.items:
-            product = db.query(Product).filter(Product.id == item.product_id).first()
-            if product:
-                new_stock = max(0, product.stock - item.quantity)
-                product.stock = new_stock
-    
-    o.status = status_update.status
+    old_status = o.status
+    lock_user_stats(db, [o.owner_id, supplier_id])
+
+    # מעבר סטטוס אטומי: מצליח רק אם הסטטוס לא השתנה מאז שנקרא (מונע הורדת מלאי כפולה)
+    changed = (
+        db.query(Order)
+        .filter(Order.id == order_id, Order.status == old_status)
+        .update({Order.status: status_update.status}, synchronize_session=False)
+    )
+    if not changed:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="סטטוס ההזמנה עודכן במקביל, נסה שוב")
+
+    # הורדת מלאי באותה טרנזקציה עם שינוי הסטטוס
+    stock_updates: List[Dict[str, int]] = []
+    if old_status == "בוצעה" and status_update.status == "בתהליך":
+        stock_updates = _decrement_stock_for_orders(db, [order_id])
+
+    refresh_user_stats(db, [o.owner_id, supplier_id])
+    db.commit()
+    user_profiles.invalidate(o.owner_id, supplier_id)
+    _publish_order_status(order_id, o.owner_id, supplier_id, status_update.status)
+    return {
+        "message": "סטטוס ההזמנה עודכן בהצלחה",
+        "new_status": status_update.status,
+        "stock_updates": stock_updates,
+    }
+
+
+@router.put("/status/bulk", response_model=OrdersBulkStatusResponse)
+def bulk_update_order_status(body: OrdersBulkStatusUpdate, supplier_id: int, db: Session = Depends(get_db)):
+    """
+    מעבר סטטוס להזמנות רבות בטרנזקציה אחת (כולל הורדת מלאי ל"בתהליך").
+    מחזיר תוצאה לכל הזמנה; הזמנה שלא שייכת לספק או שעודכנה במקביל מסומנת ok=false.
+    """
+    order_ids = list(dict.fromkeys(body.order_ids))
+    rows = (
+        db.query(Order.id, Order.status, Order.owner_id)
+        .filter(Order.id.in_(order_ids), Order.supplier_id == supplier_id)
+        .all()
+    )
+    current = {r.id: r.status for r in rows}
+    owners = {r.id: r.owner_id for r in rows}
+    if rows:
+        lock_user_stats(db, [supplier_id, *owners.values()])
+
+    # עדכון מותנה לכל קבוצת סטטוס-מקור – UPDATE אחד לקבוצה, OUTPUT מחזיר מה שבאמת השתנה
+    by_status: Dict[str, List[int]] = {}
+    for oid, st in current.items():
+        by_status.setdefault(st, []).append(oid)
+    changed: Dict[int, str] = {}
+    for old_status, ids in by_status.items():
+        rows = db.execute(
+            update(Order)
+            .where(Order.id.in_(ids), Order.supplier_id == supplier_id, Order.status == old_status)
+            .values(status=body.status)
+            .returning(Order.id)
+        ).scalars().all()
+        changed.update({oid: old_status for oid in rows})
+
+    to_decrement = [
+        oid for oid, old in changed.items()
+        if old == "בוצעה" and body.status == "בתהליך"
+    ]
+    stock_updates = _decrement_stock_for_orders(db, to_decrement)
+    if changed:
+        refresh_user_stats(db, [supplier_id, *(owners[oid] for oid in changed)])
     db.commit()
-    return {"message": "סטטוס ההזמנה עודכן בהצלחה", "new_status": o.status}
+    user_profiles.invalidate(supplier_id, *(owners[oid] for oid in changed))
+    for oid in changed:
+        _publish_order_status(oid, owners[oid], supplier_id, body.status)
+
+    results: List[BulkStatusItemResult] = []
+    for oid in order_ids:
+        if oid in changed:
+            results.append(BulkStatusItemResult(order_id=oid, ok=True, previous_status=changed[oid]))
+        elif oid not in current:
+            results.append(BulkStatusItemResult(order_id=oid, ok=False, error="הזמנה לא נמצאה או אינה שייכת לך"))
+        else:
+            results.append(BulkStatusItemResult(
+                order_id=oid, ok=False, previous_status=current[oid],
+                error="סטטוס ההזמנה עודכן במקביל, נסה שוב",
+            ))
+
+    return OrdersBulkStatusResponse(
+        new_status=body.status,
+        updated=len(changed),
+        results=results,
+        stock_updates=stock_updates,
+    )
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -161,5 +530,8 @@ def update_order_status_by_owner(order_id: int, status_update: OrderStatusUpdate
         raise HTTPException(status_code=400, detail="לא ניתן לבצע פעולה זו")
         
     o.status = status_update.status
+    refresh_user_stats(db, [owner_id, o.supplier_id])
     db.commit()
+    user_profiles.invalidate(owner_id, o.supplier_id)
+    _publish_order_status(order_id, owner_id, o.supplier_id, o.status)
     return {"message": "סטטוס ההזמנה עודכן בהצלחה", "new_status": o.status}
\ No newline at end of file
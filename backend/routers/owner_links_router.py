@@ -3,11 +3,14 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List
 from database.session import get_db
-from models.supplier_city_model import SupplierCity, SupplierDistrict
 from models.owner_supplier_link import OwnerSupplierLink
 from schemas.owner_supplier_link import LinkOut, ActionResult, OwnerMini
 from models.user_model import User  # Update the import path to the correct location of your User model
 from sqlalchemy.orm import joinedload
+from services.events_service import event_broker
+from services.service_area_index import service_area_index
+from services.user_profile_service import user_profiles
+from services.user_stats_service import refresh_user_stats
 
 
 router = APIRouter(prefix="/owner-links", tags=["owner-links"])
@@ -57,18 +60,36 @@ def _set_status(db: Session, supplier_id: int, owner_id: int, new_status: str) -
         raise HTTPException(404, "link not found")
     link.status = new_status
     link.updated_at = datetime.utcnow()
+    refresh_user_stats(db, [owner_id, supplier_id])
     db.commit()
     db.refresh(link)
+    user_profiles.invalidate(owner_id, supplier_id)
     return link
 
+def _publish_link_status(db: Session, link: OwnerSupplierLink):
+    """אירוע push לשני הצדדים – כולל פרטי הצד השני כדי לעדכן את הרשימות במקום"""
+    owner = link.owner or db.get(User, link.owner_id)
+    supplier = link.supplier or db.get(User, link.supplier_id)
+    event_broker.publish([link.owner_id, link.supplier_id], "link_status", {
+        "owner_id": link.owner_id,
+        "supplier_id": link.supplier_id,
+        "status": link.status,
+        "owner": OwnerMini.model_validate(owner).model_dump() if owner else None,
+        "supplier": OwnerMini.model_validate(supplier).model_dump() if supplier else None,
+        "created_at": link.created_at.isoformat() if link.created_at else None,
+        "updated_at": link.updated_at.isoformat() if link.updated_at else None,
+    })
+
 @router.post("/{owner_id}/approve", response_model=ActionResult)
 def approve(owner_id: int, supplier_id: int, db: Session = Depends(get_db)):
     l = _set_status(db, supplier_id, owner_id, "APPROVED")
+    _publish_link_status(db, l)
     return ActionResult(ok=True, status=l.status)
 
 @router.post("/{owner_id}/reject", response_model=ActionResult)
 def reject(owner_id: int, supplier_id: int, db: Session = Depends(get_db)):
     l = _set_status(db, supplier_id, owner_id, "REJECTED")
+    _publish_link_status(db, l)
     return ActionResult(ok=True, status=l.status)
 
 # ---------- חיבורים פעילים/ממתינים לפי בעל חנות ----------
@@ -123,35 +144,51 @@ def request_link(owner_id: int = Query(...), supplier_id: int = Query(...), db:
         return ActionResult(ok=True, status=link.status)
     link = OwnerSupplierLink(owner_id=owner_id, supplier_id=supplier_id, status="PENDING")
     db.add(link)
+    refresh_user_stats(db, [owner_id, supplier_id])
     db.commit()
+    user_profiles.invalidate(owner_id, supplier_id)
+    _publish_link_status(db, link)
     return ActionResult(ok=True, status=link.status)
 
 # ---------- חיפוש ספקים אפשריים לפי אזור ----------
+# גודל חלון מקסימלי לבדיקת לינקים (IN על עד כך וכך ids; מגבלת 2100 פרמטרים ב-SQL Server)
+_LINK_FILTER_WINDOW = 1000
+
 @router.get("/find-suppliers", response_model=List[OwnerMini])
-def find_suppliers(owner_id: int = Query(...), db: Session = Depends(get_db)):
+def find_suppliers(
+    owner_id: int = Query(...),
+    limit: int = Query(default=50, ge=1, le=200),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+):
     """
-    מחזיר רשימת ספקים שיכולים לתת שירות לבעל החנות:
-    1) אם יש לעיר של בעל החנות התאמה ב-supplier_cities.
-    2) או התאמה למחוז ב-supplier_districts.
-    מסנן רק משתמשים מסוג 'Supplier'.
+    מחזיר רשימת ספקים שיכולים לתת שירות לבעל החנות, מדורגת:
+    1) התאמה לעיר של בעל החנות ב-supplier_cities.
+    2) התאמה למחוז של העיר ב-supplier_districts.
+    3) ספקים שלא הגדירו אזור שירות (או בעל חנות בלי עיר) – בסוף.
+    ההתאמה מגיעה מאינדקס אזורי השירות בזיכרון; ספקים שכבר יש איתם לינק (בכל מצב) מסוננים.
     """
     owner = db.get(User, owner_id)
     if not owner:
         raise HTTPException(404, "owner not found")
 
-    q = db.query(User).filter(User.userType == "Supplier")
-
-    # התאמה לפי עיר
-    if owner.city_id:
-        q = q.join(SupplierCity, SupplierCity.supplier_id == User.id, isouter=True) \
-             .filter((SupplierCity.city_id == owner.city_id) | (SupplierCity.city_id == None))
-    # התאמה לפי מחוז (אם יש לעיר מחוז)
-    # ניתן להרחיב עם join לטבלת cities כדי להביא district_id של העיר של בעל החנות
-
-    # הוצאת ספקים שכבר יש איתם לינק (כל מצב) – כדי לא להציג כפילות
-    existing = db.query(OwnerSupplierLink.supplier_id)\
-                 .filter(OwnerSupplierLink.owner_id == owner_id).all()
-    existing_ids = {sid for (sid,) in existing}
-    suppliers = [s for s in q.all() if s.id not in existing_ids]
-
-    return [OwnerMini.model_validate(s) for s in suppliers]
\ No newline at end of file
+    ranked = service_area_index.ensure_loaded(db).ranked_suppliers(owner.city_id)
+
+    # סינון הלינקים הקיימים רק בחלון שעובר עליו העמוד – בלי לטעון את כל הלינקים של בעל החנות
+    need = offset + limit
+    window = min(_LINK_FILTER_WINDOW, max(need, 100))
+    kept: List[int] = []
+    pos = 0
+    while len(kept) < need and pos < len(ranked):
+        chunk = [sid for sid, _ in ranked[pos:pos + window]]
+        pos += window
+        linked = {sid for (sid,) in db.query(OwnerSupplierLink.supplier_id)
+                                      .filter(OwnerSupplierLink.owner_id == owner_id,
+                                              OwnerSupplierLink.supplier_id.in_(chunk))}
+        kept.extend(sid for sid in chunk if sid not in linked)
+    page_ids = kept[offset:offset + limit]
+    if not page_ids:
+        return []
+
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(page_ids)).all()}
+    return [OwnerMini.model_validate(users[sid]) for sid in page_ids if sid in users]
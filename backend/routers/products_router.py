@@ -1,12 +1,15 @@
 # backend/routers/products_router.py
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
-from sqlalchemy import true
+from sqlalchemy import true, select
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from database.session import get_db
+from database.async_session import get_async_db, AsyncDBSession
 from schemas.products import ProductOut, ProductCreate, ProductUpdate, StockUpdate, ProductWithImageCreate
 from models.product_model import Product  # ✅ שימוש ב-ORM
+from services.user_profile_service import user_profiles
+from services.user_stats_service import refresh_user_stats
 
 try:
     from services.cloudinary_service import cloudinary_service
@@ -29,24 +32,25 @@ def _to_out(prod: Product) -> ProductOut:
         image_url=prod.image_url
     )
 
+async def _get_active_product(db: AsyncDBSession, product_id: int) -> Optional[Product]:
+    return (await db.execute(
+        select(Product).where(Product.id == product_id, Product.is_active == true())
+    )).scalars().first()
+
 @router.get("/", response_model=List[ProductOut])
-def list_products(
+async def list_products(
     supplier_id: Optional[int] = Query(default=None),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
-    q = db.query(Product).filter(Product.is_active == true())
+    stmt = select(Product).where(Product.is_active == true())
     if supplier_id is not None:
-        q = q.filter(Product.supplier_id == supplier_id)
-    products = q.order_by(Product.id.desc()).all()
+        stmt = stmt.where(Product.supplier_id == supplier_id)
+    products = (await db.execute(stmt.order_by(Product.id.desc()))).scalars().all()
     return [_to_out(p) for p in products]
 
 @router.get("/{product_id}", response_model=ProductOut)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    p = (
-        db.query(Product)
-        .filter(Product.id == product_id, Product.is_active == true())
-        .first()
-    )
+async def get_product(product_id: int, db: AsyncDBSession = Depends(get_async_db)):
+    p = await _get_active_product(db, product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Product not found")
     return _to_out(p)
@@ -64,8 +68,10 @@ def create_product(body: ProductCreate, db: Session = Depends(get_db)):
             is_active=True,
         )
         db.add(p)
+        refresh_user_stats(db, [p.supplier_id])
         db.commit()
         db.refresh(p)
+        user_profiles.invalidate(p.supplier_id)
         return _to_out(p)
     except Exception as e:
         db.rollback()
@@ -79,7 +85,7 @@ async def create_product_with_image(
     min_qty: int = Form(...),
     stock: int = Form(0),
     image: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     יצירת מוצר עם העלאת תמונה במקביל
@@ -118,16 +124,18 @@ async def create_product_with_image(
             is_active=True,
         )
         db.add(p)
-        db.commit()
-        db.refresh(p)
+        await db.run_sync(refresh_user_stats, [p.supplier_id])
+        await db.commit()
+        await db.refresh(p)
+        user_profiles.invalidate(p.supplier_id)
         
         return _to_out(p)
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"שגיאה ביצירת מוצר עם תמונה: {e}")
 
 @router.put("/{product_id}", response_model=ProductOut)
@@ -149,8 +157,11 @@ def update_product(product_id: int, body: ProductUpdate, db: Session = Depends(g
         p.image_url = body.image_url
 
     try:
+        if body.stock is not None:
+            refresh_user_stats(db, [p.supplier_id])
         db.commit()
         db.refresh(p)
+        user_profiles.invalidate(p.supplier_id)
         return _to_out(p)
     except Exception as e:
         db.rollback()
@@ -160,14 +171,14 @@ def update_product(product_id: int, body: ProductUpdate, db: Session = Depends(g
 async def update_product_image(
     product_id: int,
     image: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncDBSession = Depends(get_async_db)
 ):
     """
     עדכון תמונת מוצר קיים
     """
     try:
         # בדיקה שהמוצר קיים
-        p = db.query(Product).filter(Product.id == product_id, Product.is_active == true()).first()
+        p = await _get_active_product(db, product_id)
         if not p:
             raise HTTPException(status_code=404, detail="Product not found")
         
@@ -194,8 +205,8 @@ async def update_product_image(
         
         # עדכון ה-URL במסד הנתונים
         p.image_url = upload_result["url"]
-        db.commit()
-        db.refresh(p)
+        await db.commit()
+        await db.refresh(p)
         
         return {
             "success": True,
@@ -205,19 +216,19 @@ async def update_product_image(
         }
         
     except HTTPException:
-        db.rollback()
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"שגיאה בעדכון תמונת מוצר: {e}")
 
 @router.delete("/{product_id}/image")
-async def delete_product_image(product_id: int, db: Session = Depends(get_db)):
+async def delete_product_image(product_id: int, db: AsyncDBSession = Depends(get_async_db)):
     """
     מחיקת תמונת מוצר
     """
     try:
-        p = db.query(Product).filter(Product.id == product_id, Product.is_active == true()).first()
+        p = await _get_active_product(db, product_id)
         if not p:
             raise HTTPException(status_code=404, detail="Product not found")
         
@@ -234,7 +245,7 @@ async def delete_product_image(product_id: int, db: Session = Depends(get_db)):
         
         # הסרת ה-URL מהמוצר
         p.image_url = None
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -244,7 +255,7 @@ async def delete_product_image(product_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"שגיאה במחיקת תמונת מוצר: {e}")
 
 @router.put("/{product_id}/stock", response_model=ProductOut)
@@ -258,16 +269,18 @@ def update_stock(product_id: int, body: StockUpdate, db: Session = Depends(get_d
 
     p.stock = body.stock
     try:
+        refresh_user_stats(db, [p.supplier_id])
         db.commit()
         db.refresh(p)
+        user_profiles.invalidate(p.supplier_id)
         return _to_out(p)
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"שגיאה בעדכון מלאי: {e}")
 
 @router.delete("/{product_id}", status_code=204)
-async def delete_product(product_id: int, db: Session = Depends(get_db)):
-    p = db.query(Product).filter(Product.id == product_id).first()
+async def delete_product(product_id: int, db: AsyncDBSession = Depends(get_async_db)):
+    p = await db.get(Product, product_id)
     if not p or not p.is_active:
         # אם כבר לא פעיל/לא קיים – מתייחסים כ-No Content
         return
@@ -282,8 +295,10 @@ async def delete_product(product_id: int, db: Session = Depends(get_db)):
     
     p.is_active = False
     try:
-        db.commit()
+        await db.run_sync(refresh_user_stats, [p.supplier_id])
+        await db.commit()
+        user_profiles.invalidate(p.supplier_id)
         return
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"שגיאה במחיקת מוצר: {e}")
\ No newline at end of file
@@ -4,9 +4,12 @@ from sqlalchemy.orm import Session
 from typing import Optional, Iterable, Set
 
 from database.session import get_db
-from schemas.users import RegisterPayload, RegisterResponse, LoginPayload, LoginResponse
+from database.async_session import get_async_db, AsyncDBSession
+from schemas.users import RegisterPayload, RegisterResponse, LoginPayload, LoginResponse, UserStatsOut
 from models.user_model import User
 from models.supplier_city_model import SupplierCity
+from services.service_area_index import service_area_index
+from services.user_stats_service import get_user_stats, refresh_user_stats
 from sqlalchemy import text
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -42,6 +45,7 @@ def _insert_service_cities(db_factory, supplier_id: int, city_ids: Iterable[int]
             # bulk יעיל יותר מעשרות INSERT-ים
             db.bulk_save_objects(to_add)
             db.commit()
+            service_area_index.invalidate()
     except Exception:
         db.rollback()
         # אפשר ללוגג כאן אם יש לכם logger
@@ -72,8 +76,11 @@ def register_user(body: RegisterPayload, bg: BackgroundTasks, db: Session = Depe
         userType=body.userType,
     )
     db.add(u)
+    db.flush()  # ה-ID נדרש לשורת המונים
+    refresh_user_stats(db, [u.id])  # שורת user_stats (אפסים) נוצרת יחד עם המשתמש
     db.commit()
     db.refresh(u)  # וודאות שיש ID מעודכן
+    service_area_index.invalidate()  # משתמש חדש משנה את מפת הכיסוי (ספק / בעל חנות בעיר)
 
     # העברת הוספת ערי שירות לפעולת רקע (מונע timeout)
     if body.userType == "Supplier" and body.serviceCities:
@@ -85,6 +92,32 @@ def register_user(body: RegisterPayload, bg: BackgroundTasks, db: Session = Depe
     # החזרת תשובה מיידית
     return RegisterResponse(user_id=u.id)
 
+# ---------- אזורי שירות (מאינדקס בזיכרון) ----------
+@router.get("/service-areas")
+def get_service_areas(db: Session = Depends(get_db)):
+    """מחוזות וערים לבורר אזורי השירות, עם מספר הספקים שמשרתים כל עיר"""
+    return service_area_index.ensure_loaded(db).tree()
+
+@router.get("/coverage/{supplier_id}")
+def get_supplier_coverage(supplier_id: int, db: Session = Depends(get_db)):
+    """כיסוי ספק: ערים (ישירות + דרך מחוזות) ומספר בעלי חנויות בטווח"""
+    index = service_area_index.ensure_loaded(db)
+    cities = index.cities_served(supplier_id)
+    return {
+        "supplier_id": supplier_id,
+        "cities_count": len(cities),
+        "districts": sorted(index.supplier_districts.get(supplier_id, ())),
+        "owners_reachable": index.owners_reachable(supplier_id),
+    }
+
+@router.get("/{user_id}/stats", response_model=UserStatsOut)
+def user_stats(user_id: int, db: Session = Depends(get_db)):
+    """מוני לוח הבקרה מטבלת user_stats (שורה אחת, בלי COUNT על ההזמנות/המוצרים)"""
+    stats = get_user_stats(db, user_id)
+    if not stats:
+        raise HTTPException(status_code=404, detail="משתמש לא נמצא")
+    return UserStatsOut(**stats)
+
 @router.post("/login", response_model=LoginResponse)
 def login(body: LoginPayload, db: Session = Depends(get_db)):
     u = (
@@ -116,15 +149,15 @@ def login(body: LoginPayload, db: Session = Depends(get_db)):
 # הוסף את הקוד הזה לקובץ backend/routers/users_router.py
 
 @router.get("/profile/{user_id}")
-async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_user_profile(user_id: int, db: AsyncDBSession = Depends(get_async_db)):
     """קבלת פרופיל מלא של משתמש עבור הצ'אט AI"""
     try:
         # שאילתת המשתמש הבסיסית
-        user = db.execute(text("""
+        user = (await db.execute(text("""
             SELECT id, username, email, company_name, contact_name, phone, 
                    city_id, street, house_number, opening_time, closing_time, userType
             FROM users WHERE id = :user_id
-        """), {"user_id": user_id}).fetchone()
+        """), {"user_id": user_id})).fetchone()
         
         if not user:
             raise HTTPException(status_code=404, detail="משתמש לא נמצא")
@@ -148,29 +181,29 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         # נתונים ספציפיים לספק
         if user.userType == "Supplier":
             # מספר מוצרים פעילים
-            products_count = db.execute(text("""
+            products_count = (await db.execute(text("""
                 SELECT COUNT(*) FROM products 
                 WHERE supplier_id = :user_id AND is_active = 1
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # הזמנות פעילות
-            active_orders = db.execute(text("""
+            active_orders = (await db.execute(text("""
                 SELECT COUNT(*) FROM orders 
                 WHERE supplier_id = :user_id AND status IN (N'בתהליך', N'בוצעה')
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # הזמנות שהושלמו השבוע
-            completed_this_week = db.execute(text("""
+            completed_this_week = (await db.execute(text("""
                 SELECT COUNT(*) FROM orders 
                 WHERE supplier_id = :user_id AND status = N'הושלמה' 
                 AND created_date >= DATEADD(day, -7, GETDATE())
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # מוצרים שאזלו מהמלאי
-            out_of_stock = db.execute(text("""
+            out_of_stock = (await db.execute(text("""
                 SELECT COUNT(*) FROM products 
                 WHERE supplier_id = :user_id AND stock = 0 AND is_active = 1
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             user_profile.update({
                 "products_count": products_count,
@@ -183,29 +216,29 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         # נתונים ספציפיים לבעל חנות
         elif user.userType == "StoreOwner":
             # הזמנות פעילות
-            active_orders = db.execute(text("""
+            active_orders = (await db.execute(text("""
                 SELECT COUNT(*) FROM orders 
                 WHERE owner_id = :user_id AND status IN (N'בתהליך', N'בוצעה')
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # הזמנות השבוע
-            orders_this_week = db.execute(text("""
+            orders_this_week = (await db.execute(text("""
                 SELECT COUNT(*) FROM orders 
                 WHERE owner_id = :user_id 
                 AND created_date >= DATEADD(day, -7, GETDATE())
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # ספקים מחוברים
-            connected_suppliers = db.execute(text("""
+            connected_suppliers = (await db.execute(text("""
                 SELECT COUNT(*) FROM owner_supplier_links 
                 WHERE owner_id = :user_id AND status = 'APPROVED'
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             # בקשות חיבור ממתינות
-            pending_requests = db.execute(text("""
+            pending_requests = (await db.execute(text("""
                 SELECT COUNT(*) FROM owner_supplier_links 
                 WHERE owner_id = :user_id AND status = 'PENDING'
-            """), {"user_id": user_id}).scalar()
+            """), {"user_id": user_id})).scalar()
             
             user_profile.update({
                 "active_orders": active_orders,
@@ -10,6 +10,8 @@ from .users import RegisterPayload, RegisterResponse, LoginPayload, LoginRespons
 from .orders import (
     OrderCreate, OrderUpdate, OrderResponse, OrderStatus,
     OrderItemIn, OrderItemResponse, OrderStatusUpdate,
+    OrdersBulkStatusUpdate, BulkStatusItemResult, StockLevel, OrdersBulkStatusResponse,
+    OrdersChangesResponse,
 )
 
 # order items
@@ -34,6 +36,8 @@ __all__ = [
     # orders
     "OrderCreate", "OrderUpdate", "OrderResponse", "OrderStatus",
     "OrderItemIn", "OrderItemResponse", "OrderStatusUpdate",
+    "OrdersBulkStatusUpdate", "BulkStatusItemResult", "StockLevel", "OrdersBulkStatusResponse",
+    "OrdersChangesResponse",
     # order items
     "OrderItemCreate", "OrderItemUpdate", "OrderItemOut",
     # geo
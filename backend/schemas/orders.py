@@ -35,5 +35,30 @@ class OrderResponse(BaseModel):
     supplier_id: int
     status: OrderStatus
     created_date: datetime
+    updated_at: Optional[datetime] = None
     items: List[OrderItemResponse] = []
     total_amount: float = 0.0
+
+class OrdersChangesResponse(BaseModel):
+    orders: List[OrderResponse] = []
+    watermark: datetime  # לשלוח כ-since בבקשה הבאה
+
+class OrdersBulkStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(min_length=1, max_length=500)
+    status: OrderStatus
+
+class BulkStatusItemResult(BaseModel):
+    order_id: int
+    ok: bool
+    previous_status: Optional[OrderStatus] = None
+    error: Optional[str] = None
+
+class StockLevel(BaseModel):
+    product_id: int
+    stock: int
+
+class OrdersBulkStatusResponse(BaseModel):
+    new_status: OrderStatus
+    updated: int
+    results: List[BulkStatusItemResult] = []
+    stock_updates: List[StockLevel] = []
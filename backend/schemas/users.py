@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, List, Literal, NewType
 from pydantic import BaseModel, EmailStr, Field, constr
 
@@ -41,3 +42,17 @@ class LoginPayload(BaseModel):
 class LoginResponse(BaseModel):
     ok: bool = True
     user: dict
+
+class UserStatsOut(BaseModel):
+    """מוני לוח הבקרה (טבלת user_stats) – משותף לדפי הבית ולעוזר ה-AI"""
+    user_id: int
+    products_count: int = 0
+    out_of_stock_products: int = 0
+    total_orders: int = 0
+    active_orders: int = 0        # בתהליך + בוצעה
+    in_progress_orders: int = 0
+    done_orders: int = 0
+    completed_orders: int = 0
+    connected_links: int = 0      # חיבורים מאושרים
+    pending_links: int = 0
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,192 @@
+# backend/services/analytics_rollup.py
+"""
+טבלאות סיכום (rollup) לאנליטיקה – לוחות הבקרה קוראים רק מהן, לא מ-orders/order_items
+  analytics_supplier_daily  – ספק × יום: הזמנות, הזמנות שהושלמו, יחידות, הכנסות
+  analytics_product_daily   – מוצר × יום: הזמנות, יחידות, הכנסות
+  analytics_city_daily      – עיר החנות × יום: הזמנות, הכנסות (city_id=0 – לא ידוע)
+כל הזמנה שייכת ליום יצירתה. רענון אינקרמנטלי: הימים של הזמנות שהשתנו (updated_at)
+מאז ה-watermark נמחקים ומחושבים מחדש; בנייה מלאה – פעם בלילה (ובמיגרציה).
+"""
+
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_TABLES = ("analytics_supplier_daily", "analytics_product_daily", "analytics_city_daily")
+
+# חפיפה אחורה: טרנזקציה שהתחילה לפני ה-watermark אבל עשתה commit אחריו לא תתפספס
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+# כמה ימים בפקודה אחת (מגבלת 2100 פרמטרים ב-SQL Server)
+_DAYS_CHUNK = 500
+
+_DAY = "CAST(o.created_date AS DATE)"
+
+# {where} – סינון לימים שהשתנו, או כלום בבנייה מלאה
+_INSERT_SQL = {
+    "analytics_supplier_daily": f"""
+        INSERT INTO analytics_supplier_daily (supplier_id, day, orders_count, completed_orders, units, revenue)
+        SELECT o.supplier_id, {_DAY},
+               COUNT(*),
+               COUNT(CASE WHEN o.status = N'הושלמה' THEN 1 END),
+               COALESCE(SUM(i.units), 0),
+               COALESCE(SUM(i.revenue), 0)
+        FROM orders o
+        OUTER APPLY (
+            SELECT SUM(oi.quantity) AS units, SUM(oi.quantity * COALESCE(oi.unit_price, 0)) AS revenue
+            FROM order_items oi WHERE oi.order_id = o.id
+        ) i
+        {{where}}
+        GROUP BY o.supplier_id, {_DAY}
+    """,
+    "analytics_product_daily": f"""
+        INSERT INTO analytics_product_daily (product_id, day, supplier_id, orders_count, units, revenue)
+        SELECT oi.product_id, {_DAY}, MIN(o.supplier_id),
+               COUNT(DISTINCT o.id),
+               SUM(oi.quantity),
+               SUM(oi.quantity * COALESCE(oi.unit_price, 0))
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        {{where}}
+        GROUP BY oi.product_id, {_DAY}
+    """,
+    "analytics_city_daily": f"""
+        INSERT INTO analytics_city_daily (city_id, day, orders_count, revenue)
+        SELECT COALESCE(u.city_id, 0), {_DAY},
+               COUNT(*),
+               COALESCE(SUM(i.revenue), 0)
+        FROM orders o
+        JOIN users u ON u.id = o.owner_id
+        OUTER APPLY (
+            SELECT SUM(oi.quantity * COALESCE(oi.unit_price, 0)) AS revenue
+            FROM order_items oi WHERE oi.order_id = o.id
+        ) i
+        {{where}}
+        GROUP BY COALESCE(u.city_id, 0), {_DAY}
+    """,
+}
+
+# טווח sargable על created_date + רשימת הימים המדויקת
+_DAYS_WHERE = f"WHERE o.created_date >= :first_day AND o.created_date < :after_last AND {_DAY} IN :days"
+
+
+def _days_stmt(sql: str):
+    return text(sql).bindparams(bindparam("days", expanding=True))
+
+
+_REFRESH_STMTS = {
+    table: (
+        _days_stmt(f"DELETE FROM {table} WHERE day IN :days"),
+        _days_stmt(sql.format(where=_DAYS_WHERE)),
+    )
+    for table, sql in _INSERT_SQL.items()
+}
+_REBUILD_STMTS = {table: text(sql.format(where="")) for table, sql in _INSERT_SQL.items()}
+
+# רק מופע אחד מרענן בכל רגע (כמה workers / רענון ידני במקביל לרקע)
+_APPLOCK_SQL = text("""
+    SET NOCOUNT ON;
+    DECLARE @r INT;
+    EXEC @r = sp_getapplock @Resource = 'analytics_rollup', @LockMode = 'Exclusive',
+                            @LockOwner = 'Transaction', @LockTimeout = 0;
+    SELECT @r;
+""")
+
+
+def _changed_days(db: Session, since: datetime) -> List[date]:
+    rows = db.execute(text("""
+        SELECT DISTINCT CAST(created_date AS DATE) AS day
+        FROM orders WHERE updated_at > :since
+    """), {"since": since}).fetchall()
+    return sorted(r.day for r in rows)
+
+
+def refresh_rollup(db: Session, full: bool = False) -> Dict[str, Any]:
+    """
+    רענון טבלאות הסיכום בטרנזקציה אחת. full=True – בנייה מחדש של הכול.
+    מחזיר {"mode", "days", "watermark"} או {"skipped": True} אם רענון אחר רץ עכשיו.
+    """
+    if db.execute(_APPLOCK_SQL).scalar() < 0:
+        db.rollback()
+        return {"skipped": True}
+
+    now = db.execute(text("SELECT GETDATE()")).scalar()
+    state = db.execute(text(
+        "SELECT watermark FROM analytics_rollup_state WHERE name = 'orders'"
+    )).fetchone()
+    full = full or state is None or state.watermark is None
+
+    if full:
+        for table in ROLLUP_TABLES:
+            db.execute(text(f"DELETE FROM {table}"))
+            db.execute(_REBUILD_STMTS[table])
+        days_count = None
+    else:
+        days = _changed_days(db, state.watermark - WATERMARK_OVERLAP)
+        for i in range(0, len(days), _DAYS_CHUNK):
+            chunk = days[i:i + _DAYS_CHUNK]
+            params = {
+                "days": chunk,
+                "first_day": datetime.combine(chunk[0], datetime.min.time()),
+                "after_last": datetime.combine(chunk[-1] + timedelta(days=1), datetime.min.time()),
+            }
+            for delete_stmt, insert_stmt in _REFRESH_STMTS.values():
+                db.execute(delete_stmt, {"days": chunk})
+                db.execute(insert_stmt, params)
+        days_count = len(days)
+
+    db.execute(text("""
+        MERGE analytics_rollup_state AS t
+        USING (SELECT 'orders' AS name) AS s ON t.name = s.name
+        WHEN MATCHED THEN UPDATE SET watermark = :now, refreshed_at = GETDATE(), last_mode = :mode
+        WHEN NOT MATCHED THEN INSERT (name, watermark, refreshed_at, last_mode)
+            VALUES ('orders', :now, GETDATE(), :mode);
+    """), {"now": now, "mode": "full" if full else "incremental"})
+    db.commit()
+
+    result = {"mode": "full" if full else "incremental", "days": days_count, "watermark": now}
+    logger.info(f"analytics rollup refreshed: {result}")
+    return result
+
+
+def refresh_rollup_with(session_factory: Callable[[], Session], full: bool = False) -> Dict[str, Any]:
+    db = session_factory()
+    try:
+        return refresh_rollup(db, full=full)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def rollup_loop(session_factory: Callable[[], Session],
+                      interval_minutes: Optional[float] = None,
+                      nightly_hour: Optional[int] = None):
+    """
+    רענון ברקע: אינקרמנטלי כל ANALYTICS_REFRESH_MINUTES (ברירת מחדל 15),
+    ובנייה מלאה פעם ביום בשעה ANALYTICS_NIGHTLY_HOUR (ברירת מחדל 3)
+    """
+    interval = 60 * (interval_minutes or float(os.getenv("ANALYTICS_REFRESH_MINUTES", "15")))
+    nightly_hour = nightly_hour if nightly_hour is not None else int(os.getenv("ANALYTICS_NIGHTLY_HOUR", "3"))
+    last_full: Optional[date] = None
+    while True:
+        now = datetime.now()
+        full = now.hour == nightly_hour and last_full != now.date()
+        try:
+            result = await run_in_threadpool(refresh_rollup_with, session_factory, full)
+            if full and not result.get("skipped"):
+                last_full = now.date()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"analytics rollup refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,261 @@
+# backend/services/cache_layer.py
+"""
+שכבת מטמון משותפת לשירותי ה-AI
+כל namespace (למשל "chat.response") = LRU+TTL בזיכרון (L1) עם מגבלת גודל/TTL משלו,
+ומעליו – אופציונלית – backend משותף (L2) שכל ה-workers רואים:
+  CACHE_BACKEND=memory (ברירת מחדל) | disk (קובץ SQLite מקומי) | redis (כל שרת תואם Redis)
+גודל/TTL לכל namespace ניתנים לדריסה ב-env: CACHE_CHAT_RESPONSE_SIZE / CACHE_CHAT_RESPONSE_TTL
+local_ttl (CACHE_..._LOCAL_TTL) – TTL קצר ל-L1 כשיש L2: delete ב-worker אחד מוחק מ-L2,
+וה-L1 של שאר ה-workers נופל אליו תוך local_ttl שניות.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class DiskBackend:
+    """L2 בקובץ SQLite – משותף לכל ה-workers על אותה מכונה, שורד הפעלה מחדש"""
+
+    name = "disk"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                ns TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (ns, key)
+            )
+        """)
+        self._conn.commit()
+        self._writes = 0
+
+    def get(self, ns: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and time.time() >= expires_at:
+            self.delete(ns, key)
+            return None
+        return value
+
+    def set(self, ns: str, key: str, value: str, ttl: Optional[float]):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (ns, key, value, expires_at)
+            )
+            self._writes += 1
+            # ניקוי פריטים שפג תוקפם מדי פעם, לא בכל כתיבה
+            if self._writes % 500 == 0:
+                self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def delete(self, ns: str, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (ns, key))
+            self._conn.commit()
+
+    def clear(self, ns: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ?", (ns,))
+            self._conn.commit()
+
+
+class RedisBackend:
+    """L2 בשרת תואם Redis (Redis/Valkey/KeyDB...) – משותף לכל ה-workers והמכונות"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "sms:"):
+        import redis  # תלות אופציונלית
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.prefix = prefix
+
+    def _key(self, ns: str, key: str) -> str:
+        return f"{self.prefix}{ns}:{key}"
+
+    def get(self, ns: str, key: str) -> Optional[str]:
+        raw = self._client.get(self._key(ns, key))
+        return raw.decode("utf-8") if raw is not None else None
+
+    def set(self, ns: str, key: str, value: str, ttl: Optional[float]):
+        if ttl:
+            # setex דורש שנייה שלמה לפחות – psetex במילישניות גם ל-TTL קצר
+            self._client.psetex(self._key(ns, key), max(1, int(ttl * 1000)), value)
+        else:
+            self._client.set(self._key(ns, key), value)
+
+    def delete(self, ns: str, key: str):
+        self._client.delete(self._key(ns, key))
+
+    def clear(self, ns: str):
+        for k in self._client.scan_iter(match=f"{self.prefix}{ns}:*", count=500):
+            self._client.delete(k)
+
+
+def _make_backend():
+    kind = os.getenv("CACHE_BACKEND", "memory").lower()
+    try:
+        if kind == "disk":
+            return DiskBackend(os.getenv("CACHE_DISK_PATH", "ai_cache.sqlite3"))
+        if kind == "redis":
+            return RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    except Exception as e:
+        logger.warning(f"Cache backend '{kind}' unavailable, using memory only: {e}")
+    return None
+
+
+class CacheNamespace:
+    """
+    מטמון של שירות אחד: get/set/delete/clear.
+    קריאה: L1 בזיכרון ואז L2 המשותף (אם הוגדר); כתיבה לשניהם.
+    ערכים שנשמרים ב-L2 חייבים להיות JSON (dict/list/str/מספרים).
+    local_ttl חל רק כשיש L2; בלי L2 ה-L1 הוא המטמון היחיד ומחזיק ttl מלא.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl: Optional[float], backend=None,
+                 local_ttl: Optional[float] = None):
+        self.name = name
+        self.ttl = ttl
+        self.local_ttl = local_ttl if backend is not None else None
+        self.local = TTLCache(max_size=max_size, ttl=self._l1_ttl(ttl))
+        self.backend = backend
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    def _l1_ttl(self, ttl: Optional[float]) -> Optional[float]:
+        if self.local_ttl is None:
+            return ttl
+        return min(ttl, self.local_ttl) if ttl else self.local_ttl
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.backend is not None:
+            try:
+                raw = self.backend.get(self.name, key)
+                # ערך פגום/זר ב-L2 נספר כשגיאה ומטופל כפספוס
+                value = json.loads(raw) if raw is not None else _MISSING
+            except Exception as e:
+                self.shared_errors += 1
+                logger.debug(f"cache {self.name}: shared get failed: {e}")
+                value = _MISSING
+            if value is not _MISSING:
+                self.local.set(key, value)
+                self.shared_hits += 1
+                return value
+        return default
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self.local.set(key, value, self._l1_ttl(ttl) if ttl else None)
+        if self.backend is not None:
+            try:
+                self.backend.set(self.name, key, json.dumps(value, ensure_ascii=False), ttl or self.ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.debug(f"cache {self.name}: shared set failed: {e}")
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(self.name, key)
+            except Exception:
+                self.shared_errors += 1
+
+    def clear(self):
+        self.local.clear()
+        if self.backend is not None:
+            try:
+                self.backend.clear(self.name)
+            except Exception:
+                self.shared_errors += 1
+
+    def __len__(self) -> int:
+        return len(self.local)
+
+    def stats(self) -> Dict[str, Any]:
+        out = self.local.stats()
+        lookups = out["hits"] + out["misses"]
+        out.update({
+            "backend": self.backend.name if self.backend is not None else "memory",
+            "local_ttl": self.local_ttl,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            # פגיעה ב-L2 נספרת כ-miss ב-L1 – שיעור הפגיעה הכולל מחשב את שניהם
+            "hit_rate": round((out["hits"] + self.shared_hits) / lookups, 3) if lookups else 0.0,
+        })
+        return out
+
+
+class CacheRegistry:
+    """כל ה-namespaces בתהליך; אותו שם מחזיר את אותו מטמון (גם בין מופעי שירות שונים)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, CacheNamespace] = {}
+        self._backend = _MISSING
+
+    def _shared_backend(self):
+        if self._backend is _MISSING:
+            self._backend = _make_backend()
+        return self._backend
+
+    def namespace(self, name: str, max_size: int = 256, ttl: Optional[float] = 300,
+                  shared: bool = True, local_ttl: Optional[float] = None) -> CacheNamespace:
+        """
+        shared=False – זיכרון בלבד (ערכים שאינם JSON, או מידע שלא כדאי לשתף).
+        local_ttl – לערכים שמבוטלים ב-delete אחרי כתיבה (ה-L1 של workers אחרים לא רואה את ה-delete).
+        """
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is None:
+                env = "CACHE_" + name.upper().replace(".", "_").replace("-", "_")
+                max_size = int(os.getenv(f"{env}_SIZE", max_size))
+                ttl_env = os.getenv(f"{env}_TTL")
+                ttl = float(ttl_env) if ttl_env else ttl
+                local_ttl_env = os.getenv(f"{env}_LOCAL_TTL")
+                local_ttl = float(local_ttl_env) if local_ttl_env else local_ttl
+                ns = CacheNamespace(name, max_size, ttl, self._shared_backend() if shared else None,
+                                    local_ttl=local_ttl)
+                self._namespaces[name] = ns
+            return ns
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            namespaces = dict(self._namespaces)
+        return {name: ns.stats() for name, ns in sorted(namespaces.items())}
+
+    def clear(self, name: Optional[str] = None):
+        with self._lock:
+            namespaces = [self._namespaces[name]] if name in self._namespaces else (
+                [] if name else list(self._namespaces.values())
+            )
+        for ns in namespaces:
+            ns.clear()
+
+
+cache_registry = CacheRegistry()
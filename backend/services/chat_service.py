@@ -1,13 +1,21 @@
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 import time
 import hashlib
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
 
 from .ollama_service import OllamaService
 from .qdrant_service import QdrantService
+from .service_area_index import service_area_index
+from .http_client import LLMQueueTimeout
+from .cache_layer import cache_registry
+from .semantic_cache import semantic_cache
+from .user_profile_service import user_profiles
+from .user_stats_service import get_user_stats
 
 logger = logging.getLogger(__name__)
 
@@ -32,14 +40,11 @@ class ChatService:
         self.ollama_service = OllamaService()
         self.qdrant_service = QdrantService()
         
-        # מטמון משופר עם TTL
-        self.response_cache = {}
-        self.user_context_cache = {}
-        self.embedding_cache = {}
-        
-        self.cache_max_size = 200
-        self.user_cache_ttl = 300  # 5 דקות
-        self.embedding_cache_ttl = 600  # 10 דקות
+        # מטמונים בשכבה המשותפת (cache_layer) – LRU+TTL לכל namespace, ו-L2 משותף אם הוגדר
+        self.response_cache = cache_registry.namespace("chat.response", max_size=200, ttl=600)
+        self.embedding_cache = cache_registry.namespace("chat.embedding", max_size=100, ttl=600)  # 10 דקות
+        # תשובות לשאלות דומות סמנטית (לא רק זהות) – משותף לכל מופעי ה-ChatService
+        self.semantic_cache = semantic_cache
         
         # יצירת dynamic_rag רק אם זמין
         if DYNAMIC_RAG_AVAILABLE:
@@ -81,82 +86,43 @@ class ChatService:
                 "dynamic_rag_enabled": False
             }
 
+    async def health_check_async(self) -> Dict[str, bool]:
+        """כמו health_check, בלי לחסום את ה-event loop (שתי הבדיקות במקביל)"""
+        try:
+            qdrant_ok, ollama_ok = await asyncio.gather(
+                self.qdrant_service.health_check_async(),
+                self.ollama_service.health_check_async(),
+            )
+            return {
+                "qdrant_connected": qdrant_ok,
+                "ollama_ready": ollama_ok,
+                "chat_service_initialized": True,
+                "cache_enabled": True,
+                "dynamic_rag_enabled": self.dynamic_rag is not None,
+                "cache_size": len(self.response_cache)
+            }
+        except Exception as e:
+            logger.error(f"Health error: {e}")
+            return {
+                "qdrant_connected": False,
+                "ollama_ready": False,
+                "chat_service_initialized": False,
+                "cache_enabled": False,
+                "dynamic_rag_enabled": False
+            }
+
     def _get_user_context(self, user_id: int, db: Session) -> Dict:
         """
-        גרסה מואצת של קבלת הקשר משתמש:
-        - מטמון למשך 5 דקות
-        - שאילתה מובטלת יותר
-        - רק הנתונים החיוניים
+        הקשר משתמש מספק הפרופילים המשותף (אותו מטמון כמו ה-gateway וה-Dynamic RAG)
         """
-        cache_key = f"user_ctx_{user_id}"
-        current_time = time.time()
-        
-        # בדיקת מטמון
-        if cache_key in self.user_context_cache:
-            cached = self.user_context_cache[cache_key]
-            if current_time - cached["timestamp"] < self.user_cache_ttl:
-                logger.debug(f"Cache hit for user context {user_id}")
-                return cached["data"]
-
         try:
-            # שאילתה מהירה - רק הבסיס
-            user_data = db.execute(text("""
-                SELECT userType, company_name, contact_name
-                FROM users WHERE id = :user_id
-            """), {"user_id": user_id}).fetchone()
-
-            if not user_data:
+            profile = user_profiles.get(db, user_id)
+            if not profile:
                 return {"userType": "Unknown", "contact_name": "משתמש"}
 
-            context = {
-                "userType": user_data.userType,
-                "company_name": user_data.company_name or "לא צוין",
-                "contact_name": user_data.contact_name or "משתמש",
-            }
-
-            # אם זה ספק - נתונים בסיסיים בלבד
-            if user_data.userType == "Supplier":
-                supplier_stats = db.execute(text("""
-                    SELECT 
-                        COUNT(p.id) as products_count,
-                        COUNT(CASE WHEN o.status = N'בתהליך' THEN 1 END) as active_orders
-                    FROM products p
-                    LEFT JOIN order_items oi ON p.id = oi.product_id
-                    LEFT JOIN orders o ON oi.order_id = o.id
-                    WHERE p.supplier_id = :user_id AND p.is_active = 1
-                """), {"user_id": user_id}).fetchone()
-                
-                context.update({
-                    "products_count": supplier_stats.products_count or 0,
-                    "active_orders": supplier_stats.active_orders or 0,
-                })
-
-            # אם זה בעל חנות - נתונים בסיסיים בלבד
-            elif user_data.userType == "StoreOwner":
-                owner_stats = db.execute(text("""
-                    SELECT 
-                        COUNT(o.id) as total_orders,
-                        COUNT(CASE WHEN o.status = N'בתהליך' THEN 1 END) as active_orders
-                    FROM orders o WHERE o.owner_id = :user_id
-                """), {"user_id": user_id}).fetchone()
-                
-                context.update({
-                    "total_orders": owner_stats.total_orders or 0,
-                    "active_orders": owner_stats.active_orders or 0,
-                })
-
-            # שמירה במטמון
-            self.user_context_cache[cache_key] = {
-                "data": context,
-                "timestamp": current_time
-            }
-            
-            # ניקוי מטמון אם גדול מדי
-            if len(self.user_context_cache) > 50:
-                oldest = min(self.user_context_cache.keys(), 
-                           key=lambda k: self.user_context_cache[k]["timestamp"])
-                del self.user_context_cache[oldest]
-
+            context = dict(profile)
+            context["company_name"] = profile.get("company_name") or "לא צוין"
+            context["contact_name"] = profile.get("contact_name") or "משתמש"
             return context
 
         except Exception as e:
@@ -166,30 +132,32 @@ class ChatService:
     def _get_embedding_cached(self, text: str) -> List[float]:
         """קבלת embedding עם מטמון חכם"""
         text_hash = hashlib.md5(text.strip().lower().encode()).hexdigest()
-        current_time = time.time()
         
         # בדיקת מטמון
-        if text_hash in self.embedding_cache:
-            cached = self.embedding_cache[text_hash]
-            if current_time - cached["timestamp"] < self.embedding_cache_ttl:
-                return cached["embedding"]
+        cached = self.embedding_cache.get(text_hash)
+        if cached is not None:
+            return cached
         
         # יצירת embedding חדש
         embedding = self.ollama_service.get_embedding(text)
         if embedding:
-            self.embedding_cache[text_hash] = {
-                "embedding": embedding,
-                "timestamp": current_time
-            }
-            
-            # ניקוי מטמון
-            if len(self.embedding_cache) > 100:
-                oldest = min(self.embedding_cache.keys(), 
-                           key=lambda k: self.embedding_cache[k]["timestamp"])
-                del self.embedding_cache[oldest]
+            self.embedding_cache.set(text_hash, embedding)
         
         return embedding
     
+    async def _get_embedding_cached_async(self, text: str) -> List[float]:
+        """כמו _get_embedding_cached, עם קריאה אסינכרונית ל-Ollama"""
+        text_hash = hashlib.md5(text.strip().lower().encode()).hexdigest()
+        cached = self.embedding_cache.get(text_hash)
+        if cached is not None:
+            return cached
+
+        embedding = await self.ollama_service.get_embedding_async(text)
+        if embedding:
+            self.embedding_cache.set(text_hash, embedding)
+
+        return embedding
+
         # ===== Reranker פרוצדורלי ל-How-To =====
     _PROCEDURAL = ["לחץ","לחצי","בחר","בחרי","פתח","פתחי","שמור","שמרי","אשר","אשרי","שלח","שלחי"]
     _UI_TERMS   = ["רשימת הזמנות","רשימת ספקים","הזמנה חדשה","חיבורים","בקשות ממתינות","ניהול מוצרים"]
@@ -258,6 +226,128 @@ class ChatService:
 
 תן תשובה קצרה ומעשית בעברית:"""
 
+    def _chat_result(self, success: bool, message: str, response: Optional[str], user_context: Dict,
+                     start_time: float, contexts_found: int = 0) -> Dict:
+        return {
+            "success": success,
+            "message": message,
+            "response": response,
+            "user_type": (user_context or {}).get("userType"),
+            "contexts_found": contexts_found,
+            "dynamic_context_used": False,
+            "response_time": round(time.time() - start_time, 2),
+        }
+
+    def _cache_response(self, cache_key: str, result: Dict):
+        self.response_cache.set(cache_key, dict(result))
+
+    def _remember_answer(self, prep: Dict, result: Dict):
+        """תשובת RAG מוצלחת: מטמון מדויק + מטמון סמנטי"""
+        self._cache_response(prep["cache_key"], result)
+        self.semantic_cache.store(prep["scope"], prep["embedding"], prep["question"], result)
+
+    async def _prepare_answer(self, user_id: int, message: str, user_context: Dict,
+                              db: Optional[Session], start_time: float) -> Dict:
+        """
+        כל מה שלפני ה-LLM: מטמון, קיצור-DB, embedding וחיפוש ב-Qdrant.
+        מחזיר {"result": ...} כשיש כבר תשובה סופית (מטמון/מדד/שגיאה),
+        אחרת {"cache_key", "question", "context", "contexts_found", "scope", "embedding"} ליצירה.
+        """
+        question = (message or "").strip()
+        if not question:
+            return {"result": self._chat_result(False, "שגיאה", "לא התקבלה שאלה.", user_context, start_time)}
+
+        # ===== מטמון תשובה מלאה =====
+        cache_key = f"{user_id}:{hashlib.md5(question.lower().encode()).hexdigest()}"
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            result = dict(cached)
+            result["response_time"] = round(time.time() - start_time, 2)
+            result["from_cache"] = True
+            return {"result": result}
+
+        # ===== סיווג שאלה =====
+        try:
+            question_type = self._classify_question_type(question, user_context)
+        except Exception:
+            question_type = "general"
+
+        # ===== קיצור-DB: מדדים מספריים (לא להריץ ב-how_to) =====
+        if question_type != "how_to":
+            try:
+                # שאילתות DB סינכרוניות – ב-threadpool ולא על ה-event loop
+                quick_answer = await run_in_threadpool(
+                    self._try_answer_numeric_metrics, question, user_id, user_context, db
+                )
+            except Exception:
+                quick_answer = None
+            if quick_answer:
+                result = self._chat_result(True, "תשובה מהירה מנתוני המערכת", quick_answer, user_context, start_time)
+                self._cache_response(cache_key, result)
+                return {"result": result}
+
+        # ===== RAG: הכנת שאילתה + embedding =====
+        try:
+            enhanced_query = self._enhance_search_query(question, question_type, user_context)
+        except Exception:
+            enhanced_query = question
+
+        try:
+            embedding = await self._get_embedding_cached_async(enhanced_query or question)
+        except Exception:
+            embedding = None
+
+        if not embedding:
+            return {"result": self._chat_result(
+                False, "לא הצלחתי לעבד את השאלה", "נסה לנסח מחדש את השאלה.", user_context, start_time
+            )}
+
+        # ===== מטמון סמנטי: שאלה קרובה מספיק שכבר נענתה לאותו סוג משתמש ואותו סוג שאלה =====
+        scope = f"{(user_context or {}).get('userType') or 'Any'}:{question_type}"
+        hit = self.semantic_cache.lookup(scope, embedding)
+        if hit:
+            result, similarity, original_question = hit
+            logger.debug(f"Semantic cache hit ({similarity:.3f}): '{question}' ~ '{original_question}'")
+            result["response_time"] = round(time.time() - start_time, 2)
+            result["from_cache"] = True
+            result["semantic_similarity"] = round(similarity, 3)
+            self._cache_response(cache_key, result)
+            return {"result": result}
+
+        # ===== חיפוש ב-Qdrant =====
+        contexts_found = 0
+        static_snippets: List[str] = []
+        search_limit = 5 if question_type in ("how_to", "support") else 3
+
+        if self.qdrant_service:
+            try:
+                if question_type == "how_to":
+                    # סינון לקטעי HOWTO ולפי תפקיד המשתמש
+                    role = (user_context or {}).get("userType") or (user_context or {}).get("role") or "Any"
+                    flt = {"must": [{"key": "type", "match": {"value": "how_to"}}]}
+                    if role in ("StoreOwner", "Supplier"):
+                        flt["must"].append({"key": "role", "match": {"value": role}})
+                    static_snippets = await self.qdrant_service.search_async(embedding, limit=6, filter_=flt) or []
+                    # ריראנקר פרוצדורלי
+                    static_snippets = self._rerank_proc(static_snippets)[:6]
+                else:
+                    static_snippets = await self.qdrant_service.search_async(embedding, limit=search_limit) or []
+                contexts_found = len(static_snippets)
+            except Exception:
+                static_snippets = []
+                contexts_found = 0
+
+        # ===== הקשר סופי =====
+        context = "\n---\n".join(static_snippets) if static_snippets else "אין הקשר זמין. ענה בזהירות וללא ניחושים."
+        return {
+            "cache_key": cache_key,
+            "question": question,
+            "context": context,
+            "contexts_found": contexts_found,
+            "scope": scope,
+            "embedding": embedding,
+        }
+
     async def process_chat_message_with_context(
         self, user_id: int, message: str, user_context: Dict, db: Session = None
     ) -> Dict[str, Optional[str]]:
@@ -267,170 +357,96 @@ class ChatService:
         - אחר: ניסיון תשובה מהירה ממסד הנתונים ואז RAG רגיל.
         - כולל מטמון מלא (response_cache) ומדדים להצלבה ב־UI.
         """
-        import time, hashlib
         start_time = time.time()
 
         try:
-            question = (message or "").strip()
-            if not question:
-                return {
-                    "success": False,
-                    "message": "שגיאה",
-                    "response": "לא התקבלה שאלה.",
-                    "user_type": (user_context or {}).get("userType"),
-                    "contexts_found": 0,
-                    "dynamic_context_used": False,
-                    "response_time": round(time.time() - start_time, 2),
-                }
-
-            # ===== מטמון תשובה מלאה =====
-            cache_key = f"{user_id}:{hashlib.md5(question.lower().encode()).hexdigest()}"
-            cached = self.response_cache.get(cache_key)
-            if cached and time.time() - cached["timestamp"] < 600:
-                result = dict(cached["data"])
-                result["response_time"] = round(time.time() - start_time, 2)
-                result["from_cache"] = True
-                return result
-
-            # ===== סיווג שאלה =====
-            try:
-                question_type = self._classify_question_type(question, user_context)
-            except Exception:
-                question_type = "general"
-
-            # ===== קיצור-DB: מדדים מספריים (לא להריץ ב-how_to) =====
-            if question_type != "how_to":
-                try:
-                    quick_answer = self._try_answer_numeric_metrics(question, user_id, user_context, db)
-                except Exception:
-                    quick_answer = None
-                if quick_answer:
-                    result = {
-                        "success": True,
-                        "message": "תשובה מהירה מנתוני המערכת",
-                        "response": quick_answer,
-                        "user_type": (user_context or {}).get("userType"),
-                        "contexts_found": 0,
-                        "dynamic_context_used": False,
-                        "response_time": round(time.time() - start_time, 2),
-                    }
-                    # מטמון
-                    self.response_cache[cache_key] = {"data": dict(result), "timestamp": time.time()}
-                    if len(self.response_cache) > self.cache_max_size:
-                        oldest = min(self.response_cache.keys(), key=lambda k: self.response_cache[k]["timestamp"])
-                        self.response_cache.pop(oldest, None)
-                    return result
-
-            # ===== RAG: הכנת שאילתה + embedding =====
-            try:
-                enhanced_query = self._enhance_search_query(question, question_type, user_context)
-            except Exception:
-                enhanced_query = question
-
-            try:
-                embedding = self._get_embedding_cached(enhanced_query or question)
-            except Exception:
-                embedding = None
-
-            if not embedding:
-                return {
-                    "success": False,
-                    "message": "לא הצלחתי לעבד את השאלה",
-                    "response": "נסה לנסח מחדש את השאלה.",
-                    "user_type": (user_context or {}).get("userType"),
-                    "contexts_found": 0,
-                    "dynamic_context_used": False,
-                    "response_time": round(time.time() - start_time, 2),
-                }
-
-            # ===== חיפוש ב-Qdrant =====
-            contexts_found = 0
-            static_snippets: List[str] = []
-            search_limit = 5 if question_type in ("how_to", "support") else 3
-
-            if self.qdrant_service:
-                try:
-                    if question_type == "how_to":
-                        # סינון לקטעי HOWTO ולפי תפקיד המשתמש
-                        role = (user_context or {}).get("userType") or (user_context or {}).get("role") or "Any"
-                        flt = {"must": [{"key": "type", "match": {"value": "how_to"}}]}
-                        if role in ("StoreOwner", "Supplier"):
-                            flt["must"].append({"key": "role", "match": {"value": role}})
-                        static_snippets = self.qdrant_service.search(embedding, limit=6, filter_=flt) or []  # דורש search(filter_) בשירות
-                        # ריראנקר פרוצדורלי אם קיים
-                        if hasattr(self, "_rerank_proc"):
-                            static_snippets = self._rerank_proc(static_snippets)[:6]
-                    else:
-                        static_snippets = self.qdrant_service.search(embedding, limit=search_limit) or []
-                    contexts_found = len(static_snippets)
-                except Exception:
-                    static_snippets = []
-                    contexts_found = 0
-
-            # ===== הקשר סופי =====
-            context = "\n---\n".join(static_snippets) if static_snippets else "אין הקשר זמין. ענה בזהירות וללא ניחושים."
-
-            # ===== יצירת prompt/תשובה =====
-            try:
-                # אם יש לך פרומפט מינימלי מותאם – השארנו כפי שהיה
-                prompt = self._create_minimal_prompt(context, question, user_context)
-            except Exception:
-                # נפילה לפרומפט בסיסי
-                prompt = f"הקשר:\n{context}\n\nשאלה: {question}\nענה בעברית, קצר וברור."
+            prep = await self._prepare_answer(user_id, message, user_context, db, start_time)
+            if "result" in prep:
+                return prep["result"]
+            contexts_found = prep["contexts_found"]
 
+            # ===== יצירת תשובה =====
             try:
-                answer = self.ollama_service.generate_response(context, question)  # הממשק הקיים אצלך
+                answer = await self.ollama_service.generate_response_async(prep["context"], prep["question"])
+            except LLMQueueTimeout:
+                return self._chat_result(
+                    False, "השרת עמוס", "יש כרגע עומס על העוזר הדיגיטלי. נסה שוב בעוד רגע.",
+                    user_context, start_time, contexts_found
+                )
             except Exception as e:
-                return {
-                    "success": False,
-                    "message": f"שגיאה ביצירת תשובה: {e}",
-                    "response": "אירעה שגיאה בעת יצירת התשובה.",
-                    "user_type": (user_context or {}).get("userType"),
-                    "contexts_found": contexts_found,
-                    "dynamic_context_used": False,
-                    "response_time": round(time.time() - start_time, 2),
-                }
+                return self._chat_result(
+                    False, f"שגיאה ביצירת תשובה: {e}", "אירעה שגיאה בעת יצירת התשובה.",
+                    user_context, start_time, contexts_found
+                )
 
             if not answer:
-                return {
-                    "success": False,
-                    "message": "לא הצלחתי ליצור תשובה",
-                    "response": "נסה לשאול מחדש או לנסח אחרת.",
-                    "user_type": (user_context or {}).get("userType"),
-                    "contexts_found": contexts_found,
-                    "dynamic_context_used": False,
-                    "response_time": round(time.time() - start_time, 2),
-                }
+                return self._chat_result(
+                    False, "לא הצלחתי ליצור תשובה", "נסה לשאול מחדש או לנסח אחרת.",
+                    user_context, start_time, contexts_found
+                )
 
             # ===== תוצאת הצלחה + מטמון =====
-            result = {
-                "success": True,
-                "message": "תשובה מבוססת RAG",
-                "response": answer,
-                "user_type": (user_context or {}).get("userType"),
-                "contexts_found": contexts_found,
-                "dynamic_context_used": False,
-                "response_time": round(time.time() - start_time, 2),
-            }
-
-            self.response_cache[cache_key] = {"data": dict(result), "timestamp": time.time()}
-            if len(self.response_cache) > self.cache_max_size:
-                oldest = min(self.response_cache.keys(), key=lambda k: self.response_cache[k]["timestamp"])
-                self.response_cache.pop(oldest, None)
-
+            result = self._chat_result(True, "תשובה מבוססת RAG", answer, user_context, start_time, contexts_found)
+            self._remember_answer(prep, result)
             return result
 
         except Exception as e:
             logger.error(f"Error in process_chat_message_with_context: {e}")
-            return {
-                "success": False,
-                "message": f"שגיאה: {str(e)}",
-                "response": "אירעה שגיאה בעיבוד הבקשה.",
-                "user_type": (user_context or {}).get("userType"),
-                "contexts_found": 0,
-                "dynamic_context_used": False,
-                "response_time": round(time.time() - start_time, 2),
-            }
+            return self._chat_result(False, f"שגיאה: {str(e)}", "אירעה שגיאה בעיבוד הבקשה.", user_context, start_time)
+
+    async def stream_chat_message_with_context(
+        self, user_id: int, message: str, user_context: Dict, db: Session = None
+    ) -> AsyncIterator[Dict]:
+        """
+        כמו process_chat_message_with_context, אבל מזרים אירועים:
+        {"type": "token", "text": ...} לכל קטע מה-LLM, ובסוף {"type": "done", ...}
+        עם אותם שדות של התשובה הרגילה + first_token_time.
+        תשובות ממטמון/קיצור-DB מגיעות ישר כ-done.
+        """
+        start_time = time.time()
+
+        try:
+            prep = await self._prepare_answer(user_id, message, user_context, db, start_time)
+            if "result" in prep:
+                yield {"type": "done", **prep["result"]}
+                return
+            contexts_found = prep["contexts_found"]
+            yield {"type": "context", "contexts_found": contexts_found}
+
+            parts: List[str] = []
+            first_token_time = None
+            try:
+                async for token in self.ollama_service.generate_stream_async(prep["context"], prep["question"]):
+                    if first_token_time is None:
+                        first_token_time = round(time.time() - start_time, 2)
+                    parts.append(token)
+                    yield {"type": "token", "text": token}
+            except LLMQueueTimeout:
+                yield {"type": "done", **self._chat_result(
+                    False, "השרת עמוס", "יש כרגע עומס על העוזר הדיגיטלי. נסה שוב בעוד רגע.",
+                    user_context, start_time, contexts_found
+                )}
+                return
+
+            raw = "".join(parts).strip()
+            if not raw:
+                yield {"type": "done", **self._chat_result(
+                    False, "לא הצלחתי ליצור תשובה", "נסה לשאול מחדש או לנסח אחרת.",
+                    user_context, start_time, contexts_found
+                )}
+                return
+
+            # הטקסט הסופי עובר את אותו ניקוי כמו בתשובה הרגילה – הלקוח מחליף בו את מה שהוזרם
+            answer = self.ollama_service._post_process_fast(raw)
+            result = self._chat_result(True, "תשובה מבוססת RAG", answer, user_context, start_time, contexts_found)
+            self._remember_answer(prep, result)
+            yield {"type": "done", **result, "first_token_time": first_token_time}
+
+        except Exception as e:
+            logger.error(f"Error in stream_chat_message_with_context: {e}")
+            yield {"type": "done", **self._chat_result(
+                False, f"שגיאה: {str(e)}", "אירעה שגיאה בעיבוד הבקשה.", user_context, start_time
+            )}
 
 
     def _try_answer_numeric_metrics(self, message: str, user_id: int, user_context: Dict, db: Session):
@@ -452,6 +468,7 @@ class ChatService:
         asks_orders   = any(k in q for k in ["הזמנה", "הזמנות", "סטטוס"])
         asks_products = any(k in q for k in ["מוצר", "מוצרים", "קטלוג", "מלאי"])
         asks_links    = any(k in q for k in ["חיבור", "קישור", "קישורים", "חיבורים"])
+        asks_coverage = any(k in q for k in ["ערים", "אזור", "מחוז", "כיסוי", "מגיע", "משרת", "משרתים"])
 
         # סטטוסים
         wants_pending   = any(k in q for k in ["בתהליך", "ממתין", "ממתינות", "pending", "פתוח", "פתוחה", "פתוחות", "פתוחים"])
@@ -462,83 +479,49 @@ class ChatService:
         # סוג המשתמש (גם role וגם userType)
         ut = (user_context or {}).get("userType") or (user_context or {}).get("role") or ""
 
+        # שאלות כיסוי – מאינדקס אזורי השירות בזיכרון, בלי JOIN
+        if asks_coverage and not (asks_orders or asks_products or asks_links):
+            index = service_area_index.ensure_loaded(db)
+            if ut == "Supplier":
+                cities = len(index.cities_served(user_id))
+                owners = index.owners_reachable(user_id)
+                return f"אתה משרת {cities} ערים ומגיע ל-{owners} בעלי חנויות."
+            if ut == "StoreOwner":
+                city_id = (user_context or {}).get("city_id")
+                if not city_id:
+                    return "לא הוגדרה עיר לחנות שלך, לכן לא ניתן לחשב אילו ספקים משרתים אותך."
+                count = bin(index.suppliers_for_city(city_id)).count("1")
+                return f"{count} ספקים משרתים את העיר שלך."
+
+        if ut not in ("Supplier", "StoreOwner"):
+            return None
+
+        # המונים מטבלת user_stats – שורה אחת לפי מפתח, בלי COUNT על הטבלאות
+        stats = get_user_stats(db, user_id)
+        if not stats:
+            return None
+
+        if asks_orders:
+            if wants_pending:
+                return f"יש {stats['in_progress_orders']} הזמנות פתוחות (בתהליך)."
+            elif wants_completed:
+                return f"הושלמו {stats['completed_orders']} הזמנות."
+            elif wants_done:
+                return f"בוצעו {stats['done_orders']} הזמנות."
+            else:
+                return f"סה\"כ יש {stats['total_orders']} הזמנות."
+
         if ut == "Supplier":
-            # ספירה לספק
-            row = db.execute(text("""
-                SELECT
-                    COUNT(p.id) AS products_count,
-                    COUNT(CASE WHEN p.stock = 0 THEN 1 END) AS out_of_stock,
-                    COUNT(CASE WHEN o.status = N'בתהליך' THEN 1 END) AS pending_orders,
-                    COUNT(CASE WHEN o.status = N'הושלמה' THEN 1 END) AS completed_orders,
-                    COUNT(CASE WHEN o.status = N'בוצעה' THEN 1 END) AS done_orders,
-                    COUNT(DISTINCT o.id) AS total_orders
-                FROM products p
-                LEFT JOIN order_items oi ON oi.product_id = p.id
-                LEFT JOIN orders o ON o.id = oi.order_id
-                WHERE p.supplier_id = :uid AND p.is_active = 1
-            """), {"uid": user_id}).fetchone()
-
-            products_count  = (row.products_count or 0)
-            out_of_stock    = (row.out_of_stock or 0)
-            pending_orders  = (row.pending_orders or 0)
-            completed_orders= (row.completed_orders or 0)
-            done_orders     = (row.done_orders or 0)
-            total_orders    = (row.total_orders or 0)
-
-            if asks_orders:
-                if wants_pending:
-                    return f"יש {pending_orders} הזמנות פתוחות (בתהליך)."
-                elif wants_completed:
-                    return f"הושלמו {completed_orders} הזמנות."
-                elif wants_done:
-                    return f"בוצעו {done_orders} הזמנות."
-                else:
-                    return f"סה\"כ יש {total_orders} הזמנות."
             if asks_products:
                 if wants_outofstock:
-                    return f"{out_of_stock} מוצרים אזלו מהמלאי."
+                    return f"{stats['out_of_stock_products']} מוצרים אזלו מהמלאי."
                 else:
-                    return f"יש {products_count} מוצרים פעילים."
+                    return f"יש {stats['products_count']} מוצרים פעילים."
             if asks_links:
-                links_row = db.execute(text("""
-                    SELECT COUNT(*) AS active_links
-                    FROM links
-                    WHERE supplier_id = :uid AND status = N'פעיל'
-                """), {"uid": user_id}).fetchone()
-                return f"יש לך {links_row.active_links or 0} חיבורים פעילים עם בעלי חנויות."
-
-        elif ut == "StoreOwner":
-            row = db.execute(text("""
-                SELECT
-                    COUNT(o.id) AS total_orders,
-                    COUNT(CASE WHEN o.status = N'בתהליך' THEN 1 END) AS pending,
-                    COUNT(CASE WHEN o.status = N'הושלמה' THEN 1 END) AS completed,
-                    COUNT(CASE WHEN o.status = N'בוצעה' THEN 1 END) AS done
-                FROM orders o
-                WHERE o.owner_id = :uid
-            """), {"uid": user_id}).fetchone()
-
-            total_orders = (row.total_orders or 0)
-            pending      = (row.pending or 0)
-            completed    = (row.completed or 0)
-            done         = (row.done or 0)
-
-            if asks_orders:
-                if wants_pending:
-                    return f"יש {pending} הזמנות פתוחות (בתהליך)."
-                elif wants_completed:
-                    return f"הושלמו {completed} הזמנות."
-                elif wants_done:
-                    return f"בוצעו {done} הזמנות."
-                else:
-                    return f"סה\"כ יש {total_orders} הזמנות."
+                return f"יש לך {stats['connected_links']} חיבורים פעילים עם בעלי חנויות."
+        else:
             if asks_links:
-                links_row = db.execute(text("""
-                    SELECT COUNT(*) AS active_links
-                    FROM links
-                    WHERE owner_id = :uid AND status = N'פעיל'
-                """), {"uid": user_id}).fetchone()
-                return f"יש לך {links_row.active_links or 0} חיבורים פעילים עם ספקים."
+                return f"יש לך {stats['connected_links']} חיבורים פעילים עם ספקים."
             # לבעל חנות אין מוצרים משלו
 
         return None
@@ -565,6 +548,7 @@ class ChatService:
     def clear_cache(self):
         """ניקוי כל המטמון"""
         self.response_cache.clear()
-        self.user_context_cache.clear()
+        user_profiles.clear()
         self.embedding_cache.clear()
+        self.semantic_cache.clear()
         logger.info("All caches cleared")
\ No newline at end of file
@@ -1,12 +1,13 @@
 import logging
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 import hashlib
-import time
 
 from .ollama_service import OllamaService
 from .qdrant_service import QdrantService
+from .cache_layer import cache_registry
+from .user_vector_index import UserVectorIndex
+from .user_profile_service import user_profiles
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +24,19 @@ class DynamicRAGService:
         self.ollama_service = OllamaService()
         self.qdrant_service = QdrantService()
         
-        # מטמון מושרש יותר
-        self.user_data_cache = {}
-        self.context_cache = {}
-        self.vector_cache = {}
-        
+        # מטמונים בשכבה המשותפת (cache_layer) – TTL ופינוי LRU מטופלים שם
         self.cache_duration = 600  # 10 דקות במקום 5
         self.max_cache_size = 100
+        # נבנים מהפרופיל ומנוקים יחד איתו – אותו L1 קצר כדי שהניקוי יגיע גם ל-workers אחרים
+        self.user_data_cache = cache_registry.namespace("rag.user_data", max_size=self.max_cache_size,
+                                                        ttl=self.cache_duration, local_ttl=5)
+        self.context_cache = cache_registry.namespace("rag.context", max_size=self.max_cache_size,
+                                                      ttl=self.cache_duration, local_ttl=5)
+        # וקטורי ההקשר האישי – מטריצת float32 מנורמלת אחת (לא dict של רשימות)
+        self.vector_index = UserVectorIndex(max_users=50, ttl=self.cache_duration)
+        
+        # הקשר שנבנה מהפרופיל מתיישן יחד איתו – מנקים כשנתיב כתיבה מבטל את הפרופיל
+        user_profiles.add_listener(self.cleanup_user_cache)
         
         # Collection נפרדת לנתונים דינמיים
         self.dynamic_collection = "user_dynamic_data"
@@ -42,24 +49,19 @@ class DynamicRAGService:
         """
         try:
             cache_key = f"user_init_{user_id}"
-            current_time = time.time()
             
             # בדיקת מטמון מתקדמת
-            if cache_key in self.user_data_cache:
-                cached_data = self.user_data_cache[cache_key]
-                if current_time - cached_data["timestamp"] < self.cache_duration:
-                    logger.debug(f"Using cached init data for user {user_id}")
-                    return cached_data.get("initialized", False)
+            cached_data = self.user_data_cache.get(cache_key)
+            if cached_data is not None:
+                logger.debug(f"Using cached init data for user {user_id}")
+                return cached_data.get("initialized", False)
             
             # יצירת נתוני הקשר מהיר
             user_context = self._generate_user_context_fast(user_id, db)
             
             if not user_context:
                 # שמירת תוצאה שלילית במטמון
-                self.user_data_cache[cache_key] = {
-                    "timestamp": current_time,
-                    "initialized": False
-                }
+                self.user_data_cache.set(cache_key, {"initialized": False})
                 return False
             
             # הוספה למאגר וקטורים (אם נדרש)
@@ -67,14 +69,10 @@ class DynamicRAGService:
                 self._add_user_context_to_vectors_fast(user_id, user_context)
             
             # עדכון מטמון
-            self.user_data_cache[cache_key] = {
-                "timestamp": current_time,
+            self.user_data_cache.set(cache_key, {
                 "context": user_context,
                 "initialized": True
-            }
-            
-            # ניקוי מטמון
-            self._cleanup_cache()
+            })
             
             logger.debug(f"Generated dynamic context for user {user_id}")
             return True
@@ -84,83 +82,39 @@ class DynamicRAGService:
             return False
     
     def _generate_user_context_fast(self, user_id: int, db: Session) -> str:
-        """יצירת טקסט הקשר מותאם במהירות מקסימלית"""
+        """יצירת טקסט הקשר מותאם מהפרופיל המשותף (בלי שאילתות משלו)"""
         try:
             context_parts = []
             
-            # שאילתה מהירה יחידה לכל הנתונים החיוניים
-            user_data = db.execute(text("""
-                SELECT 
-                    u.userType, u.company_name, u.contact_name,
-                    COALESCE(stats.products_count, 0) as products_count,
-                    COALESCE(stats.active_orders, 0) as active_orders,
-                    COALESCE(stats.total_orders, 0) as total_orders
-                FROM users u
-                LEFT JOIN (
-                    SELECT 
-                        u.id,
-                        COUNT(DISTINCT p.id) as products_count,
-                        COUNT(DISTINCT CASE WHEN o.status = N'בתהליך' THEN o.id END) as active_orders,
-                        COUNT(DISTINCT o.id) as total_orders
-                    FROM users u
-                    LEFT JOIN products p ON (u.userType = 'Supplier' AND p.supplier_id = u.id AND p.is_active = 1)
-                    LEFT JOIN orders o ON (
-                        (u.userType = 'StoreOwner' AND o.owner_id = u.id) OR
-                        (u.userType = 'Supplier' AND o.supplier_id = u.id)
-                    )
-                    WHERE u.id = :user_id
-                    GROUP BY u.id
-                ) stats ON u.id = stats.id
-                WHERE u.id = :user_id
-            """), {"user_id": user_id}).fetchone()
-            
+            user_data = user_profiles.get(db, user_id)
             if not user_data:
                 return ""
             
-            user_type = user_data.userType
+            user_type = user_data["userType"]
             context_parts.append(f"משתמש: {user_type}")
             
-            if user_data.contact_name:
-                context_parts.append(f"שם: {user_data.contact_name}")
+            if user_data.get("contact_name"):
+                context_parts.append(f"שם: {user_data['contact_name']}")
             
             # נתונים מהירים לפי סוג משתמש
             if user_type == "Supplier":
-                context_parts.append(f"מוצרים: {user_data.products_count}")
-                context_parts.append(f"הזמנות פעילות: {user_data.active_orders}")
+                context_parts.append(f"מוצרים: {user_data['products_count']}")
+                context_parts.append(f"הזמנות פעילות: {user_data['in_progress_orders']}")
                 
-                # רק אם יש מוצרים, קבל דוגמאות מהירות
-                if user_data.products_count > 0:
-                    popular = db.execute(text("""
-                        SELECT TOP 2 p.product_name, p.unit_price
-                        FROM products p
-                        WHERE p.supplier_id = :user_id AND p.is_active = 1
-                        ORDER BY p.id DESC
-                    """), {"user_id": user_id}).fetchall()
-                    
-                    if popular:
-                        context_parts.append("מוצרים עיקריים:")
-                        for product in popular:
-                            context_parts.append(f"- {product.product_name} ({product.unit_price} ש\"ח)")
+                if user_data.get("top_products"):
+                    context_parts.append("מוצרים עיקריים:")
+                    for product in user_data["top_products"]:
+                        context_parts.append(f"- {product['name']} ({product['price']} ש\"ח)")
             
             elif user_type == "StoreOwner":
-                context_parts.append(f"סך הזמנות: {user_data.total_orders}")
-                context_parts.append(f"הזמנות פעילות: {user_data.active_orders}")
+                context_parts.append(f"סך הזמנות: {user_data['total_orders']}")
+                context_parts.append(f"הזמנות פעילות: {user_data['in_progress_orders']}")
                 
-                # רק אם יש הזמנות, קבל דוגמאות מהירות
-                if user_data.total_orders > 0:
-                    recent = db.execute(text("""
-                        SELECT TOP 2 o.id, u.company_name, o.status
-                        FROM orders o
-                        JOIN users u ON o.supplier_id = u.id
-                        WHERE o.owner_id = :user_id
-                        ORDER BY o.created_date DESC
-                    """), {"user_id": user_id}).fetchall()
-                    
-                    if recent:
-                        context_parts.append("הזמנות אחרונות:")
-                        for order in recent:
-                            supplier = order.company_name or "ספק"
-                            context_parts.append(f"- הזמנה #{order.id} מ{supplier}: {order.status}")
+                if user_data.get("recent_orders"):
+                    context_parts.append("הזמנות אחרונות:")
+                    for order in user_data["recent_orders"]:
+                        supplier = order["supplier"] or "ספק"
+                        context_parts.append(f"- הזמנה #{order['id']} מ{supplier}: {order['status']}")
             
             # חזרת context מתומצת
             context = "\n".join(context_parts)
@@ -182,19 +136,8 @@ class DynamicRAGService:
                 logger.warning(f"Failed to generate embedding for user {user_id}")
                 return
             
-            # שמירה במטמון זיכרון במקום Qdrant למהירות
-            cache_key = f"vector_user_{user_id}"
-            self.vector_cache[cache_key] = {
-                "embedding": embedding,
-                "text": context,
-                "timestamp": time.time()
-            }
-            
-            # ניקוי מטמון וקטורים
-            if len(self.vector_cache) > 50:
-                oldest = min(self.vector_cache.keys(), 
-                           key=lambda k: self.vector_cache[k]["timestamp"])
-                del self.vector_cache[oldest]
+            # שמירה באינדקס בזיכרון במקום Qdrant למהירות
+            self.vector_index.upsert(user_id, embedding, context)
                 
         except Exception as e:
             logger.error(f"Error adding user context to vectors: {e}")
@@ -202,12 +145,8 @@ class DynamicRAGService:
     def get_user_context_text(self, user_id: int) -> str:
         """קבלת טקסט הקשר משתמש מהמטמון"""
         try:
-            cache_key = f"user_init_{user_id}"
-            if cache_key in self.user_data_cache:
-                cached = self.user_data_cache[cache_key]
-                if time.time() - cached["timestamp"] < self.cache_duration:
-                    return cached.get("context", "")
-            return ""
+            cached = self.user_data_cache.get(f"user_init_{user_id}")
+            return cached.get("context", "") if cached else ""
         except Exception as e:
             logger.error(f"Error getting user context text: {e}")
             return ""
@@ -235,26 +174,17 @@ class DynamicRAGService:
             return base_context
     
     def _search_user_context_fast(self, user_id: int, query_embedding: List[float]) -> str:
-        """חיפוש מהיר בהקשר האישי"""
+        """חיפוש מהיר בהקשר האישי – cosine מלא מול השורה של המשתמש"""
         try:
-            cache_key = f"vector_user_{user_id}"
-            if cache_key not in self.vector_cache:
-                return ""
-                
-            cached_vector = self.vector_cache[cache_key]
-            
-            # בדיקת תקינות זמן
-            if time.time() - cached_vector["timestamp"] > self.cache_duration:
-                del self.vector_cache[cache_key]
+            match = self.vector_index.similarity(user_id, query_embedding)
+            if not match:
                 return ""
             
-            # חישוב דמיון מהיר
-            user_embedding = cached_vector["embedding"]
-            similarity = self._cosine_similarity_fast(query_embedding, user_embedding)
+            similarity, user_text = match
             
             # threshold נמוך יותר למהירות
             if similarity > 0.2:
-                return cached_vector["text"]
+                return user_text
             
             return ""
             
@@ -262,75 +192,28 @@ class DynamicRAGService:
             logger.error(f"Error searching user context: {e}")
             return ""
     
-    def _cosine_similarity_fast(self, vec1: List[float], vec2: List[float]) -> float:
-        """חישוב דמיון קוסינוס מהיר יותר"""
-        try:
-            # חישוב על חלק מהוקטור בלבד למהירות
-            sample_size = min(100, len(vec1), len(vec2))
-            
-            dot_product = sum(a * b for a, b in zip(vec1[:sample_size], vec2[:sample_size]))
-            
-            # חישוב magnitude מהיר יותר
-            mag1 = sum(a * a for a in vec1[:sample_size]) ** 0.5
-            mag2 = sum(b * b for b in vec2[:sample_size]) ** 0.5
-            
-            if mag1 == 0 or mag2 == 0:
-                return 0
-            
-            return dot_product / (mag1 * mag2)
-            
-        except Exception as e:
-            logger.error(f"Error calculating fast cosine similarity: {e}")
-            return 0
-    
-    def _cleanup_cache(self):
-        """ניקוי מטמון אוטומטי"""
+    def search_similar_user_contexts(self, query_embeddings, top_k: int = 5,
+                                      min_score: float = 0.2) -> List[List[Dict]]:
+        """
+        top-k הקשרי משתמשים דומים לשאילתה אחת או לאצווה של שאילתות
+        (מכפלת מטריצה אחת מול כל המשתמשים במטמון)
+        """
         try:
-            current_time = time.time()
-            
-            # ניקוי מטמון נתוני משתמש
-            expired_keys = [
-                key for key, data in self.user_data_cache.items()
-                if current_time - data["timestamp"] > self.cache_duration
-            ]
-            for key in expired_keys:
-                del self.user_data_cache[key]
-            
-            # ניקוי מטמון וקטורים
-            expired_vector_keys = [
-                key for key, data in self.vector_cache.items()
-                if current_time - data["timestamp"] > self.cache_duration
+            return [
+                [{"user_id": uid, "score": score, "text": user_text} for uid, score, user_text in hits]
+                for hits in self.vector_index.top_k(query_embeddings, k=top_k, min_score=min_score)
             ]
-            for key in expired_vector_keys:
-                del self.vector_cache[key]
-                
-            # הגבלת גודל מטמון
-            if len(self.user_data_cache) > self.max_cache_size:
-                oldest_keys = sorted(
-                    self.user_data_cache.keys(),
-                    key=lambda k: self.user_data_cache[k]["timestamp"]
-                )[:10]  # מחק 10 הישנים ביותר
-                for key in oldest_keys:
-                    del self.user_data_cache[key]
-                    
         except Exception as e:
-            logger.error(f"Error cleaning cache: {e}")
+            logger.error(f"Error searching similar user contexts: {e}")
+            return []
     
     def cleanup_user_cache(self, user_id: int):
         """ניקוי מטמון משתמש ספציפי"""
         try:
-            keys_to_remove = [
-                key for key in self.user_data_cache.keys() 
-                if f"user_{user_id}" in key
-            ]
+            self.user_data_cache.delete(f"user_init_{user_id}")
             
-            for key in keys_to_remove:
-                del self.user_data_cache[key]
-                
-            # ניקוי מטמון וקטורים
-            vector_key = f"vector_user_{user_id}"
-            if vector_key in self.vector_cache:
-                del self.vector_cache[vector_key]
+            # ניקוי וקטור ההקשר
+            self.vector_index.remove(user_id)
                 
             logger.debug(f"Cleaned cache for user {user_id}")
             
@@ -340,9 +223,9 @@ class DynamicRAGService:
     def get_cache_stats(self) -> Dict:
         """סטטיסטיקות מטמון למעקב ביצועים"""
         return {
-            "user_data_cache_size": len(self.user_data_cache),
-            "vector_cache_size": len(self.vector_cache),
-            "context_cache_size": len(self.context_cache),
+            "user_data_cache": self.user_data_cache.stats(),
+            "vector_index": self.vector_index.stats(),
+            "context_cache": self.context_cache.stats(),
             "cache_duration": self.cache_duration,
             "max_cache_size": self.max_cache_size
         }
\ No newline at end of file
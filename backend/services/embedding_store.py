@@ -0,0 +1,133 @@
+# backend/services/embedding_store.py
+"""
+מאגר embeddings קבוע על הדיסק (SQLite, וקטורים כ-float32)
+מפתח: (מודל ה-embedding, sha256 של הטקסט הנקי שנשלח למודל) –
+שורד הפעלה מחדש ומשותף לכל ה-workers ולסקריפט האינדוקס
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class EmbeddingStore:
+    """get/put בודדים ובאצווה; כל הפעולות בטוחות מכמה threads"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text]).get(text)
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """{text: vector} לטקסטים שנמצאו במאגר"""
+        by_hash = {text_key(t): t for t in texts}
+        found: Dict[str, List[float]] = {}
+        hashes = list(by_hash)
+        with self._lock:
+            # SQLite מגביל מספר פרמטרים – בחלקים
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(part))})",
+                    [model, *part]
+                ).fetchall()
+                for h, blob in rows:
+                    found[by_hash[h]] = _unpack(blob)
+            self.hits += len(found)
+            self.misses += len(by_hash) - len(found)
+        return found
+
+    def put(self, model: str, text: str, vector: List[float]):
+        self.put_many(model, [(text, vector)])
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float]]]):
+        now = time.time()
+        rows = [(model, text_key(t), len(v), _pack(v), now) for t, v in items if v]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self.writes += len(rows)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "vectors": count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+            }
+
+
+_store: Optional[EmbeddingStore] = None
+_store_lock = threading.Lock()
+_store_failed = False
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """המאגר המשותף; None אם כבוי (EMBEDDING_STORE=0) או שלא ניתן לפתוח את הקובץ"""
+    global _store, _store_failed
+    if _store is not None or _store_failed:
+        return _store
+    if os.getenv("EMBEDDING_STORE", "1").lower() in ("0", "false", "no", "off"):
+        _store_failed = True
+        return None
+    with _store_lock:
+        if _store is None and not _store_failed:
+            path = os.getenv("EMBEDDING_STORE_PATH", "embeddings.sqlite3")
+            try:
+                _store = EmbeddingStore(path)
+                logger.info(f"Embedding store opened at {path}")
+            except Exception as e:
+                _store_failed = True
+                logger.warning(f"Embedding store unavailable ({path}): {e}")
+    return _store
@@ -0,0 +1,73 @@
+# backend/services/events_service.py
+"""
+שירות אירועים (push) ללקוח הדסקטופ
+הפצה לפי משתמש: כל חיבור SSE נרשם עם user_id ומקבל רק את האירועים שלו
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker:
+    """
+    מתווך אירועים בזיכרון התהליך.
+    ראוטרים סינכרוניים רצים ב-threadpool, לכן publish מעביר את האירוע
+    ל-event loop של כל מנוי דרך call_soon_threadsafe.
+    (ריצה עם כמה workers תדרוש מתווך משותף – Redis pub/sub וכד')
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """רישום חיבור חדש – חייב להיקרא מתוך ה-event loop"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subs = self._subscribers.get(user_id)
+            if not subs:
+                return
+            for entry in [e for e in subs if e[1] is queue]:
+                subs.discard(entry)
+            if not subs:
+                self._subscribers.pop(user_id, None)
+
+    def publish(self, user_ids: Iterable[int], event_type: str, data: Dict):
+        """שליחת אירוע למשתמשים; משתמש ללא חיבור פתוח – לא עושים כלום"""
+        event = {"type": event_type, "ts": datetime.utcnow().isoformat(), **data}
+        with self._lock:
+            targets: List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]] = [
+                entry for uid in set(user_ids) for entry in self._subscribers.get(uid, ())
+            ]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # ה-loop נסגר – החיבור יוסר ב-unsubscribe
+                pass
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: Dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # לקוח איטי – מפילים; הוא משלים חוסרים בסנכרון changes?since=
+            logger.warning("events queue full, dropping %s", event.get("type"))
+
+    def connected_users(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+event_broker = EventBroker()
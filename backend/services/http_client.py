@@ -0,0 +1,138 @@
+# backend/services/http_client.py
+"""
+לקוח HTTP אסינכרוני משותף לשירותי ה-AI (Ollama, Qdrant)
+- AsyncClient אחד לכל התהליך: connection pooling + keep-alive, timeout לכל קריאה
+- LLMLimiter: הגבלת מספר היצירות המקבילות מול ה-LLM – עומס נראה כתור ממתין
+  (עם מדדי המתנה) במקום שרת קפוא
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+try:
+    import httpx
+    HAS_HTTPX = True
+except ImportError:  # בלי httpx – השירותים חוזרים לקריאות requests ב-threadpool
+    httpx = None
+    HAS_HTTPX = False
+
+logger = logging.getLogger(__name__)
+
+_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """AsyncClient משותף (נוצר בעצלות בתוך ה-event loop הראשון שמבקש אותו)"""
+    global _client
+    if _client is None or _client.is_closed:
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("AI_HTTP_KEEPALIVE_EXPIRY", "30")),
+        )
+        # ברירת מחדל בלבד – כל קריאה מעבירה timeout משלה
+        _client = httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(10.0, connect=3.0))
+    return _client
+
+
+async def aclose_async_client():
+    """סגירת ה-client בכיבוי השרת"""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def call_timeout(total: float, connect: float = 3.0):
+    """timeout לקריאה בודדת: connect קצר, קריאה/כתיבה עד total"""
+    if not HAS_HTTPX:
+        return total
+    return httpx.Timeout(total, connect=min(connect, total))
+
+
+class LLMQueueTimeout(Exception):
+    """הבקשה חיכתה בתור ל-LLM יותר מ-LLM_QUEUE_TIMEOUT"""
+
+
+class LLMLimiter:
+    """
+    סמפור מול ה-LLM עם מדדים: כמה רצות, כמה ממתינות, זמן המתנה ממוצע/מקסימלי.
+    בקשה שממתינה יותר מ-queue_timeout נדחית (LLMQueueTimeout) במקום להיתקע.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # זמן עד טוקן ראשון (בהזרמה) – ההשהיה שהמשתמש באמת מרגיש
+        self.first_token_count = 0
+        self.first_token_total = 0.0
+        self.first_token_max = 0.0
+
+    def _sem(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """async with limiter.slot() as waited: ... – waited = שניות בתור"""
+        sem = self._sem()
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(sem.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"LLM queue timeout after {self.queue_timeout:.0f}s "
+                           f"(active={self.active}, waiting={self.waiting - 1})")
+            raise LLMQueueTimeout()
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - start
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 1:
+            logger.info(f"LLM request queued for {waited:.2f}s")
+        self.active += 1
+        try:
+            yield waited
+        finally:
+            self.active -= 1
+            self.completed += 1
+            sem.release()
+
+    def record_first_token(self, seconds: float):
+        self.first_token_count += 1
+        self.first_token_total += seconds
+        self.first_token_max = max(self.first_token_max, seconds)
+
+    def stats(self) -> Dict:
+        served = self.completed + self.active
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / served * 1000, 1) if served else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "streamed": self.first_token_count,
+            "avg_first_token_ms": round(self.first_token_total / self.first_token_count * 1000, 1)
+            if self.first_token_count else 0.0,
+            "max_first_token_ms": round(self.first_token_max * 1000, 1),
+        }
+
+
+llm_limiter = LLMLimiter()
@@ -2,11 +2,16 @@ import logging
 import requests
 import os
 import time
-from typing import List, Optional, Dict
+from typing import AsyncIterator, List, Optional, Dict
 import json
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
+from starlette.concurrency import run_in_threadpool
+
+from .http_client import HAS_HTTPX, httpx, get_async_client, call_timeout, llm_limiter
+from .embedding_store import get_embedding_store
+
 logger = logging.getLogger(__name__)
 
 class OllamaService:
@@ -27,6 +32,10 @@ class OllamaService:
         self.timeout = int(os.getenv("OLLAMA_TIMEOUT", "60"))  # הקטנתי מ-90 ל-60
         self.max_retries = 2  # הקטנתי מ-3 ל-2
         
+        # embedding באצוות (/api/embed): גודל אצווה וכמה אצוות רצות במקביל
+        self.embed_batch_size = int(os.getenv("OLLAMA_EMBED_BATCH", "32"))
+        self.embed_parallelism = int(os.getenv("OLLAMA_EMBED_PARALLEL", "2"))
+        
         # פרמטרים מותאמים למהירות מקסימלית
         self.speed_optimized_params = {
             "temperature": 0.3,    # פחות יצירתיות, יותר מהירות
@@ -38,9 +47,6 @@ class OllamaService:
             "stop": ["Human:", "User:", "שאלה:", "Q:", "###", "\n\n\n"]
         }
         
-        # Thread pool לקריאות מקבילות
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        
         logger.info(f"Ollama service initialized with speed optimizations: {self.chat_model}")
 
     def health_check(self) -> bool:
@@ -62,6 +68,12 @@ class OllamaService:
             # ניקוי טקסט מהיר יותר
             clean_text = self._clean_text_fast(text)
             
+            # מאגר ה-embeddings הקבוע – בלי קריאה ל-Ollama לטקסט שכבר חושב
+            if retries == 0:
+                stored = self._stored_embeddings([clean_text]).get(clean_text)
+                if stored:
+                    return stored
+            
             payload = {
                 "model": self.embedding_model,
                 "prompt": clean_text
@@ -81,6 +93,7 @@ class OllamaService:
                 embedding = data.get("embedding")
                 if embedding and len(embedding) > 0:
                     logger.debug(f"Embedding generated in {duration:.2f}s")
+                    self._store_embeddings([(clean_text, embedding)])
                     return embedding
                 else:
                     logger.warning("Empty embedding received")
@@ -105,6 +118,101 @@ class OllamaService:
                 return self.get_embedding(text, retries + 1)
             return []
 
+    def get_embeddings_batch(self, texts: List[str], truncate: bool = True) -> List[List[float]]:
+        """
+        embeddings לרשימת טקסטים בקריאות אצווה ל-/api/embed (מערך input),
+        עם מספר חסום של אצוות במקביל. התוצאה באותו סדר; [] לטקסט שנכשל.
+        truncate=False – בלי קיצור ל-500 תווים (לקטעי מסמכים באינדוקס).
+        """
+        if not texts:
+            return []
+        if truncate:
+            clean = [self._clean_text_fast(t) for t in texts]
+        else:
+            clean = [" ".join((t or "").split()) for t in texts]
+
+        # רק טקסטים שאינם במאגר הקבוע נשלחים למודל
+        known = self._stored_embeddings(clean)
+        missing = list(dict.fromkeys(t for t in clean if t not in known))
+
+        if missing:
+            size = max(1, self.embed_batch_size)
+            batches = [missing[i:i + size] for i in range(0, len(missing), size)]
+            start_time = time.time()
+            workers = max(1, min(self.embed_parallelism, len(batches)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+
+            computed = []
+            for batch, embeddings in zip(batches, results):
+                computed.extend((t, e) for t, e in zip(batch, embeddings) if e)
+            known.update(computed)
+            self._store_embeddings(computed)
+            logger.info(f"Embedded {len(missing)} texts in {len(batches)} batches "
+                        f"({time.time() - start_time:.2f}s, {len(clean) - len(missing)} from store)")
+
+        return [known.get(t, []) for t in clean]
+
+    def _stored_embeddings(self, texts: List[str]) -> Dict[str, List[float]]:
+        store = get_embedding_store()
+        if store is None:
+            return {}
+        try:
+            return store.get_many(self.embedding_model, texts)
+        except Exception as e:
+            logger.warning(f"Embedding store read failed: {e}")
+            return {}
+
+    def _store_embeddings(self, items: List[tuple]):
+        store = get_embedding_store()
+        if store is None or not items:
+            return
+        try:
+            store.put_many(self.embedding_model, items)
+        except Exception as e:
+            logger.warning(f"Embedding store write failed: {e}")
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """אצווה אחת ל-/api/embed; Ollama ישן בלי /api/embed – טקסט-טקסט דרך /api/embeddings"""
+        for attempt in range(self.max_retries):
+            try:
+                response = requests.post(
+                    f"{self.base_url}/api/embed",
+                    json={"model": self.embedding_model, "input": batch},
+                    timeout=self.timeout
+                )
+                if response.status_code == 404:
+                    logger.warning("/api/embed not available, embedding one by one")
+                    return [self._embed_single(t) for t in batch]
+                if response.status_code == 200:
+                    embeddings = response.json().get("embeddings") or []
+                    if len(embeddings) == len(batch):
+                        return embeddings
+                    logger.warning(f"Embed batch returned {len(embeddings)}/{len(batch)} vectors")
+                else:
+                    logger.error(f"Embed batch API error: {response.status_code}")
+            except requests.exceptions.Timeout:
+                logger.warning(f"Embed batch timeout, retry {attempt + 1}")
+                continue
+            except Exception as e:
+                logger.error(f"Embed batch error: {e}")
+            time.sleep(0.5)
+        return [[] for _ in batch]
+
+    def _embed_single(self, text: str) -> List[float]:
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/embeddings",
+                json={"model": self.embedding_model, "prompt": text},
+                timeout=self.timeout
+            )
+            if response.status_code == 200:
+                return response.json().get("embedding") or []
+            logger.error(f"Embedding API error: {response.status_code}")
+        except Exception as e:
+            logger.error(f"Embedding error: {e}")
+        return []
+
     def generate_response(self, context: str, prompt: str, retries: int = 0) -> Optional[str]:
         """יצירת תגובה מהירה יותר עם אופטימיזציות"""
         if retries >= self.max_retries:
@@ -232,24 +340,144 @@ class OllamaService:
         
         return response.strip()
 
-    async def generate_response_async(self, context: str, prompt: str) -> Optional[str]:
-        """גרסה אסינכרונית לביצועים טובים יותר"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor, 
-            self.generate_response, 
-            context, 
-            prompt
-        )
+    # ===== גרסאות אסינכרוניות (httpx משותף) – לא חוסמות את ה-event loop =====
+    async def health_check_async(self) -> bool:
+        if not HAS_HTTPX:
+            return await run_in_threadpool(self.health_check)
+        try:
+            response = await get_async_client().get(f"{self.base_url}/api/version", timeout=call_timeout(3))
+            return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Ollama health check failed: {e}")
+            return False
 
     async def get_embedding_async(self, text: str) -> List[float]:
-        """גרסה אסינכרונית לקבלת embedding"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            self.executor,
-            self.get_embedding,
-            text
-        )
+        """embedding דרך ה-client האסינכרוני המשותף, עם אותו retry כמו הגרסה הסינכרונית"""
+        if not HAS_HTTPX:
+            return await run_in_threadpool(self.get_embedding, text)
+
+        clean_text = self._clean_text_fast(text)
+        # SQLite מאחורי threading.Lock (ופתיחת הקובץ בקריאה הראשונה) – לא על ה-event loop
+        stored = (await run_in_threadpool(self._stored_embeddings, [clean_text])).get(clean_text)
+        if stored:
+            return stored
+
+        payload = {"model": self.embedding_model, "prompt": clean_text}
+        client = get_async_client()
+        for attempt in range(self.max_retries):
+            try:
+                start_time = time.time()
+                response = await client.post(
+                    f"{self.base_url}/api/embeddings",
+                    json=payload,
+                    timeout=call_timeout(self.timeout - 20)
+                )
+                if response.status_code == 200:
+                    embedding = response.json().get("embedding")
+                    if embedding:
+                        logger.debug(f"Embedding generated in {time.time() - start_time:.2f}s")
+                        await run_in_threadpool(self._store_embeddings, [(clean_text, embedding)])
+                        return embedding
+                    logger.warning("Empty embedding received")
+                    return []
+                logger.error(f"Embedding API error: {response.status_code}")
+            except httpx.TimeoutException:
+                logger.warning(f"Embedding timeout, retry {attempt + 1}")
+                continue
+            except Exception as e:
+                logger.error(f"Embedding error: {e}")
+            await asyncio.sleep(0.5)
+        logger.error("Max retries reached for embedding")
+        return []
+
+    async def generate_response_async(self, context: str, prompt: str) -> Optional[str]:
+        """
+        יצירת תשובה דרך ה-client האסינכרוני, מאחורי llm_limiter –
+        תחת עומס הבקשות ממתינות בתור (נמדד) ולא חוסמות את השרת
+        """
+        payload = {
+            "model": self.chat_model,
+            "prompt": self._optimize_prompt_fast(context, prompt),
+            "stream": False,
+            "options": self.speed_optimized_params
+        }
+        async with llm_limiter.slot():
+            if not HAS_HTTPX:
+                return await run_in_threadpool(self.generate_response, context, prompt)
+
+            client = get_async_client()
+            for attempt in range(self.max_retries):
+                try:
+                    start_time = time.time()
+                    response = await client.post(
+                        f"{self.base_url}/api/generate",
+                        json=payload,
+                        timeout=call_timeout(self.timeout)
+                    )
+                    if response.status_code == 200:
+                        generated_text = response.json().get("response", "").strip()
+                        if generated_text:
+                            logger.info(f"Response generated in {time.time() - start_time:.2f}s")
+                            return self._post_process_fast(generated_text)
+                        logger.warning("Empty response received")
+                        return None
+                    logger.error(f"Generation API error: {response.status_code}")
+                except httpx.TimeoutException:
+                    logger.warning(f"Generation timeout, retry {attempt + 1}")
+                    continue
+                except Exception as e:
+                    logger.error(f"Generation error: {e}")
+                await asyncio.sleep(1)
+            logger.error("Max retries reached for response generation")
+            return None
+
+    async def generate_stream_async(self, context: str, prompt: str) -> AsyncIterator[str]:
+        """
+        יצירת תשובה בהזרמה: מחזיר את הטוקנים מ-Ollama ברגע שהם מגיעים ("stream": True).
+        רץ מאחורי llm_limiter; ניתוק הלקוח סוגר את הגנרטור ומשחרר את המקום בתור.
+        """
+        payload = {
+            "model": self.chat_model,
+            "prompt": self._optimize_prompt_fast(context, prompt),
+            "stream": True,
+            "options": self.speed_optimized_params
+        }
+        async with llm_limiter.slot():
+            if not HAS_HTTPX:
+                # בלי httpx אין הזרמה אמיתית – התשובה כולה כ"טוקן" אחד
+                answer = await run_in_threadpool(self.generate_response, context, prompt)
+                if answer:
+                    yield answer
+                return
+
+            start_time = time.time()
+            first_token_at = None
+            async with get_async_client().stream(
+                "POST",
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=call_timeout(self.timeout)
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Generation API error: {response.status_code}")
+                    return
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    token = data.get("response")
+                    if token:
+                        if first_token_at is None:
+                            first_token_at = time.time() - start_time
+                            llm_limiter.record_first_token(first_token_at)
+                        yield token
+                    if data.get("done"):
+                        break
+            logger.info(f"Streamed response in {time.time() - start_time:.2f}s "
+                        f"(first token {first_token_at or 0:.2f}s)")
 
     def get_model_info(self) -> Dict:
         """קבלת מידע על המודלים - גרסה מהירה"""
@@ -0,0 +1,190 @@
+# backend/services/orders_export.py
+"""
+יצוא הזמנות עמודתי (Arrow IPC stream / Parquet) ישר מ-cursor של ה-DB
+השורות נקראות באצוות של batch_size ומומרות ל-RecordBatch; כל אצווה נכתבת ונשלחת
+ללקוח מיד – הזיכרון בשרת חסום באצווה אחת, בלי קשר לגודל ההיסטוריה.
+pyarrow הוא תלות אופציונלית (HAS_PYARROW); בלעדיו הנתיב מחזיר 503.
+"""
+
+import io
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    pa = None
+    pq = None
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+EXPORT_KINDS = ("orders", "items")
+EXPORT_FORMATS = ("arrow", "parquet")
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+DEFAULT_BATCH_SIZE = 5000
+
+# (שם עמודה, טיפוס arrow) – אותו סדר כמו ב-SELECT; סכומים יוצאים מה-SQL כ-FLOAT
+_FIELDS = {
+    "orders": [
+        ("order_id", "int64"), ("created_date", "timestamp"), ("status", "string"),
+        ("owner_id", "int64"), ("owner_company", "string"), ("owner_contact", "string"),
+        ("supplier_id", "int64"), ("supplier_company", "string"), ("supplier_contact", "string"),
+        ("items_count", "int64"), ("total_amount", "float64"),
+    ],
+    "items": [
+        ("order_id", "int64"), ("created_date", "timestamp"), ("status", "string"),
+        ("owner_id", "int64"), ("owner_company", "string"),
+        ("supplier_id", "int64"), ("supplier_company", "string"),
+        ("product_id", "int64"), ("product_name", "string"),
+        ("quantity", "int64"), ("unit_price", "float64"), ("line_total", "float64"),
+    ],
+}
+
+_SQL = {
+    "orders": """
+        SELECT o.id AS order_id, o.created_date, o.status,
+               o.owner_id, ow.company_name AS owner_company, ow.contact_name AS owner_contact,
+               o.supplier_id, sp.company_name AS supplier_company, sp.contact_name AS supplier_contact,
+               COALESCE(i.items_count, 0) AS items_count,
+               CAST(COALESCE(o.total_amount, i.total, 0) AS FLOAT) AS total_amount
+        FROM orders o
+        LEFT JOIN users ow ON ow.id = o.owner_id
+        LEFT JOIN users sp ON sp.id = o.supplier_id
+        OUTER APPLY (
+            SELECT COUNT(*) AS items_count,
+                   SUM(oi.quantity * COALESCE(oi.unit_price, p.unit_price)) AS total
+            FROM order_items oi JOIN products p ON p.id = oi.product_id
+            WHERE oi.order_id = o.id
+        ) i
+        {where}
+        ORDER BY o.created_date DESC, o.id DESC
+    """,
+    "items": """
+        SELECT o.id AS order_id, o.created_date, o.status,
+               o.owner_id, ow.company_name AS owner_company,
+               o.supplier_id, sp.company_name AS supplier_company,
+               oi.product_id, p.product_name, oi.quantity,
+               CAST(COALESCE(oi.unit_price, p.unit_price) AS FLOAT) AS unit_price,
+               CAST(oi.quantity * COALESCE(oi.unit_price, p.unit_price) AS FLOAT) AS line_total
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        JOIN products p ON p.id = oi.product_id
+        LEFT JOIN users ow ON ow.id = o.owner_id
+        LEFT JOIN users sp ON sp.id = o.supplier_id
+        {where}
+        ORDER BY o.created_date DESC, o.id DESC, oi.id
+    """,
+}
+
+
+def _schema(kind: str):
+    types = {"int64": pa.int64(), "float64": pa.float64(), "string": pa.string(),
+             "timestamp": pa.timestamp("ms")}
+    return pa.schema([(name, types[t]) for name, t in _FIELDS[kind]])
+
+
+def _where(owner_id: Optional[int], supplier_id: Optional[int], history: Optional[bool],
+           date_from: Optional[datetime], date_to: Optional[datetime]):
+    conds: List[str] = []
+    params: Dict = {}
+    if owner_id is not None:
+        conds.append("o.owner_id = :owner_id")
+        params["owner_id"] = owner_id
+    if supplier_id is not None:
+        conds.append("o.supplier_id = :supplier_id")
+        params["supplier_id"] = supplier_id
+    if history is True:
+        conds.append("o.status = N'הושלמה'")
+    elif history is False:
+        conds.append("o.status <> N'הושלמה'")
+    if date_from is not None:
+        conds.append("o.created_date >= :date_from")
+        params["date_from"] = date_from
+    if date_to is not None:
+        conds.append("o.created_date < :date_to")
+        params["date_to"] = date_to
+    return ("WHERE " + " AND ".join(conds)) if conds else "", params
+
+
+class _ChunkSink(io.RawIOBase):
+    """יעד כתיבה ל-pyarrow שצובר בתים עד שה-generator מוציא אותם (drain)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._chunks.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_export(session_factory: Callable[[], Session], kind: str, fmt: str,
+                  owner_id: Optional[int] = None, supplier_id: Optional[int] = None,
+                  history: Optional[bool] = None,
+                  date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    generator של בתים לקובץ arrow/parquet. פותח Session משלו (ה-dependency של הבקשה
+    כבר סגור כשהתגובה בסטרימינג) וקורא את התוצאה ב-partitions של batch_size.
+    """
+    schema = _schema(kind)
+    names = schema.names
+    where, params = _where(owner_id, supplier_id, history, date_from, date_to)
+    stmt = text(_SQL[kind].format(where=where))
+
+    sink = _ChunkSink()
+    writer = (pq.ParquetWriter(sink, schema, compression="snappy") if fmt == "parquet"
+              else pa.ipc.new_stream(sink, schema))
+    db = session_factory()
+    rows_total = 0
+    try:
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size), params)
+        for rows in result.partitions(batch_size):
+            columns = list(zip(*rows))
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(col, type=schema.field(i).type) for i, col in enumerate(columns)],
+                names=names,
+            )
+            writer.write_batch(batch)
+            rows_total += len(rows)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        writer.close()
+        writer = None
+        yield sink.drain()
+        logger.info(f"orders export ({kind}/{fmt}): {rows_total} rows")
+    finally:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        db.close()
@@ -3,6 +3,14 @@ import logging
 from typing import List
 import requests
 import time
+import json
+import hashlib
+from array import array
+
+from starlette.concurrency import run_in_threadpool
+
+from .http_client import HAS_HTTPX, httpx, get_async_client, call_timeout
+from .cache_layer import cache_registry
 
 logger = logging.getLogger(__name__)
 
@@ -28,10 +36,12 @@ class QdrantService:
             'Connection': 'keep-alive'
         })
         
-        # מטמון לתוצאות חיפוש
-        self.search_cache = {}
-        self.cache_ttl = 300  # 5 דקות
-        self.max_cache_size = 100
+        # מטמון LRU+TTL לתוצאות חיפוש (מפתח: כל הוקטור + limit + פילטר קנוני)
+        self.search_cache = cache_registry.namespace(
+            "qdrant.search",
+            max_size=int(os.getenv("QDRANT_SEARCH_CACHE_SIZE", "256")),
+            ttl=int(os.getenv("QDRANT_SEARCH_CACHE_TTL", "300"))  # 5 דקות
+        )
 
     def health_check(self) -> bool:
         """בדיקת תקינות מהירה מאוד"""
@@ -45,59 +55,74 @@ class QdrantService:
             logger.error(f"Qdrant health failed: {e}")
             return False
 
+    # ===== עזרי חיפוש משותפים (סינכרוני/אסינכרוני) =====
+    @classmethod
+    def _canonical_filter(cls, value):
+        """פילטר בצורה קנונית: מפתחות ממוינים, ורשימות תנאים (must/should/...) בסדר קבוע"""
+        if isinstance(value, dict):
+            return {k: cls._canonical_filter(v) for k, v in sorted(value.items())}
+        if isinstance(value, (list, tuple)):
+            items = [cls._canonical_filter(v) for v in value]
+            return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False))
+        return value
+
+    def _search_cache_key(self, vector: List[float], limit: int, filter_: dict = None) -> str:
+        # digest של כל הוקטור (float32) – לא רק של 10 האיברים הראשונים
+        digest = hashlib.sha1(array("f", vector).tobytes()).hexdigest()
+        flt = json.dumps(self._canonical_filter(filter_), sort_keys=True, ensure_ascii=False) if filter_ else ""
+        return f"{digest}:{limit}:{flt}"
+
+    def _cache_get(self, cache_key: str):
+        cached = self.search_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Qdrant search cache hit")
+            return list(cached)
+        return None
+
+    def _cache_put(self, cache_key: str, texts: List[str]):
+        self.search_cache.set(cache_key, list(texts))
+
+    def cache_stats(self) -> dict:
+        return self.search_cache.stats()
+
+    def _search_payload(self, vector: List[float], limit: int, filter_: dict = None) -> dict:
+        payload = {
+            "vector": vector,
+            "limit": limit,
+            "with_payload": True,
+            "with_vector": False  # לא צריך את הוקטור בחזרה - חוסך רוחב פס
+        }
+        if filter_:
+            payload["filter"] = filter_
+        return payload
+
+    @staticmethod
+    def _extract_texts(points: List[dict]) -> List[str]:
+        texts = []
+        for point in points:
+            text = (point.get("payload") or {}).get("text")
+            if text:
+                texts.append(text)
+        return texts
+
     def search(self, vector: List[float], limit: int = 3,filter_: dict = None) -> List[str]:
         """חיפוש מהיר עם מטמון"""
         try:
-            # יצירת מפתח מטמון
-            vector_hash = hash(tuple(vector[:10]))  # רק 10 איברים ראשונים למהירות
-            cache_key = f"{vector_hash}_{limit}"
-            current_time = time.time()
-            
-            # בדיקת מטמון
-            if cache_key in self.search_cache:
-                cached = self.search_cache[cache_key]
-                if current_time - cached["timestamp"] < self.cache_ttl:
-                    logger.debug("Qdrant search cache hit")
-                    return cached["results"]
-            
+            cache_key = self._search_cache_key(vector, limit, filter_)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
             # חיפוש ב-Qdrant
             url = f"{self.base_url}/collections/{self.collection}/points/search"
-            payload = {
-                "vector": vector,
-                "limit": limit,
-                "with_payload": True,
-                "with_vector": False  # לא צריך את הוקטור בחזרה - חוסך רוחב פס
-            }
-            
-            if filter_:
-                payload["filter"] = filter_
             start_time = time.time()
-            response = self.session.post(url, json=payload, timeout=self.timeout)
+            response = self.session.post(url, json=self._search_payload(vector, limit, filter_), timeout=self.timeout)
             duration = time.time() - start_time
-            
+
             response.raise_for_status()
-            data = response.json().get("result", [])
-            
-            # חילוץ טקסטים
-            texts = []
-            for point in data:
-                payload_data = point.get("payload", {})
-                text = payload_data.get("text")
-                if text:
-                    texts.append(text)
-            
-            # שמירה במטמון
-            self.search_cache[cache_key] = {
-                "results": texts,
-                "timestamp": current_time
-            }
-            
-            # ניקוי מטמון אם גדול מדי
-            if len(self.search_cache) > self.max_cache_size:
-                oldest_key = min(self.search_cache.keys(), 
-                               key=lambda k: self.search_cache[k]["timestamp"])
-                del self.search_cache[oldest_key]
-            
+            texts = self._extract_texts(response.json().get("result", []))
+            self._cache_put(cache_key, texts)
+
             logger.debug(f"Qdrant search completed in {duration:.2f}s, found {len(texts)} results")
             return texts
             
@@ -108,6 +133,47 @@ class QdrantService:
             logger.error(f"Qdrant search error: {e}")
             return []
 
+    async def search_async(self, vector: List[float], limit: int = 3, filter_: dict = None) -> List[str]:
+        """אותו חיפוש (ואותו מטמון) דרך ה-client האסינכרוני המשותף"""
+        if not HAS_HTTPX:
+            return await run_in_threadpool(self.search, vector, limit, filter_)
+        try:
+            cache_key = self._search_cache_key(vector, limit, filter_)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+
+            url = f"{self.base_url}/collections/{self.collection}/points/search"
+            start_time = time.time()
+            response = await get_async_client().post(
+                url, json=self._search_payload(vector, limit, filter_), timeout=call_timeout(self.timeout)
+            )
+            duration = time.time() - start_time
+
+            response.raise_for_status()
+            texts = self._extract_texts(response.json().get("result", []))
+            self._cache_put(cache_key, texts)
+
+            logger.debug(f"Qdrant async search completed in {duration:.2f}s, found {len(texts)} results")
+            return texts
+
+        except httpx.TimeoutException:
+            logger.warning("Qdrant search timeout")
+            return []
+        except Exception as e:
+            logger.error(f"Qdrant search error: {e}")
+            return []
+
+    async def health_check_async(self) -> bool:
+        if not HAS_HTTPX:
+            return await run_in_threadpool(self.health_check)
+        try:
+            response = await get_async_client().get(f"{self.base_url}/readyz", timeout=call_timeout(3))
+            return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Qdrant health failed: {e}")
+            return False
+
     def search_with_filter(self, vector: List[float], filter_condition: dict, limit: int = 3) -> List[str]:
         """חיפוש עם פילטר - לעתיד"""
         try:
@@ -0,0 +1,129 @@
+# backend/services/semantic_cache.py
+"""
+מטמון תשובות סמנטי לעוזר ה-AI
+שאלה חדשה שה-embedding שלה קרוב (cosine >= סף) לשאלה שכבר נענתה באותו scope
+(סוג משתמש + סוג שאלה) מקבלת את התשובה הקודמת – בלי RAG ובלי LLM.
+וקטורים מנורמלים במטריצת float32 לכל scope: חיפוש = מכפלה אחת.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class _Scope:
+    __slots__ = ("vectors", "items")
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.items: List[Tuple[Dict, str, float]] = []  # (result, question, created_at)
+
+
+class SemanticCache:
+    """lookup/store לפי scope, עם סף דמיון, מגבלת גודל לכל scope ו-TTL"""
+
+    def __init__(self, threshold: Optional[float] = None, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.enabled = os.getenv("SEMANTIC_CACHE", "1").lower() not in ("0", "false", "no", "off")
+        self.threshold = threshold if threshold is not None else float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self.max_entries = max_entries or int(os.getenv("SEMANTIC_CACHE_SIZE", "500"))  # לכל scope
+        self.ttl = ttl if ttl is not None else float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self._lock = threading.Lock()
+        self._scopes: Dict[str, _Scope] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.similarity_total = 0.0
+        self.near_misses = 0  # הכי קרוב היה בטווח 0.05 מתחת לסף – לכיול הסף
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def lookup(self, scope: str, embedding: List[float]) -> Optional[Tuple[Dict, float, str]]:
+        """(result, similarity, השאלה המקורית) אם יש שאלה קרובה מספיק, אחרת None"""
+        if not self.enabled or not embedding:
+            return None
+        vec = self._normalize(embedding)
+        if vec is None:
+            return None
+        with self._lock:
+            self.lookups += 1
+            bucket = self._scopes.get(scope)
+            if bucket is None or not bucket.items or bucket.vectors.shape[1] != vec.shape[0]:
+                return None
+            self._expire(bucket)
+            if not bucket.items:
+                return None
+            sims = bucket.vectors @ vec
+            best = int(np.argmax(sims))
+            similarity = float(sims[best])
+            if similarity < self.threshold:
+                if similarity >= self.threshold - 0.05:
+                    self.near_misses += 1
+                return None
+            self.hits += 1
+            self.similarity_total += similarity
+            result, question, _ = bucket.items[best]
+            return dict(result), similarity, question
+
+    def store(self, scope: str, embedding: List[float], question: str, result: Dict):
+        if not self.enabled or not embedding:
+            return
+        vec = self._normalize(embedding)
+        if vec is None:
+            return
+        with self._lock:
+            bucket = self._scopes.get(scope)
+            if bucket is None or bucket.vectors.shape[1] != vec.shape[0]:
+                # scope חדש, או מודל embedding אחר (ממד שונה) – מתחילים מחדש
+                bucket = self._scopes[scope] = _Scope(vec.shape[0])
+            self._expire(bucket)
+            bucket.vectors = np.vstack([bucket.vectors, vec[None, :]])
+            bucket.items.append((dict(result), question, time.time()))
+            if len(bucket.items) > self.max_entries:
+                drop = len(bucket.items) - self.max_entries
+                bucket.vectors = bucket.vectors[drop:]
+                bucket.items = bucket.items[drop:]
+            self.stores += 1
+
+    def _expire(self, bucket: _Scope):
+        """הפריטים נשמרים לפי סדר הכנסה – פג תוקף = קידומת של הרשימה"""
+        if not self.ttl or not bucket.items:
+            return
+        cutoff = time.time() - self.ttl
+        drop = 0
+        while drop < len(bucket.items) and bucket.items[drop][2] < cutoff:
+            drop += 1
+        if drop:
+            bucket.vectors = bucket.vectors[drop:]
+            bucket.items = bucket.items[drop:]
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 3) if self.lookups else 0.0,
+                "avg_hit_similarity": round(self.similarity_total / self.hits, 4) if self.hits else None,
+                "near_misses": self.near_misses,
+                "stores": self.stores,
+                "entries": {scope: len(b.items) for scope, b in self._scopes.items()},
+            }
+
+
+semantic_cache = SemanticCache()
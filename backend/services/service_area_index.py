@@ -0,0 +1,235 @@
+# backend/services/service_area_index.py
+"""
+אינדקס אזורי שירות בזיכרון התהליך
+city → district, ו-bitset של ספקים לכל עיר ולכל מחוז (int של פייתון).
+ביט = מיקום דחוס של הספק לפי (company_name, id), לא ה-id עצמו: אורך ה-bitset הוא מספר הספקים,
+ופענוח לפי סדר הביטים מחזיר ספקים כבר ממוינים לפי שם.
+נטען בעליית השרת ומסומן כלא-תקף בכל כתיבה לאזורי שירות/משתמשים
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def _bits(ids: Iterable[int], pos: Dict[int, int]) -> int:
+    """supplier ids → bitset על המיקומים הדחוסים (id שאינו ספק מתעלמים ממנו)"""
+    out = 0
+    for i in ids:
+        p = pos.get(i)
+        if p is not None:
+            out |= 1 << p
+    return out
+
+
+def _ids(bitset: int, pos_ids: List[int]) -> List[int]:
+    """bitset → supplier ids, מהביט הנמוך לגבוה (כלומר לפי סדר השמות)"""
+    out = []
+    while bitset:
+        low = bitset & -bitset
+        out.append(pos_ids[low.bit_length() - 1])
+        bitset ^= low
+    return out
+
+
+class ServiceAreaIndex:
+    """
+    שאלות כיסוי ("אילו ספקים משרתים עיר X", "כמה בעלי חנויות ספק Y מגיע אליהם")
+    נענות מהזיכרון במקום JOIN על supplier_cities/supplier_districts/cities.
+    ttl – רשת ביטחון כשכמה תהליכים כותבים (invalidate מקומי לא מגיע אליהם).
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl = ttl_seconds if ttl_seconds is not None else int(os.getenv("SERVICE_AREA_INDEX_TTL", "600"))
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()  # טעינה אחת בכל רגע; לא חוסם קוראים
+        self._loaded_at = 0.0
+        self._valid = False
+
+        self.city_district: Dict[int, int] = {}
+        self.city_names: Dict[int, str] = {}
+        self.district_names: Dict[int, str] = {}
+        self.district_cities: Dict[int, List[int]] = {}
+        self.city_suppliers: Dict[int, int] = {}      # city_id → bitset
+        self.district_suppliers: Dict[int, int] = {}  # district_id → bitset
+        self.supplier_cities: Dict[int, Set[int]] = {}
+        self.supplier_districts: Dict[int, Set[int]] = {}
+        self.all_suppliers = 0
+        self.unscoped_suppliers = 0  # ספקים בלי אזור שירות מוגדר
+        self.supplier_names: Dict[int, str] = {}
+        self._pos: Dict[int, int] = {}   # supplier_id → מיקום ביט
+        self._pos_ids: List[int] = []    # מיקום ביט → supplier_id
+        self.owners_per_city: Counter = Counter()
+
+    # ---------- טעינה / ביטול ----------
+    def load(self, db_factory) -> bool:
+        db = db_factory()
+        try:
+            self._load(db)
+            return True
+        except Exception as e:
+            logger.error(f"Service area index load failed: {e}")
+            return False
+        finally:
+            db.close()
+
+    def _load(self, db):
+        start = time.time()
+        cities = db.execute(text("SELECT id, district_id, name_he FROM cities")).fetchall()
+        districts = db.execute(text("SELECT id, name_he FROM districts")).fetchall()
+        sc = db.execute(text("SELECT supplier_id, city_id FROM supplier_cities")).fetchall()
+        sd = db.execute(text("SELECT supplier_id, district_id FROM supplier_districts")).fetchall()
+        users = db.execute(text("SELECT id, userType, city_id, company_name FROM users")).fetchall()
+
+        city_district = {r.id: r.district_id for r in cities}
+        district_cities: Dict[int, List[int]] = {}
+        for r in cities:
+            district_cities.setdefault(r.district_id, []).append(r.id)
+
+        supplier_cities: Dict[int, Set[int]] = {}
+        city_sets: Dict[int, Set[int]] = {}
+        for r in sc:
+            supplier_cities.setdefault(r.supplier_id, set()).add(r.city_id)
+            city_sets.setdefault(r.city_id, set()).add(r.supplier_id)
+        supplier_districts: Dict[int, Set[int]] = {}
+        district_sets: Dict[int, Set[int]] = {}
+        for r in sd:
+            supplier_districts.setdefault(r.supplier_id, set()).add(r.district_id)
+            district_sets.setdefault(r.district_id, set()).add(r.supplier_id)
+
+        suppliers = sorted(
+            (r for r in users if r.userType == "Supplier"),
+            key=lambda r: (r.company_name or "", r.id)
+        )
+        pos_ids = [r.id for r in suppliers]
+        pos = {sid: i for i, sid in enumerate(pos_ids)}
+        owners_per_city = Counter(r.city_id for r in users if r.userType == "StoreOwner" and r.city_id)
+        all_suppliers = (1 << len(pos_ids)) - 1
+        unscoped = _bits(
+            (sid for sid in pos_ids
+             if sid not in supplier_cities and sid not in supplier_districts),
+            pos
+        )
+
+        with self._lock:
+            self.city_district = city_district
+            self.city_names = {r.id: r.name_he for r in cities}
+            self.district_names = {r.id: r.name_he for r in districts}
+            self.district_cities = district_cities
+            self.city_suppliers = {cid: _bits(s, pos) for cid, s in city_sets.items()}
+            self.district_suppliers = {did: _bits(s, pos) for did, s in district_sets.items()}
+            self.supplier_cities = supplier_cities
+            self.supplier_districts = supplier_districts
+            self.all_suppliers = all_suppliers
+            self.unscoped_suppliers = unscoped
+            self.supplier_names = {r.id: r.company_name or "" for r in suppliers}
+            self._pos = pos
+            self._pos_ids = pos_ids
+            self.owners_per_city = owners_per_city
+            self._loaded_at = time.time()
+            self._valid = True
+        logger.info(f"Service area index loaded in {time.time() - start:.2f}s "
+                    f"({len(cities)} cities, {len(suppliers)} suppliers)")
+
+    def invalidate(self):
+        """לקרוא אחרי commit של כתיבה ל-users/supplier_cities/supplier_districts"""
+        with self._lock:
+            self._valid = False
+
+    def _fresh(self) -> bool:
+        with self._lock:
+            return self._valid and time.time() - self._loaded_at < self.ttl
+
+    def ensure_loaded(self, db):
+        """
+        טעינה עצלה מתוך ה-Session של הבקשה אם האינדקס לא תקף/פג תוקף.
+        הטעינה רצה מחוץ ל-_lock (רק _load_lock – thread אחד טוען); שאר ה-threads
+        ממשיכים לענות מהאינדקס הישן, ו-_load מחליף אותו בסוף בבת אחת.
+        רק בטעינה הראשונה (אין עדיין אינדקס) ממתינים לה.
+        """
+        if self._fresh():
+            return self
+        with self._lock:
+            has_data = self._loaded_at > 0
+        if not self._load_lock.acquire(blocking=not has_data):
+            return self  # thread אחר כבר טוען – עונים מהאינדקס הקיים
+        try:
+            if not self._fresh():
+                self._load(db)
+        finally:
+            self._load_lock.release()
+        return self
+
+    # ---------- שאלות כיסוי ----------
+    def district_of(self, city_id: Optional[int]) -> Optional[int]:
+        return self.city_district.get(city_id) if city_id else None
+
+    def suppliers_for_city(self, city_id: Optional[int]) -> int:
+        """bitset של ספקים שמשרתים את העיר (ישירות או דרך המחוז שלה)"""
+        if not city_id:
+            return 0
+        return self.city_suppliers.get(city_id, 0) | self.district_suppliers.get(self.district_of(city_id), 0)
+
+    def ranked_suppliers(self, city_id: Optional[int], exclude: Iterable[int] = ()) -> List[Tuple[int, int]]:
+        """
+        [(supplier_id, score)] מדורג: 2 = עיר, 1 = מחוז, 0 = בלי אזור מוגדר
+        (או בעל חנות בלי עיר – כל הספקים). בתוך אותו ציון – לפי שם חברה,
+        שנובע ישירות מסדר המיקומים ב-bitset (בלי מיון בכל בקשה).
+        """
+        with self._lock:
+            if not city_id:
+                tiers = [(0, self.all_suppliers)]
+            else:
+                by_city = self.city_suppliers.get(city_id, 0)
+                by_district = self.district_suppliers.get(self.district_of(city_id), 0) & ~by_city
+                rest = self.unscoped_suppliers & ~by_city & ~by_district
+                tiers = [(2, by_city), (1, by_district), (0, rest)]
+            excluded = _bits(exclude, self._pos)
+            out: List[Tuple[int, int]] = []
+            for score, bitset in tiers:
+                out.extend((sid, score) for sid in _ids(bitset & ~excluded, self._pos_ids))
+            return out
+
+    def cities_served(self, supplier_id: int) -> Set[int]:
+        """כל הערים שהספק מגיע אליהן – ישירות או דרך מחוז"""
+        with self._lock:
+            cities = set(self.supplier_cities.get(supplier_id, ()))
+            for did in self.supplier_districts.get(supplier_id, ()):
+                cities.update(self.district_cities.get(did, ()))
+            return cities
+
+    def owners_reachable(self, supplier_id: int) -> int:
+        """כמה בעלי חנויות נמצאים בערים שהספק משרת"""
+        cities = self.cities_served(supplier_id)
+        with self._lock:
+            return sum(self.owners_per_city.get(cid, 0) for cid in cities)
+
+    def tree(self) -> List[Dict]:
+        """מחוזות עם ערים (לבורר אזורי השירות), כולל מספר ספקים לכל עיר"""
+        with self._lock:
+            out = []
+            for did in sorted(self.district_cities, key=lambda d: self.district_names.get(d, "")):
+                cities = sorted(self.district_cities[did], key=lambda c: self.city_names.get(c, ""))
+                out.append({
+                    "district_id": did,
+                    "district_name": self.district_names.get(did, ""),
+                    "cities": [
+                        {
+                            "city_id": cid,
+                            "city_name": self.city_names.get(cid, ""),
+                            "suppliers_count": bin(self.suppliers_for_city(cid)).count("1"),
+                        }
+                        for cid in cities
+                    ],
+                })
+            return out
+
+
+service_area_index = ServiceAreaIndex()
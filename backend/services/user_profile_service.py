@@ -0,0 +1,147 @@
+# backend/services/user_profile_service.py
+"""
+פרופיל משתמש + מונים (מטבלת user_stats) במקום אחד, מאחורי מטמון משותף
+שלושת הצרכנים (gateway הצ'אט, ChatService, DynamicRAGService) קוראים מכאן –
+במצב יציב הודעת צ'אט לא פונה ל-DB בכלל.
+נתיבי הכתיבה (הזמנות/מוצרים/חיבורים) קוראים ל-invalidate אחרי commit.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .cache_layer import cache_registry
+from .user_stats_service import STATS_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_SQL = text(f"""
+    SELECT u.id, u.username, u.company_name, u.contact_name, u.phone, u.userType,
+           u.city_id, u.street, u.house_number, u.opening_time, u.closing_time,
+           {", ".join(f"s.{c}" for c in STATS_COLUMNS)}
+    FROM users u
+    LEFT JOIN user_stats s ON s.user_id = u.id
+    WHERE u.id = :user_id
+""")
+
+
+class UserProfileProvider:
+    """
+    get(db, user_id) – מהמטמון, ובפספוס שאילתה אחת (משתמש + user_stats) ועוד אחת לדוגמאות אם יש.
+    invalidate(*user_ids) – אחרי כתיבה; מודיע גם למאזינים (מטמונים נגזרים כמו הקשר ה-RAG).
+    """
+
+    def __init__(self, max_size: int = 500, ttl: float = 600, local_ttl: float = 5):
+        # invalidate מוחק מה-L1 המקומי ומה-L2 המשותף; ה-L1 של workers אחרים מחזיק רק local_ttl
+        # שניות ואז קורא שוב מה-L2, כך שביטול מגיע לכולם תוך שניות.
+        # בלי L2 (CACHE_BACKEND=memory) ה-L1 הוא המטמון היחיד – מתאים ל-worker יחיד בלבד.
+        self.cache = cache_registry.namespace("user.profile", max_size=max_size, ttl=ttl,
+                                              local_ttl=local_ttl)
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"profile_{user_id}"
+
+    def cached(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """הפרופיל אם הוא במטמון, בלי לגעת ב-DB (נוח מתוך ה-event loop)"""
+        return self.cache.get(self._key(user_id))
+
+    def get(self, db: Session, user_id: int) -> Optional[Dict[str, Any]]:
+        """הפרופיל המלא; None אם המשתמש לא קיים"""
+        profile = self.cached(user_id)
+        if profile is not None:
+            return profile or None  # {} = משתמש שלא קיים (נשמר כדי לא לחזור ל-DB)
+
+        row = db.execute(_PROFILE_SQL, {"user_id": user_id}).fetchone()
+        profile = self._build(db, row) if row else {}
+        self.cache.set(self._key(user_id), profile)
+        return profile or None
+
+    def _build(self, db: Session, row) -> Dict[str, Any]:
+        # משתמש בלי שורת מונים (LEFT JOIN מחזיר NULL) – אפסים
+        stats = {c: getattr(row, c) or 0 for c in STATS_COLUMNS}
+        profile: Dict[str, Any] = {
+            "id": row.id,
+            "username": row.username,
+            "company_name": row.company_name,
+            "contact_name": row.contact_name,
+            "phone": row.phone,
+            "userType": row.userType,
+            "city_id": row.city_id,
+            "street": row.street,
+            "house_number": row.house_number,
+            "opening_time": str(row.opening_time) if row.opening_time else None,
+            "closing_time": str(row.closing_time) if row.closing_time else None,
+            "total_orders": stats.get("total_orders", 0),
+            "active_orders": stats.get("in_progress_orders", 0) + stats.get("done_orders", 0),  # בתהליך + בוצעה
+            "in_progress_orders": stats.get("in_progress_orders", 0),
+            "done_orders": stats.get("done_orders", 0),
+            "completed_orders": stats.get("completed_orders", 0),
+        }
+
+        if row.userType == "Supplier":
+            profile.update({
+                "products_count": stats.get("products_count", 0),
+                "out_of_stock_products": stats.get("out_of_stock_products", 0),
+                "connected_owners": stats.get("connected_links", 0),
+                "top_products": [],
+            })
+            if profile["products_count"]:
+                products = db.execute(text("""
+                    SELECT TOP 2 p.product_name, p.unit_price
+                    FROM products p
+                    WHERE p.supplier_id = :user_id AND p.is_active = 1
+                    ORDER BY p.id DESC
+                """), {"user_id": row.id}).fetchall()
+                profile["top_products"] = [
+                    {"name": p.product_name, "price": float(p.unit_price)} for p in products
+                ]
+
+        elif row.userType == "StoreOwner":
+            profile.update({
+                "connected_suppliers": stats.get("connected_links", 0),
+                "recent_orders": [],
+            })
+            if profile["total_orders"]:
+                orders = db.execute(text("""
+                    SELECT TOP 2 o.id, u.company_name, o.status
+                    FROM orders o
+                    JOIN users u ON o.supplier_id = u.id
+                    WHERE o.owner_id = :user_id
+                    ORDER BY o.created_date DESC
+                """), {"user_id": row.id}).fetchall()
+                profile["recent_orders"] = [
+                    {"id": o.id, "supplier": o.company_name, "status": o.status} for o in orders
+                ]
+
+        return profile
+
+    def add_listener(self, callback: Callable[[int], None]):
+        """callback(user_id) נקרא בכל invalidate – לניקוי מטמונים שנבנו מהפרופיל"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def invalidate(self, *user_ids: int):
+        with self._lock:
+            listeners = list(self._listeners)
+        for user_id in set(uid for uid in user_ids if uid):
+            self.cache.delete(self._key(user_id))
+            for callback in listeners:
+                try:
+                    callback(user_id)
+                except Exception as e:
+                    logger.warning(f"user profile listener failed for {user_id}: {e}")
+
+    def clear(self):
+        self.cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+user_profiles = UserProfileProvider()
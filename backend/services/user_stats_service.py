@@ -0,0 +1,182 @@
+# backend/services/user_stats_service.py
+"""
+מוני לוח הבקרה לכל משתמש (טבלת user_stats)
+במקום COUNT(DISTINCT ...) בכל קריאה: נתיבי הכתיבה (הזמנות/מוצרים/חיבורים) קוראים ל-
+refresh_user_stats באותה טרנזקציה, לפני commit – המונים מתעדכנים יחד עם הנתונים או לא בכלל.
+השורה של משתמש חדש נוצרת בהרשמה (register_user); נתיב הקריאה לא כותב ולא נועל.
+נעילת המשתמשים (lock_user_stats) נלקחת לפני כתיבת הנתונים עצמם.
+rebuild_user_stats – חישוב מחדש של כל הטבלה (מיגרציה / תיקון סטייה).
+"""
+
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+STATS_COLUMNS = (
+    "products_count", "out_of_stock_products",
+    "total_orders", "in_progress_orders", "done_orders", "completed_orders",
+    "connected_links", "pending_links",
+)
+
+# חישוב מהמקור; {users}/{products}/{orders}/{links} – סינון למשתמשים מסוימים (או כלום לבנייה מלאה)
+_SOURCE_SQL = """
+    SELECT u.id AS user_id,
+           COALESCE(p.products_count, 0)        AS products_count,
+           COALESCE(p.out_of_stock, 0)          AS out_of_stock_products,
+           COALESCE(o.total_orders, 0)          AS total_orders,
+           COALESCE(o.in_progress_orders, 0)    AS in_progress_orders,
+           COALESCE(o.done_orders, 0)           AS done_orders,
+           COALESCE(o.completed_orders, 0)      AS completed_orders,
+           COALESCE(l.connected_links, 0)       AS connected_links,
+           COALESCE(l.pending_links, 0)         AS pending_links
+    FROM users u
+    LEFT JOIN (
+        SELECT supplier_id,
+               COUNT(*) AS products_count,
+               COUNT(CASE WHEN stock = 0 THEN 1 END) AS out_of_stock
+        FROM products
+        WHERE is_active = 1 {products}
+        GROUP BY supplier_id
+    ) p ON p.supplier_id = u.id
+    LEFT JOIN (
+        SELECT x.user_id,
+               COUNT(*) AS total_orders,
+               COUNT(CASE WHEN x.status = N'בתהליך' THEN 1 END) AS in_progress_orders,
+               COUNT(CASE WHEN x.status = N'בוצעה' THEN 1 END) AS done_orders,
+               COUNT(CASE WHEN x.status = N'הושלמה' THEN 1 END) AS completed_orders
+        FROM (
+            SELECT owner_id AS user_id, status FROM orders WHERE 1 = 1 {orders_owner}
+            UNION ALL
+            SELECT supplier_id AS user_id, status FROM orders WHERE 1 = 1 {orders_supplier}
+        ) x
+        GROUP BY x.user_id
+    ) o ON o.user_id = u.id
+    LEFT JOIN (
+        SELECT x.user_id,
+               COUNT(CASE WHEN x.status = 'APPROVED' THEN 1 END) AS connected_links,
+               COUNT(CASE WHEN x.status = 'PENDING' THEN 1 END) AS pending_links
+        FROM (
+            SELECT owner_id AS user_id, status FROM owner_supplier_links WHERE 1 = 1 {links_owner}
+            UNION ALL
+            SELECT supplier_id AS user_id, status FROM owner_supplier_links WHERE 1 = 1 {links_supplier}
+        ) x
+        GROUP BY x.user_id
+    ) l ON l.user_id = u.id
+    WHERE 1 = 1 {users}
+"""
+
+_MERGE_SQL = """
+    MERGE user_stats WITH (HOLDLOCK) AS t
+    USING ({source}) AS s
+    ON t.user_id = s.user_id
+    WHEN MATCHED THEN UPDATE SET
+        {updates},
+        t.updated_at = SYSUTCDATETIME()
+    WHEN NOT MATCHED THEN
+        INSERT (user_id, {columns}, updated_at)
+        VALUES (s.user_id, {values}, SYSUTCDATETIME());
+"""
+
+
+def _merge_statement(filtered: bool):
+    cond = "AND {col} IN :user_ids" if filtered else ""
+    source = _SOURCE_SQL.format(
+        products=cond.format(col="supplier_id"),
+        orders_owner=cond.format(col="owner_id"),
+        orders_supplier=cond.format(col="supplier_id"),
+        links_owner=cond.format(col="owner_id"),
+        links_supplier=cond.format(col="supplier_id"),
+        users=cond.format(col="u.id"),
+    )
+    stmt = text(_MERGE_SQL.format(
+        source=source,
+        updates=",\n        ".join(f"t.{c} = s.{c}" for c in STATS_COLUMNS),
+        columns=", ".join(STATS_COLUMNS),
+        values=", ".join(f"s.{c}" for c in STATS_COLUMNS),
+    ))
+    return stmt.bindparams(bindparam("user_ids", expanding=True)) if filtered else stmt
+
+
+_REFRESH_STMT = _merge_statement(filtered=True)
+_REBUILD_STMT = _merge_statement(filtered=False)
+
+# נעילה לוגית לכל משתמש (sp_getapplock, עד סוף הטרנזקציה) – נלקחת *לפני* שהטרנזקציה
+# כותבת שורות הזמנה/מוצר/לינק. כותב מקביל לאותו משתמש ממתין עוד לפני שיש לו שורה
+# לא-מאושרת, כך שה-MERGE לא ממתין לשורות של כותב שממתין לנו (אין deadlock),
+# והאחרון שמבצע commit מחשב מ-snapshot שכבר כולל את השינוי הקודם.
+# סדר הנעילה לפי user_id עולה – שני כותבים לא ננעלים בסדר הפוך.
+_APPLOCK_STMT = text("""
+    SET NOCOUNT ON;
+    DECLARE @r INT;
+    EXEC @r = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive',
+                            @LockOwner = 'Transaction', @LockTimeout = :timeout_ms;
+    SELECT @r;
+""")
+
+LOCK_TIMEOUT_MS = 10000
+
+# LEFT JOIN: משתמש קיים בלי שורת מונים מקבל NULL-ים (= אפסים), משתמש שלא קיים – אין שורה
+_SELECT_STMT = text(f"""
+    SELECT u.id AS user_id, {", ".join(f"s.{c}" for c in STATS_COLUMNS)}, s.updated_at
+    FROM users u
+    LEFT JOIN user_stats s ON s.user_id = u.id
+    WHERE u.id = :user_id
+""")
+
+
+def _ids(user_ids: Iterable[Optional[int]]):
+    return sorted({int(uid) for uid in user_ids if uid})
+
+
+def lock_user_stats(db: Session, user_ids: Iterable[Optional[int]]):
+    """
+    נעילת המונים של המשתמשים עד סוף הטרנזקציה. נתיב כתיבה שמריץ UPDATE/INSERT ישיר
+    (לא דרך ה-ORM) קורא לזה לפני הכתיבה הראשונה; נעילה חוזרת באותה טרנזקציה מותרת.
+    """
+    # בלי autoflush: שינויי ORM שממתינים לא נשלחים לפני שיש נעילה
+    with db.no_autoflush:
+        for uid in _ids(user_ids):
+            r = db.execute(_APPLOCK_STMT, {
+                "resource": f"user_stats:{uid}", "timeout_ms": LOCK_TIMEOUT_MS,
+            }).scalar()
+            if r is None or r < 0:
+                raise TimeoutError(f"user_stats lock for user {uid} not acquired ({r})")
+
+
+def refresh_user_stats(db: Session, user_ids: Iterable[Optional[int]]):
+    """
+    חישוב מחדש של המונים למשתמשים שהושפעו מכתיבה – בתוך הטרנזקציה של הקורא
+    (הקורא מבצע commit; rollback מבטל גם את עדכון המונים).
+    לוקח את נעילת המשתמשים לפני ה-flush, כך ששינויי ORM נכתבים רק אחריה.
+    """
+    ids = _ids(user_ids)
+    if not ids:
+        return
+    lock_user_stats(db, ids)
+    db.flush()  # שינויי ORM שעוד לא נשלחו צריכים להיכלל בספירה
+    db.execute(_REFRESH_STMT, {"user_ids": ids})
+
+
+def rebuild_user_stats(db: Session) -> int:
+    """בנייה מחדש של כל הטבלה בפקודה אחת; מחזיר את מספר השורות"""
+    db.execute(_REBUILD_STMT)
+    db.commit()
+    return db.execute(text("SELECT COUNT(*) FROM user_stats")).scalar() or 0
+
+
+def _row_to_stats(row) -> Dict[str, Any]:
+    stats = {c: getattr(row, c) or 0 for c in STATS_COLUMNS}
+    stats["user_id"] = row.user_id
+    stats["active_orders"] = stats["in_progress_orders"] + stats["done_orders"]  # בתהליך + בוצעה
+    stats["updated_at"] = row.updated_at
+    return stats
+
+
+def get_user_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """
+    המונים של משתמש מהטבלה – קריאה בלבד (בלי נעילה ובלי commit).
+    משתמש בלי שורה מקבל אפסים; {} אם המשתמש לא קיים.
+    """
+    row = db.execute(_SELECT_STMT, {"user_id": user_id}).fetchone()
+    return _row_to_stats(row) if row else {}
@@ -0,0 +1,165 @@
+# backend/services/user_vector_index.py
+"""
+אינדקס וקטורי ההקשר האישי של המשתמשים (DynamicRAGService)
+מטריצת float32 רציפה אחת, שורה מנורמלת לכל משתמש:
+דמיון מול כל המשתמשים = מכפלת מטריצה-וקטור אחת על כל הממד, top-k ב-argpartition
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class UserVectorIndex:
+    """upsert/remove לפי user_id, similarity למשתמש אחד ו-top_k לשאילתה אחת או לאצווה"""
+
+    def __init__(self, max_users: int = 50, ttl: Optional[float] = 600):
+        self.max_users = max(1, int(max_users))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim); שורות [0, _size) בשימוש
+        self._size = 0
+        self._user_ids: List[int] = []
+        self._texts: List[str] = []
+        self._created: List[float] = []
+        self._rows: Dict[int, int] = {}
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(embedding, dtype=np.float32)
+        if vec.ndim != 1:
+            return None
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    def upsert(self, user_id: int, embedding: Sequence[float], text: str) -> bool:
+        vec = self._normalize(embedding)
+        if vec is None:
+            return False
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                # אינדקס ריק או מודל embedding אחר (ממד שונה) – מתחילים מחדש
+                self._reset(vec.shape[0])
+            self._expire()
+            row = self._rows.get(user_id)
+            if row is None:
+                if self._size >= self.max_users:
+                    self._remove_row(int(np.argmin(self._created[:self._size])))
+                    self.evictions += 1
+                if self._size == self._matrix.shape[0]:
+                    grown = np.zeros((min(self.max_users, max(8, self._size * 2)), self._matrix.shape[1]),
+                                     dtype=np.float32)
+                    grown[:self._size] = self._matrix[:self._size]
+                    self._matrix = grown
+                row = self._size
+                self._size += 1
+                self._rows[user_id] = row
+                self._user_ids.append(user_id)
+                self._texts.append(text)
+                self._created.append(time.time())
+            else:
+                self._texts[row] = text
+                self._created[row] = time.time()
+            self._matrix[row] = vec
+            return True
+
+    def remove(self, user_id: int):
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is not None:
+                self._remove_row(row)
+
+    def similarity(self, user_id: int, query_embedding: Sequence[float]) -> Optional[Tuple[float, str]]:
+        """(cosine, טקסט) מול הווקטור של משתמש אחד; None אם אין לו וקטור בתוקף"""
+        query = self._normalize(query_embedding)
+        if query is None:
+            return None
+        with self._lock:
+            self._expire()
+            row = self._rows.get(user_id)
+            if row is None or self._matrix.shape[1] != query.shape[0]:
+                return None
+            return float(self._matrix[row] @ query), self._texts[row]
+
+    def top_k(self, query_embeddings, k: int = 5,
+              min_score: float = -1.0) -> List[List[Tuple[int, float, str]]]:
+        """
+        לכל שאילתה: עד k משתמשים (user_id, cosine, טקסט) מהדומה ביותר.
+        query_embeddings – וקטור אחד או מטריצה (n, dim); מחזיר תמיד רשימה לכל שאילתה.
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        with self._lock:
+            self._expire()
+            if not self._size or queries.shape[1] != self._matrix.shape[1]:
+                return [[] for _ in range(len(queries))]
+            scores = queries @ self._matrix[:self._size].T  # (n, users)
+            k = min(k, self._size)
+            if k < self._size:
+                candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                candidates = np.broadcast_to(np.arange(self._size), scores.shape)
+
+            results = []
+            for i, cols in enumerate(candidates):
+                ranked = cols[np.argsort(-scores[i, cols])]
+                results.append([
+                    (self._user_ids[c], float(scores[i, c]), self._texts[c])
+                    for c in ranked if scores[i, c] >= min_score
+                ])
+            return results
+
+    def _reset(self, dim: int):
+        self._matrix = np.zeros((min(self.max_users, 8), dim), dtype=np.float32)
+        self._size = 0
+        self._user_ids, self._texts, self._created = [], [], []
+        self._rows = {}
+
+    def _remove_row(self, row: int):
+        """מחיקה ב-O(dim): השורה האחרונה עוברת למקום שהתפנה"""
+        last = self._size - 1
+        del self._rows[self._user_ids[row]]
+        if row != last:
+            self._matrix[row] = self._matrix[last]
+            self._user_ids[row] = self._user_ids[last]
+            self._texts[row] = self._texts[last]
+            self._created[row] = self._created[last]
+            self._rows[self._user_ids[row]] = row
+        self._user_ids.pop()
+        self._texts.pop()
+        self._created.pop()
+        self._size = last
+
+    def _expire(self):
+        if not self.ttl or not self._size:
+            return
+        cutoff = time.time() - self.ttl
+        for row in range(self._size - 1, -1, -1):
+            if self._created[row] < cutoff:
+                self._remove_row(row)
+
+    def clear(self):
+        with self._lock:
+            if self._matrix is not None:
+                self._reset(self._matrix.shape[1])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "users": self._size,
+                "max_users": self.max_users,
+                "dim": int(self._matrix.shape[1]) if self._matrix is not None else None,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,51 @@
+# frontend/services/chat_stream.py
+"""
+Streaming AI chat answers (NDJSON from /gateway/chat/message/stream)
+Tokens are handed to the caller as they arrive, so the chat bubble fills in
+while the model is still generating instead of after the whole answer
+"""
+
+import json
+from typing import Callable, Dict, Optional
+
+import requests
+
+
+class StreamNotSupported(Exception):
+    """השרת לא מכיר את נקודת ההזרמה (גרסה ישנה) – לחזור ל-/message"""
+
+
+def stream_chat_message(api_url: str, payload: Dict, timeout: int,
+                        on_token: Callable[[str], None],
+                        should_stop: Optional[Callable[[], bool]] = None) -> Dict:
+    """
+    שולח הודעה לנקודת ההזרמה, קורא ל-on_token לכל קטע טקסט,
+    ומחזיר את אירוע ה-done (אותם שדות כמו ChatResponse + first_token_time)
+    """
+    with requests.post(
+        f"{api_url.rstrip('/')}/api/v1/gateway/chat/message/stream",
+        json=payload,
+        headers={'Accept': 'application/x-ndjson'},
+        stream=True,
+        # connect קצר; read timeout בין שורות ולא לכל התשובה
+        timeout=(5, timeout)
+    ) as response:
+        if response.status_code in (404, 405):
+            raise StreamNotSupported()
+        response.raise_for_status()
+
+        for line in response.iter_lines(decode_unicode=True):
+            if should_stop and should_stop():
+                break
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("type") == "token":
+                on_token(event.get("text", ""))
+            elif event.get("type") == "done":
+                return event
+
+    return {"success": False, "message": "החיבור נסגר לפני סוף התשובה"}
@@ -0,0 +1,127 @@
+# frontend/services/events_service.py
+"""
+Push events from the server (SSE) for the desktop client
+New orders, order status changes and link approvals arrive as they happen,
+so the views patch their lists in place instead of reloading everything
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+import requests
+from PySide6.QtCore import QThread, Signal
+
+
+class EventsStreamThread(QThread):
+    """Thread שמאזין ל-/gateway/events/stream ומתחבר מחדש אוטומטית"""
+    event_received = Signal(dict)
+    connection_changed = Signal(bool)
+
+    def __init__(self, user_id: int, base_url: Optional[str] = None):
+        super().__init__()
+        self.base_url = (base_url or os.getenv("API_BASE_URL", "http://localhost:8000")).rstrip("/")
+        self.user_id = user_id
+        self._stopped = False
+        self._response = None
+        self._retry_ms = 3000
+
+    def run(self):
+        delay_ms = 1000
+        while not self._stopped:
+            try:
+                self._listen()
+                delay_ms = 1000
+            except Exception:
+                if self._stopped:
+                    break
+            self.connection_changed.emit(False)
+            # המתנה לפני התחברות מחדש (עולה עד 30 שניות)
+            waited = 0
+            while not self._stopped and waited < delay_ms:
+                self.msleep(200)
+                waited += 200
+            delay_ms = min(max(delay_ms * 2, self._retry_ms), 30000)
+
+    def _listen(self):
+        # read timeout גדול מה-heartbeat של השרת (15 שניות)
+        with requests.get(
+            f"{self.base_url}/api/v1/gateway/events/stream",
+            params={"user_id": self.user_id},
+            stream=True,
+            timeout=(5, 45)
+        ) as response:
+            response.raise_for_status()
+            self._response = response
+            self.connection_changed.emit(True)
+
+            data_lines = []
+            for line in response.iter_lines(decode_unicode=True):
+                if self._stopped:
+                    break
+                if line is None:
+                    continue
+                if line == "":
+                    # סוף אירוע
+                    if data_lines:
+                        self._emit("\n".join(data_lines))
+                        data_lines = []
+                    continue
+                if line.startswith(":"):
+                    continue  # heartbeat
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "data":
+                    data_lines.append(value)
+                elif field == "retry" and value.isdigit():
+                    self._retry_ms = int(value)
+        self._response = None
+
+    def _emit(self, raw: str):
+        try:
+            event = json.loads(raw)
+        except ValueError:
+            return
+        if isinstance(event, dict):
+            self.event_received.emit(event)
+
+    def stop(self):
+        """עצירה – סוגר את החיבור הפתוח כדי לשחרר את הקריאה החוסמת"""
+        self._stopped = True
+        response = self._response
+        if response is not None:
+            try:
+                response.close()
+            except Exception:
+                pass
+        self.wait(3000)
+
+
+def apply_link_event(active: list, pending: list, event: Dict, counterpart_key: str) -> tuple[list, list]:
+    """
+    עדכון רשימות חיבורים (active/pending) לפי אירוע link_status.
+    counterpart_key: "owner" בצד הספק, "supplier" בצד בעל החנות.
+    מחזיר רשימות חדשות; כל פריט בפורמט LinkOut ({"owner": {...}, ...}).
+    """
+    other = event.get(counterpart_key) or {}
+    other_id = other.get("id")
+    if other_id is None:
+        return active, pending
+
+    def _same(link):
+        return (link.get("owner") or {}).get("id") == other_id
+
+    active = [l for l in active if not _same(l)]
+    pending = [l for l in pending if not _same(l)]
+    link = {
+        "owner": other,
+        "supplier_id": event.get("supplier_id"),
+        "status": event.get("status"),
+        "created_at": event.get("created_at"),
+        "updated_at": event.get("updated_at"),
+    }
+    if event.get("status") == "APPROVED":
+        active.append(link)
+    elif event.get("status") == "PENDING":
+        pending.append(link)
+    return active, pending
@@ -1,6 +1,6 @@
 # frontend/services/geo_service.py
 import os
-import pyodbc
+import requests
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -21,8 +21,18 @@ def fetch_districts_with_cities():
       { "district_id": int, "district_name": str, "cities": [ { "city_id": int, "city_name": str }, ... ] },
       ...
     ]
-    משתמש ב: districts(id, name_he), cities(id, name_he, district_id)
+    קודם מהשרת (אינדקס אזורי השירות – כולל suppliers_count לכל עיר),
+    ואם השרת לא זמין – ישירות מ: districts(id, name_he), cities(id, name_he, district_id)
     """
+    base_url = os.getenv("API_BASE_URL", "http://localhost:8000").rstrip("/")
+    try:
+        r = requests.get(f"{base_url}/api/v1/gateway/users/service-areas", timeout=10)
+        if r.status_code == 200 and r.json():
+            return r.json()
+    except Exception:
+        pass
+
+    import pyodbc
     out = {}
     sql = """
         SELECT d.id AS district_id, d.name_he AS district_name,
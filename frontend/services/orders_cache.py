@@ -0,0 +1,86 @@
+# frontend/services/orders_cache.py
+"""
+Local orders cache for incremental sync
+Keeps orders by id and a watermark a few minutes behind the newest updated_at seen,
+so a refresh only asks the server for what changed since then
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# כמו SYNC_OVERLAP בשרת (routers/orders_router.py)
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+def _parse_ts(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except Exception:
+        return None
+
+
+class OrdersCache:
+    """מטמון הזמנות מקומי – מיזוג לפי id ושמירת watermark לסנכרון הבא"""
+
+    def __init__(self):
+        self._orders: Dict[int, Dict] = {}
+        self.watermark: Optional[str] = None
+
+    def reset(self, orders: List[Dict]):
+        """טעינה מלאה – מחליפה את כל התוכן"""
+        self._orders.clear()
+        self.watermark = None
+        self.merge(orders)
+
+    def merge(self, orders: List[Dict], watermark: Optional[str] = None):
+        """
+        מיזוג שינויים: הזמנה קיימת מוחלפת בגרסה החדשה, חדשה מתווספת.
+        watermark מהשרת (אם נשלח) קובע – הוא כבר כולל חפיפה אחורה ויכול לזוז אחורה.
+        אחרת (טעינה מלאה) – המקסימום של updated_at שנראה פחות SYNC_OVERLAP:
+        הזמנה שנחתמה מוקדם יותר אבל עשתה commit מאוחר תגיע בסנכרון הבא.
+        """
+        newest = None
+        for order in orders:
+            order_id = order.get("id")
+            if order_id is None:
+                continue
+            self._orders[order_id] = order
+            ts = _parse_ts(order.get("updated_at"))
+            if ts and (newest is None or ts > newest):
+                newest = ts
+        if watermark:
+            self.watermark = watermark
+        elif newest is not None:
+            candidate = newest - SYNC_OVERLAP
+            current = _parse_ts(self.watermark)
+            if current is None or candidate > current:
+                self.watermark = candidate.isoformat()
+
+    def upsert(self, order: Dict):
+        """
+        הוספה/החלפה של הזמנה בודדת (אירוע push) בלי להזיז את ה-watermark –
+        שינויים שפוספסו לפניה עדיין יגיעו בסנכרון הבא
+        """
+        if order.get("id") is not None:
+            self._orders[order["id"]] = order
+
+    def patch(self, order_id: int, **fields) -> bool:
+        """עדכון שדות בהזמנה קיימת; False אם ההזמנה לא במטמון"""
+        order = self._orders.get(order_id)
+        if order is None:
+            return False
+        order.update(fields)
+        return True
+
+    def orders(self) -> List[Dict]:
+        """כל ההזמנות – החדשות ראשונות (כמו בשרת)"""
+        return sorted(
+            self._orders.values(),
+            key=lambda o: (o.get("created_date") or "", o.get("id") or 0),
+            reverse=True
+        )
+
+    def __len__(self):
+        return len(self._orders)
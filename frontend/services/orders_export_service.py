@@ -0,0 +1,269 @@
+# frontend/services/orders_export_service.py
+"""
+Orders export for the desktop client
+- Excel/CSV: rows are generated lazily from the loaded orders and written one by one
+  (xlsxwriter constant_memory / csv writer) in a background thread, with progress and cancel.
+- Parquet/Arrow: the server streams straight from the DB cursor (/gateway/orders/export);
+  the bytes go straight to disk.
+Nothing builds the whole export in memory.
+"""
+
+import csv
+import os
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from PySide6.QtCore import QThread, Signal
+
+# (kind בשרת, סיומת שם הקובץ) – אותה חלוקה כמו בגיליונות האקסל
+EXPORT_PARTS = (("orders", "הזמנות"), ("items", "מוצרים"))
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+_CHUNK_SIZE = 1 << 20
+
+# כל כמה שורות מדווחים התקדמות ובודקים ביטול
+_PROGRESS_EVERY = 500
+
+# שם הצד השני בהזמנה: בעל חנות רואה ספקים, ספק רואה חנויות
+COUNTERPARTY_SUPPLIER = "שם הספק"
+COUNTERPARTY_STORE = "שם החנות"
+
+
+class ExportCancelled(Exception):
+    """המשתמש ביטל את היצוא באמצע"""
+
+
+def _date_str(order: Dict) -> str:
+    created = order.get('created_date') or ''
+    try:
+        return datetime.fromisoformat(created.replace('Z', '+00:00')).strftime('%d/%m/%Y') if created else ''
+    except Exception:
+        return created[:10]
+
+
+def order_columns(counterparty: str) -> List[str]:
+    return ['מספר הזמנה', 'תאריך', 'סכום ההזמנה', 'סטטוס', counterparty, 'איש קשר', 'מספר מוצרים']
+
+
+def item_columns(counterparty: str) -> List[str]:
+    return ['מספר הזמנה', 'תאריך הזמנה', counterparty, 'מספר מוצר', 'שם מוצר',
+            'כמות', 'מחיר יחידה', 'סכום מוצר']
+
+
+def iter_order_rows(orders: Iterable[Dict], counterparty: str) -> Iterator[Dict]:
+    """שורת סיכום לכל הזמנה (גיליון "הזמנות")"""
+    for order in orders:
+        yield {
+            'מספר הזמנה': order.get('id', ''),
+            'תאריך': _date_str(order),
+            'סכום ההזמנה': order.get('total_amount', 0),
+            'סטטוס': order.get('status', ''),
+            counterparty: order.get('owner_company', ''),
+            'איש קשר': order.get('owner_name', ''),
+            'מספר מוצרים': len(order.get('items', [])),
+        }
+
+
+def iter_item_rows(orders: Iterable[Dict], counterparty: str) -> Iterator[Dict]:
+    """שורה לכל פריט בהזמנה (גיליון "מוצרים")"""
+    for order in orders:
+        date_str = _date_str(order)
+        for item in order.get('items', []):
+            yield {
+                'מספר הזמנה': order.get('id', ''),
+                'תאריך הזמנה': date_str,
+                counterparty: order.get('owner_company', ''),
+                'מספר מוצר': item.get('product_id', ''),
+                'שם מוצר': item.get('product_name', ''),
+                'כמות': item.get('quantity', 0),
+                'מחיר יחידה': item.get('unit_price', 0),
+                'סכום מוצר': (item.get('quantity', 0) or 0) * (item.get('unit_price', 0) or 0),
+            }
+
+
+Sheet = Tuple[str, Sequence[str], Iterable[Dict]]
+
+
+def export_sheets(orders: List[Dict], counterparty: str) -> List[Sheet]:
+    """(שם גיליון, עמודות, שורות) – השורות נוצרות רק בזמן הכתיבה"""
+    return [
+        ("הזמנות", order_columns(counterparty), iter_order_rows(orders, counterparty)),
+        ("מוצרים", item_columns(counterparty), iter_item_rows(orders, counterparty)),
+    ]
+
+
+def count_export_rows(orders: List[Dict]) -> int:
+    return len(orders) + sum(len(o.get('items', [])) for o in orders)
+
+
+def csv_paths(path: str, sheets: Sequence[Sheet]) -> List[str]:
+    base = path[:-4] if path.lower().endswith(".csv") else path
+    return [f"{base}_{name}.csv" for name, _, _ in sheets]
+
+
+def write_export(path: str, sheets: Sequence[Sheet],
+                 progress: Optional[Callable[[int], None]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None) -> List[str]:
+    """
+    כתיבה שורה-שורה: .csv → קובץ לכל גיליון, אחרת xlsx אחד עם גיליון לכל חלק.
+    progress(rows_written) ו-is_cancelled() נקראים כל _PROGRESS_EVERY שורות;
+    ביטול מוחק את הקבצים החלקיים ומעלה ExportCancelled. מחזיר את הנתיבים שנכתבו.
+    """
+    written = 0
+
+    def _tick():
+        nonlocal written
+        written += 1
+        if written % _PROGRESS_EVERY == 0:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            if progress:
+                progress(written)
+
+    if path.lower().endswith(".csv"):
+        paths = csv_paths(path, sheets)
+        try:
+            for (_, columns, rows), out_path in zip(sheets, paths):
+                with open(out_path, "w", newline="", encoding="utf-8-sig") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    for row in rows:
+                        writer.writerow([row.get(c, '') for c in columns])
+                        _tick()
+        except BaseException:
+            for out_path in paths:
+                if os.path.exists(out_path):
+                    os.remove(out_path)
+            raise
+    else:
+        import xlsxwriter
+
+        paths = [path]
+        # constant_memory: כל שורה נכתבת לקובץ זמני ברגע שעוברים לשורה הבאה
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        try:
+            header = workbook.add_format({"bold": True})
+            for name, columns, rows in sheets:
+                ws = workbook.add_worksheet(name)
+                for col_idx, col in enumerate(columns):
+                    ws.set_column(col_idx, col_idx, max(12, min(50, len(str(col)) + 6)))
+                ws.write_row(0, 0, columns, header)
+                for row_idx, row in enumerate(rows, start=1):
+                    ws.write_row(row_idx, 0, [row.get(c, '') for c in columns])
+                    _tick()
+            workbook.close()
+        except BaseException:
+            try:
+                workbook.close()
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+            raise
+
+    if progress:
+        progress(written)
+    return paths
+
+
+def export_url(base_url: str) -> str:
+    return f"{base_url.rstrip('/')}/api/v1/gateway/orders/export"
+
+
+def export_params(owner_id: Optional[int] = None, supplier_id: Optional[int] = None,
+                  display_history: Optional[bool] = None) -> Dict:
+    """פרמטרי הסינון של היצוא – בעל חנות או ספק, היסטוריה/פעילות"""
+    params: Dict = {}
+    if owner_id is not None:
+        params["owner_id"] = owner_id
+    if supplier_id is not None:
+        params["supplier_id"] = supplier_id
+    if display_history is not None:
+        params["history"] = "true" if display_history else "false"
+    return params
+
+
+def columnar_paths(path: str, fmt: str) -> List[str]:
+    """שם הקובץ שנבחר → קובץ לכל חלק (הזמנות/מוצרים), כמו ביצוא CSV"""
+    base = os.path.splitext(path)[0]
+    return [f"{base}_{suffix}.{fmt}" for _, suffix in EXPORT_PARTS]
+
+
+class OrdersFileExportThread(QThread):
+    """Thread ליצוא Excel/CSV מההזמנות שנטענו – בלי לחסום את ה-UI"""
+    progress = Signal(int)          # שורות שנכתבו עד כה
+    export_finished = Signal(list)  # נתיבי הקבצים שנשמרו
+    export_cancelled = Signal()
+    error_occurred = Signal(str)
+
+    def __init__(self, orders: List[Dict], path: str, counterparty: str = COUNTERPARTY_SUPPLIER):
+        super().__init__()
+        self.orders = list(orders)  # העמוד עלול להחליף/לעדכן את הרשימה בזמן היצוא
+        self.path = path
+        self.counterparty = counterparty
+        self.total_rows = count_export_rows(orders)
+
+    def run(self):
+        try:
+            paths = write_export(
+                self.path,
+                export_sheets(self.orders, self.counterparty),
+                progress=self.progress.emit,
+                is_cancelled=self.isInterruptionRequested,
+            )
+            self.export_finished.emit(paths)
+        except ExportCancelled:
+            self.export_cancelled.emit()
+        except Exception as e:
+            self.error_occurred.emit(f"שגיאה ביצוא הקובץ: {str(e)}")
+
+
+class OrdersColumnarExportThread(QThread):
+    """Thread להורדת יצוא Parquet/Arrow מהשרת ישר לקבצים"""
+    progress = Signal(int)          # בתים שנכתבו עד כה
+    export_finished = Signal(list)  # נתיבי הקבצים שנשמרו
+    export_cancelled = Signal()
+    error_occurred = Signal(str)
+
+    def __init__(self, params: Dict, path: str, fmt: str = "parquet",
+                 base_url: Optional[str] = None):
+        super().__init__()
+        self.base_url = base_url or os.getenv("API_BASE_URL", "http://localhost:8000")
+        self.params = params
+        self.fmt = fmt
+        self.paths = columnar_paths(path, fmt)
+
+    def run(self):
+        written = 0
+        saved: List[str] = []
+        try:
+            for (kind, _), path in zip(EXPORT_PARTS, self.paths):
+                tmp = path + ".part"
+                with requests.get(export_url(self.base_url),
+                                  params={**self.params, "kind": kind, "format": self.fmt},
+                                  stream=True, timeout=30) as response:
+                    if response.status_code == 503:
+                        raise RuntimeError(response.json().get("detail", "יצוא עמודתי לא זמין בשרת"))
+                    response.raise_for_status()
+                    with open(tmp, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                            if self.isInterruptionRequested():
+                                break
+                            f.write(chunk)
+                            written += len(chunk)
+                            self.progress.emit(written)
+                if self.isInterruptionRequested():
+                    os.remove(tmp)
+                    for done in saved:
+                        os.remove(done)
+                    self.export_cancelled.emit()
+                    return
+                os.replace(tmp, path)
+                saved.append(path)
+            self.export_finished.emit(saved)
+        except Exception as e:
+            for path in self.paths:
+                if os.path.exists(path + ".part"):
+                    os.remove(path + ".part")
+            self.error_occurred.emit(f"שגיאה ביצוא הקובץ: {str(e)}")
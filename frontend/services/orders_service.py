@@ -7,39 +7,71 @@ Handles all API calls and business logic for orders
 import requests
 import os
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, date
 from PySide6.QtCore import QThread, Signal
 
+from services.orders_export_service import COUNTERPARTY_STORE, iter_item_rows, iter_order_rows
+
 
 class OrdersFetchThread(QThread):
-    """Thread לטעינת הזמנות מהשרת"""
-    orders_loaded = Signal(list)
+    """Thread לטעינת עמוד אחד של הזמנות מהשרת (cursor=None – העמוד הראשון)"""
+    # (הזמנות העמוד, cursor לעמוד הבא או "" אם אין עוד)
+    page_loaded = Signal(list, str)
     error_occurred = Signal(str)
     
-    def __init__(self, base_url: str, supplier_id: int):
+    def __init__(self, base_url: str, supplier_id: int, params: Optional[Dict] = None,
+                 cursor: Optional[str] = None):
         super().__init__()
         self.base_url = base_url
         self.supplier_id = supplier_id
+        self.params = params or {}
+        self.cursor = cursor
     
     def run(self):
         try:
-            orders = self._fetch_orders()
-            self.orders_loaded.emit(orders)
+            orders, next_cursor = self._fetch_page()
+            self.page_loaded.emit(orders, next_cursor)
         except Exception as e:
             self.error_occurred.emit(f"שגיאה בטעינת הזמנות: {str(e)}")
     
-    def _fetch_orders(self) -> List[Dict]:
-        """טעינת הזמנות מהשרת"""
+    def _fetch_page(self):
+        """עמוד אחד לפי ה-cursor; תשובה שאינה 200 היא שגיאה ולא רשימה ריקה"""
+        params = dict(self.params)
+        if self.cursor:
+            params["cursor"] = self.cursor
+        response = requests.get(
+            f"{self.base_url}/api/v1/gateway/orders/supplier/{self.supplier_id}",
+            params=params,
+            timeout=15
+        )
+        response.raise_for_status()
+        return response.json(), response.headers.get("X-Next-Cursor") or ""
+
+
+class OrdersChangesFetchThread(QThread):
+    """Thread לסנכרון אינקרמנטלי – רק הזמנות שנוצרו/השתנו מאז ה-watermark"""
+    changes_loaded = Signal(list, str)
+    error_occurred = Signal(str)
+    
+    def __init__(self, base_url: str, role: str, user_id: int, since: str):
+        super().__init__()
+        self.base_url = base_url
+        self.role = role  # "supplier" / "owner"
+        self.user_id = user_id
+        self.since = since
+    
+    def run(self):
         try:
             response = requests.get(
-                f"{self.base_url}/api/v1/gateway/orders/supplier/{self.supplier_id}",
+                f"{self.base_url}/api/v1/gateway/orders/{self.role}/{self.user_id}/changes",
+                params={"since": self.since},
                 timeout=15
             )
-            if response.status_code == 200:
-                return response.json()
-            return []
-        except Exception:
-            return []
+            response.raise_for_status()
+            data = response.json()
+            self.changes_loaded.emit(data.get("orders", []), data.get("watermark") or self.since)
+        except Exception as e:
+            self.error_occurred.emit(f"שגיאה בסנכרון הזמנות: {str(e)}")
 
 
 class OrdersService:
@@ -76,10 +108,10 @@ class OrdersService:
             print(f"Error fetching orders: {e}")
             return []
     
-    def update_order_status(self, order_id: int, new_status: str, supplier_id: int) -> tuple[bool, str]:
+    def update_order_status(self, order_id: int, new_status: str, supplier_id: int) -> tuple[bool, str, List[Dict]]:
         """
         Update order status by supplier
-        Returns: (success: bool, message: str)
+        Returns: (success: bool, message: str, stock_updates: [{product_id, stock}])
         """
         try:
             response = requests.put(
@@ -90,7 +122,8 @@ class OrdersService:
             )
             
             if response.status_code == 200:
-                return True, "הסטטוס עודכן בהצלחה"
+                stock_updates = response.json().get("stock_updates", [])
+                return True, "הסטטוס עודכן בהצלחה", stock_updates
             else:
                 error_msg = "שגיאה בעדכון הסטטוס"
                 try:
@@ -99,14 +132,53 @@ class OrdersService:
                         error_msg += f": {error_detail}"
                 except:
                     pass
-                return False, error_msg
+                return False, error_msg, []
                 
         except requests.exceptions.Timeout:
-            return False, "הבקשה נכשלה - זמן המתנה יתר על המידה"
+            return False, "הבקשה נכשלה - זמן המתנה יתר על המידה", []
         except requests.exceptions.ConnectionError:
-            return False, "לא ניתן להתחבר לשרת"
+            return False, "לא ניתן להתחבר לשרת", []
         except Exception as e:
-            return False, f"שגיאה בעדכון הסטטוס: {str(e)}"
+            return False, f"שגיאה בעדכון הסטטוס: {str(e)}", []
+    
+    def bulk_update_order_status(self, order_ids: List[int], new_status: str,
+                                 supplier_id: int) -> tuple[bool, str, List[Dict], List[Dict]]:
+        """
+        Move many orders to a new status in one server transaction
+        Returns: (success: bool, message: str, results: [{order_id, ok, error}], stock_updates)
+        """
+        try:
+            response = requests.put(
+                f"{self.base_url}/api/v1/gateway/orders/status/bulk",
+                json={"order_ids": list(order_ids), "status": new_status},
+                params={"supplier_id": supplier_id},
+                timeout=30
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                results = data.get("results", [])
+                failed = [r for r in results if not r.get("ok")]
+                message = f"עודכנו {data.get('updated', 0)} הזמנות"
+                if failed:
+                    message += f", {len(failed)} נכשלו"
+                return True, message, results, data.get("stock_updates", [])
+            else:
+                error_msg = "שגיאה בעדכון הסטטוס"
+                try:
+                    error_detail = response.json().get("detail", "")
+                    if error_detail:
+                        error_msg += f": {error_detail}"
+                except:
+                    pass
+                return False, error_msg, [], []
+                
+        except requests.exceptions.Timeout:
+            return False, "הבקשה נכשלה - זמן המתנה יתר על המידה", [], []
+        except requests.exceptions.ConnectionError:
+            return False, "לא ניתן להתחבר לשרת", [], []
+        except Exception as e:
+            return False, f"שגיאה בעדכון הסטטוס: {str(e)}", [], []
     
     def update_order_status_by_owner(self, order_id: int, new_status: str, owner_id: int) -> tuple[bool, str]:
         """
@@ -140,6 +212,25 @@ class OrdersService:
         except Exception as e:
             return False, f"שגיאה בעדכון הסטטוס: {str(e)}"
     
+    def build_orders_query(self,
+                           display_history: bool = False,
+                           date_from: Optional[date] = None,
+                           date_to: Optional[date] = None,
+                           page_size: int = 200) -> Dict:
+        """
+        Build server-side filter params for GET /orders/supplier/{id}
+        so the server returns only the orders that the current view shows
+        """
+        params: Dict = {
+            "status": ["הושלמה"] if display_history else ["בוצעה", "בתהליך"],
+            "limit": page_size,
+        }
+        if date_from:
+            params["date_from"] = date_from.isoformat()
+        if date_to:
+            params["date_to"] = date_to.isoformat()
+        return params
+    
     def filter_orders(self, orders: List[Dict], 
                      display_history: bool = False,
                      date_from: Optional[datetime] = None,
@@ -182,41 +273,5 @@ class OrdersService:
         Prepare orders data for export
         Returns: (orders_data, products_data)
         """
-        orders_data = []
-        products_data = []
-        
-        for order in orders:
-            # טיפול בתאריך
-            try:
-                date_str = datetime.fromisoformat(
-                    order.get('created_date', '').replace('Z', '+00:00')
-                ).strftime('%d/%m/%Y') if order.get('created_date') else ''
-            except Exception:
-                date_str = order.get('created_date', '')[:10] if order.get('created_date') else ''
-            
-            # נתוני הזמנה בסיסיים
-            order_info = {
-                'מספר הזמנה': order.get('id', ''),
-                'תאריך': date_str,
-                'סכום ההזמנה': order.get('total_amount', 0),
-                'סטטוס': order.get('status', ''),
-                'שם החנות': order.get('owner_company', ''),
-                'איש קשר': order.get('owner_name', ''),
-                'מספר מוצרים': len(order.get('items', [])),
-            }
-            orders_data.append(order_info)
-            
-            # פירוט מוצרים
-            for item in order.get('items', []):
-                products_data.append({
-                    'מספר הזמנה': order.get('id', ''),
-                    'תאריך הזמנה': date_str,
-                    'שם החנות': order.get('owner_company', ''),
-                    'מספר מוצר': item.get('product_id', ''),
-                    'שם מוצר': item.get('product_name', ''),
-                    'כמות': item.get('quantity', 0),
-                    'מחיר יחידה': item.get('unit_price', 0),
-                    'סכום מוצר': (item.get('quantity', 0) or 0) * (item.get('unit_price', 0) or 0),
-                })
-        
-        return orders_data, products_data
\ No newline at end of file
+        return (list(iter_order_rows(orders, COUNTERPARTY_STORE)),
+                list(iter_item_rows(orders, COUNTERPARTY_STORE)))
@@ -21,8 +21,9 @@ def _post(path: str, params: dict):
     return r.json()
 
 # --- Tabs data ---
-def find_suppliers(owner_id: int):
-    return _get("/owner-links/find-suppliers", {"owner_id": owner_id})
+def find_suppliers(owner_id: int, limit: int = 50, offset: int = 0):
+    # מדורג בשרת: התאמת עיר, אחר כך מחוז
+    return _get("/owner-links/find-suppliers", {"owner_id": owner_id, "limit": limit, "offset": offset})
 
 def get_active_by_owner(owner_id: int):
     return _get("/owner-links/active-by-owner", {"owner_id": owner_id})
@@ -44,14 +45,23 @@ def products_by_supplier(supplier_id: int):
     # התאימי לנתיב ה-API שלך (דוגמה נפוצה:)
     return _get("/products/", {"supplier_id": supplier_id})
 
-def create_order(owner_id: int, supplier_id: int, items: list[dict]):
-    # התאימי לנתיב/פרמטרים המדויקים של ה-API שלך
+def create_order(owner_id: int, supplier_id: int, items: list[dict],
+                 idempotency_key: str | None = None, retries: int = 2):
+    # ניסיון חוזר על תקלת רשת עם אותו Idempotency-Key – השרת מחזיר את ההזמנה הקיימת ולא יוצר כפילות
     import requests
-    r = requests.post(
-        _url("/orders/"),
-        params={"owner_id": owner_id},
-        json={"supplier_id": supplier_id, "items": items},
-        timeout=15
-    )
+    headers = {"Idempotency-Key": idempotency_key} if idempotency_key else {}
+    for attempt in range(retries + 1):
+        try:
+            r = requests.post(
+                _url("/orders/"),
+                params={"owner_id": owner_id},
+                json={"supplier_id": supplier_id, "items": items},
+                headers=headers,
+                timeout=15
+            )
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if not idempotency_key or attempt == retries:
+                raise
     r.raise_for_status()
     return r.json()
\ No newline at end of file
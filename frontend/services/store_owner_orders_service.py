@@ -10,6 +10,10 @@ from typing import List, Dict, Optional
 from datetime import datetime, date
 from PySide6.QtCore import QThread, Signal
 
+from services.orders_export_service import (
+    COUNTERPARTY_SUPPLIER, item_columns, iter_item_rows, iter_order_rows, order_columns, write_export,
+)
+
 
 class StoreOwnerOrdersFetchThread(QThread):
     """Thread לטעינת הזמנות מהשרת עבור בעל חנות"""
@@ -140,76 +144,21 @@ class StoreOwnerOrdersService:
         Prepare orders data for export
         Returns: (orders_data, products_data)
         """
-        orders_data = []
-        products_data = []
-        
-        for order in orders:
-            # טיפול בתאריך
-            try:
-                date_str = datetime.fromisoformat(
-                    order.get('created_date', '').replace('Z', '+00:00')
-                ).strftime('%d/%m/%Y') if order.get('created_date') else ''
-            except Exception:
-                date_str = order.get('created_date', '')[:10]
-
-            # נתוני הזמנה בסיסיים
-            order_info = {
-                'מספר הזמנה': order.get('id', ''),
-                'תאריך': date_str,
-                'סכום ההזמנה': order.get('total_amount', 0),
-                'סטטוס': order.get('status', ''),
-                'שם הספק': order.get('owner_company', ''),
-                'איש קשר': order.get('owner_name', ''),
-                'מספר מוצרים': len(order.get('items', [])),
-            }
-            orders_data.append(order_info)
-
-            # פירוט מוצרים
-            for item in order.get('items', []):
-                products_data.append({
-                    'מספר הזמנה': order.get('id', ''),
-                    'תאריך הזמנה': date_str,
-                    'שם הספק': order.get('owner_company', ''),
-                    'מספר מוצר': item.get('product_id', ''),
-                    'שם מוצר': item.get('product_name', ''),
-                    'כמות': item.get('quantity', 0),
-                    'מחיר יחידה': item.get('unit_price', 0),
-                    'סכום מוצר': (item.get('quantity', 0) or 0) * (item.get('unit_price', 0) or 0),
-                })
-
-        return orders_data, products_data
+        return (list(iter_order_rows(orders, COUNTERPARTY_SUPPLIER)),
+                list(iter_item_rows(orders, COUNTERPARTY_SUPPLIER)))
     
     def export_to_files(self, orders_data: List[Dict], products_data: List[Dict], 
                        file_path: str, owner_id: int, display_history: bool) -> tuple[bool, str]:
-        """Export data to Excel or CSV files"""
+        """Export data to Excel or CSV files (synchronous; the export widget uses OrdersFileExportThread)"""
         try:
-            import pandas as pd
-            
-            df_orders = pd.DataFrame(orders_data)
-            df_products = pd.DataFrame(products_data)
-
-            if file_path.lower().endswith(".csv"):
-                # אם בחרו CSV — שומרים שני קבצים נפרדים
-                base = file_path[:-4]
-                orders_csv = base + "_הזמנות.csv"
-                products_csv = base + "_מוצרים.csv"
-                df_orders.to_csv(orders_csv, index=False, encoding="utf-8-sig")
-                df_products.to_csv(products_csv, index=False, encoding="utf-8-sig")
-
-                return True, f"נשמרו שני קבצי CSV:\n• {orders_csv}\n• {products_csv}"
-            else:
-                # קובץ Excel עם שני גיליונות
-                with pd.ExcelWriter(file_path, engine="xlsxwriter") as writer:
-                    df_orders.to_excel(writer, sheet_name="הזמנות", index=False)
-                    df_products.to_excel(writer, sheet_name="מוצרים", index=False)
-
-                    # התאמת רוחב עמודות בסיסי
-                    for sheet_name, df in [("הזמנות", df_orders), ("מוצרים", df_products)]:
-                        ws = writer.sheets[sheet_name]
-                        for col_idx, col in enumerate(df.columns):
-                            ws.set_column(col_idx, col_idx, max(12, min(50, len(str(col)) + 6)))
-
-                return True, f"הקובץ נשמר בהצלחה:\n{file_path}"
+            sheets = [
+                ("הזמנות", order_columns(COUNTERPARTY_SUPPLIER), orders_data),
+                ("מוצרים", item_columns(COUNTERPARTY_SUPPLIER), products_data),
+            ]
+            paths = write_export(file_path, sheets)
+            if len(paths) > 1:
+                return True, "נשמרו שני קבצי CSV:\n" + "\n".join(f"• {p}" for p in paths)
+            return True, f"הקובץ נשמר בהצלחה:\n{file_path}"
 
         except Exception as e:
             return False, f"שגיאה ביצוא הקובץ:\n{str(e)}"
\ No newline at end of file
@@ -0,0 +1,51 @@
+# frontend/services/user_stats_service.py
+"""
+Dashboard counters for the home pages (/gateway/users/{id}/stats)
+Served from the user_stats table, the same numbers the AI assistant answers with
+"""
+
+import os
+from typing import Dict, Optional
+
+import requests
+from PySide6.QtCore import QThread, Signal
+
+
+class UserStatsFetchThread(QThread):
+    """Thread לטעינת מוני המשתמש מהשרת"""
+    stats_loaded = Signal(dict)
+    error_occurred = Signal(str)
+
+    def __init__(self, user_id: int, base_url: Optional[str] = None):
+        super().__init__()
+        self.base_url = (base_url or os.getenv("API_BASE_URL", "http://localhost:8000")).rstrip("/")
+        self.user_id = user_id
+
+    def run(self):
+        try:
+            response = requests.get(
+                f"{self.base_url}/api/v1/gateway/users/{self.user_id}/stats",
+                timeout=10
+            )
+            response.raise_for_status()
+            self.stats_loaded.emit(response.json())
+        except Exception as e:
+            self.error_occurred.emit(f"שגיאה בטעינת נתונים: {str(e)}")
+
+
+def format_stats(stats: Dict, user_type: str) -> str:
+    """שורת סיכום קצרה ל-topbar לפי סוג המשתמש"""
+    if user_type == "Supplier":
+        parts = [
+            f"מוצרים: {stats.get('products_count', 0)}",
+            f"הזמנות פעילות: {stats.get('active_orders', 0)}",
+            f"אזלו מהמלאי: {stats.get('out_of_stock_products', 0)}",
+            f"חנויות מחוברות: {stats.get('connected_links', 0)}",
+        ]
+    else:
+        parts = [
+            f"הזמנות פעילות: {stats.get('active_orders', 0)}",
+            f"סה\"כ הזמנות: {stats.get('total_orders', 0)}",
+            f"ספקים מחוברים: {stats.get('connected_links', 0)}",
+        ]
+    return "  |  ".join(parts)
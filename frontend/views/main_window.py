@@ -103,6 +103,14 @@ class MainWindow(QMainWindow):
             self.background_label.resize(self.size())
         super().resizeEvent(event)
 
+    def closeEvent(self, event):
+        # עצירת חיבורי האירועים (threads) לפני סגירת האפליקציה
+        for i in range(self.stack.count()):
+            widget = self.stack.widget(i)
+            if hasattr(widget, "stop_events"):
+                widget.stop_events()
+        super().closeEvent(event)
+
     def _on_login_ok(self, user: dict):
         self.statusBar().showMessage(f"שלום {user.get('username')}", 5000)
         
@@ -152,6 +160,8 @@ class MainWindow(QMainWindow):
         # ניקוי כל העמודים שנוספו מלבד login ו-signup
         while self.stack.count() > 2:
             widget = self.stack.widget(2)  # תמיד הווידג'ט השלישי
+            if hasattr(widget, "stop_events"):
+                widget.stop_events()  # סגירת חיבור האירועים לפני מחיקה
             self.stack.removeWidget(widget)
             widget.deleteLater()
         
@@ -11,10 +11,13 @@ from typing import Dict
 import os
 import time
 
+from services.chat_stream import stream_chat_message, StreamNotSupported
+
 class ChatRequestThread(QThread):
     """Thread מותאם לשליחת בקשות צ'אט עם נתוני משתמש"""
     response_received = Signal(dict)
     error_occurred = Signal(str)
+    token_received = Signal(str)  # קטע מהתשובה המוזרמת
     progress_updated = Signal(int)
     
     def __init__(self, user_id: int, message: str, api_url: str, timeout: int = 120, user_data: dict = None):
@@ -25,6 +28,7 @@ class ChatRequestThread(QThread):
         self.timeout = timeout
         self.start_time = None
         self.user_data = user_data or {}
+        self._first_token = True
 
     def run(self):
         try:
@@ -39,34 +43,21 @@ class ChatRequestThread(QThread):
             
             self.progress_updated.emit(30)
             
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-                'Connection': 'keep-alive',
-                'Accept-Encoding': 'gzip, deflate'
-            }
-            
-            self.progress_updated.emit(50)
-            
-            response = requests.post(
-                f"{self.api_url}/api/v1/gateway/chat/message",
-                json=payload,
-                headers=headers,
-                timeout=self.timeout,
-                stream=False
-            )
+            try:
+                # הזרמה: כל קטע מהמודל מוצג מיד, בלי לחכות לתשובה המלאה
+                response_data = stream_chat_message(
+                    self.api_url, payload, self.timeout, on_token=self._on_token
+                )
+            except StreamNotSupported:
+                response_data = self._request_full(payload)
             
-            self.progress_updated.emit(80)
+            if response_data is None:
+                return
+            response_data["response_time"] = round(time.time() - self.start_time, 2)
+            response_data["from_cache"] = response_data.get("from_cache", False)
             
-            if response.status_code == 200:
-                response_data = response.json()
-                response_data["response_time"] = round(time.time() - self.start_time, 2)
-                response_data["from_cache"] = response_data.get("from_cache", False)
-                
-                self.progress_updated.emit(100)
-                self.response_received.emit(response_data)
-            else:
-                self.error_occurred.emit(f"שגיאה בשרת: {response.status_code}")
+            self.progress_updated.emit(100)
+            self.response_received.emit(response_data)
                 
         except requests.exceptions.Timeout:
             self.error_occurred.emit("התגובה לוקחת יותר מדי זמן - נסה שוב")
@@ -75,6 +66,27 @@ class ChatRequestThread(QThread):
         except Exception as e:
             self.error_occurred.emit(f"שגיאת תקשורת: {str(e)}")
 
+    def _on_token(self, text: str):
+        if self._first_token:
+            self._first_token = False
+            self.progress_updated.emit(80)
+        self.token_received.emit(text)
+
+    def _request_full(self, payload: dict):
+        """שרת בלי נקודת הזרמה – בקשה רגילה לתשובה מלאה"""
+        self.progress_updated.emit(50)
+        response = requests.post(
+            f"{self.api_url}/api/v1/gateway/chat/message",
+            json=payload,
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+            timeout=self.timeout
+        )
+        self.progress_updated.emit(80)
+        if response.status_code != 200:
+            self.error_occurred.emit(f"שגיאה בשרת: {response.status_code}")
+            return None
+        return response.json()
+
 class TypingIndicator(QLabel):
     """אינדיקטור כתיבה מהיר יותר עם אנימציה חלקה"""
     
@@ -152,29 +164,17 @@ class ChatBubble(QFrame):
         bubble.setMaximumWidth(500)
         bubble.setObjectName("userBubble" if is_user else "botBubble")
         
-        bubble_layout = QVBoxLayout(bubble)
-        bubble_layout.setContentsMargins(15, 10, 15, 10)
+        self.bubble_layout = QVBoxLayout(bubble)
+        self.bubble_layout.setContentsMargins(15, 10, 15, 10)
         
-        message_label = QLabel(message)
-        message_label.setWordWrap(True)
-        message_label.setAlignment(Qt.AlignRight if is_user else Qt.AlignLeft)
-        bubble_layout.addWidget(message_label)
+        self.message_label = QLabel(message)
+        self.message_label.setWordWrap(True)
+        self.message_label.setAlignment(Qt.AlignRight if is_user else Qt.AlignLeft)
+        self.bubble_layout.addWidget(self.message_label)
         
-        if not is_user and response_time is not None:
-            info_parts = [f"נענה תוך {response_time} שניות"]
-            
-            if from_cache:
-                info_parts.append("(מטמון מהיר)")
-            
-            time_label = QLabel(" • ".join(info_parts))
-            time_label.setStyleSheet("""
-                color: #9ca3af;
-                font-size: 11px;
-                font-style: italic;
-                margin-top: 5px;
-            """)
-            time_label.setAlignment(Qt.AlignLeft)
-            bubble_layout.addWidget(time_label)
+        # הוספת זמן תגובה ומידע על מטמון
+        if not is_user:
+            self.add_info(response_time, from_cache)
         
         if is_user:
             layout.addStretch()
@@ -183,6 +183,34 @@ class ChatBubble(QFrame):
             layout.addWidget(bubble)
             layout.addStretch()
 
+    def add_info(self, response_time: float = None, from_cache: bool = False, first_token_time: float = None):
+        """שורת זמן תגובה מתחת להודעה (גם אחרי שהזרמה הסתיימה)"""
+        if response_time is None:
+            return
+        info_parts = [f"נענה תוך {response_time} שניות"]
+        
+        if first_token_time is not None:
+            info_parts.append(f"התחיל לענות אחרי {first_token_time} שניות")
+        if from_cache:
+            info_parts.append("(מטמון מהיר)")
+        
+        time_label = QLabel(" • ".join(info_parts))
+        time_label.setStyleSheet("""
+            color: #9ca3af;
+            font-size: 11px;
+            font-style: italic;
+            margin-top: 5px;
+        """)
+        time_label.setAlignment(Qt.AlignLeft)
+        self.bubble_layout.addWidget(time_label)
+
+    def append_text(self, text: str):
+        """הוספת קטע להודעה שמוזרמת"""
+        self.message_label.setText(self.message_label.text() + text)
+
+    def set_text(self, text: str):
+        self.message_label.setText(text)
+
 class AIChatSupplierPage(QWidget):
     """עמוד צ'אט AI בעיצוב ירוק לספק"""
     
@@ -194,6 +222,7 @@ class AIChatSupplierPage(QWidget):
         self.typing_indicator = None
         self.progress_bar = None
         self.chat_thread = None
+        self.stream_bubble = None  # בועת התשובה שמוזרמת כרגע
         self.chat_timeout = int(os.getenv("CHAT_UI_TIMEOUT", "120"))
         self.message_cache = {}
         
@@ -463,6 +492,7 @@ class AIChatSupplierPage(QWidget):
             user_data=self.user_data
         )
         self.chat_thread.response_received.connect(self.on_response_received)
+        self.chat_thread.token_received.connect(self.on_token_received)
         self.chat_thread.error_occurred.connect(self.on_error_occurred)
         self.chat_thread.progress_updated.connect(self.progress_bar.setValue)
         self.chat_thread.start()
@@ -498,6 +528,15 @@ class AIChatSupplierPage(QWidget):
         
         self.scroll_to_bottom()
     
+    def on_token_received(self, text: str):
+        """קטע מהתשובה המוזרמת – הבועה נבנית תוך כדי יצירה"""
+        if self.stream_bubble is None:
+            self.remove_typing_indicator()
+            self.stream_bubble = ChatBubble("", is_user=False)
+            self.messages_layout.addWidget(self.stream_bubble)
+        self.stream_bubble.append_text(text)
+        self.scroll_to_bottom()
+    
     def on_response_received(self, response: dict):
         """טיפול בתגובה מהשרת"""
         # עצירת progress bar
@@ -516,9 +555,14 @@ class AIChatSupplierPage(QWidget):
             if from_cache:
                 bot_response += "\n\n⚡ תשובה מהמטמון"
             
-            bot_bubble = ChatBubble(bot_response, is_user=False, 
-                                  response_time=response_time, from_cache=from_cache)
-            self.messages_layout.addWidget(bot_bubble)
+            if self.stream_bubble is not None:
+                # התשובה כבר מוצגת – מחליפים בטקסט הסופי (אחרי ניקוי בשרת) ומוסיפים זמנים
+                self.stream_bubble.set_text(bot_response)
+                self.stream_bubble.add_info(response_time, from_cache, response.get("first_token_time"))
+            else:
+                bot_bubble = ChatBubble(bot_response, is_user=False, 
+                                      response_time=response_time, from_cache=from_cache)
+                self.messages_layout.addWidget(bot_bubble)
             
             # שמירה במטמון מקומי
             if not from_cache:
@@ -532,6 +576,8 @@ class AIChatSupplierPage(QWidget):
             error_bubble = ChatBubble(error_message, is_user=False)
             self.messages_layout.addWidget(error_bubble)
         
+        self.stream_bubble = None
+        
         # החזרת הכפתור למצב רגיל
         self.send_button.setEnabled(True)
         self.send_button.setText("שלח")
@@ -546,6 +592,7 @@ class AIChatSupplierPage(QWidget):
         
         # הסרת אינדיקטור הכתיבה
         self.remove_typing_indicator()
+        self.stream_bubble = None
         
         # הוספת הודעת שגיאה
         error_message = f"שגיאה בתקשורת: {error}\n\nנסה שוב או פנה לתמיכה."
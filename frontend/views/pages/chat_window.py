@@ -11,10 +11,13 @@ from typing import Dict
 import os
 import time
 
+from services.chat_stream import stream_chat_message, StreamNotSupported
+
 class FastChatRequestThread(QThread):
     """Thread מואץ לשליחת בקשות צ'אט עם נתוני משתמש"""
     response_received = Signal(dict)
     error_occurred = Signal(str)
+    token_received = Signal(str)  # קטע מהתשובה המוזרמת
     progress_updated = Signal(int)  # חדש: עדכון progress
     
     def __init__(self, user_id: int, message: str, api_url: str, timeout: int = 120, user_data: dict = None):
@@ -25,50 +28,36 @@ class FastChatRequestThread(QThread):
         self.timeout = timeout  # הקטנתי מ-180 ל-120
         self.start_time = None
         self.user_data = user_data or {}
+        self._first_token = True
 
     def run(self):
         try:
             self.start_time = time.time()
-            self.progress_updated.emit(10)  # התחלה
+            self.progress_updated.emit(10)
             
-            # הכנת payload מובטל
             payload = {
                 "user_id": self.user_id,
                 "message": self.message,
                 "user_context": self.user_data
             }
             
-            self.progress_updated.emit(30)  # הכנת נתונים
-            
-            # שליחת בקשה עם headers מותאמים למהירות
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json',
-                'Connection': 'keep-alive',
-                'Accept-Encoding': 'gzip, deflate'
-            }
-            
-            self.progress_updated.emit(50)  # שליחה
+            self.progress_updated.emit(30)
             
-            response = requests.post(
-                f"{self.api_url}/api/v1/gateway/chat/message",
-                json=payload,
-                headers=headers,
-                timeout=self.timeout,
-                stream=False  # ללא streaming למהירות
-            )
+            try:
+                # הזרמה: כל קטע מהמודל מוצג מיד, בלי לחכות לתשובה המלאה
+                response_data = stream_chat_message(
+                    self.api_url, payload, self.timeout, on_token=self._on_token
+                )
+            except StreamNotSupported:
+                response_data = self._request_full(payload)
             
-            self.progress_updated.emit(80)  # קבלת תגובה
+            if response_data is None:
+                return
+            response_data["response_time"] = round(time.time() - self.start_time, 2)
+            response_data["from_cache"] = response_data.get("from_cache", False)
             
-            if response.status_code == 200:
-                response_data = response.json()
-                response_data["response_time"] = round(time.time() - self.start_time, 2)
-                response_data["from_cache"] = response_data.get("from_cache", False)
-                
-                self.progress_updated.emit(100)  # הושלם
-                self.response_received.emit(response_data)
-            else:
-                self.error_occurred.emit(f"שגיאה בשרת: {response.status_code}")
+            self.progress_updated.emit(100)
+            self.response_received.emit(response_data)
                 
         except requests.exceptions.Timeout:
             self.error_occurred.emit("התגובה לוקחת יותר מדי זמן - נסה שוב")
@@ -77,6 +66,27 @@ class FastChatRequestThread(QThread):
         except Exception as e:
             self.error_occurred.emit(f"שגיאת תקשורת: {str(e)}")
 
+    def _on_token(self, text: str):
+        if self._first_token:
+            self._first_token = False
+            self.progress_updated.emit(80)
+        self.token_received.emit(text)
+
+    def _request_full(self, payload: dict):
+        """שרת בלי נקודת הזרמה – בקשה רגילה לתשובה מלאה"""
+        self.progress_updated.emit(50)
+        response = requests.post(
+            f"{self.api_url}/api/v1/gateway/chat/message",
+            json=payload,
+            headers={'Content-Type': 'application/json', 'Accept': 'application/json'},
+            timeout=self.timeout
+        )
+        self.progress_updated.emit(80)
+        if response.status_code != 200:
+            self.error_occurred.emit(f"שגיאה בשרת: {response.status_code}")
+            return None
+        return response.json()
+
 class FastTypingIndicator(QLabel):
     """אינדיקטור כתיבה מהיר יותר עם אנימציה חלקה"""
     
@@ -155,31 +165,18 @@ class ChatBubble(QFrame):
         bubble.setMaximumWidth(500)  # הגדלתי מ-450 ל-500
         bubble.setObjectName("userBubble" if is_user else "botBubble")
         
-        bubble_layout = QVBoxLayout(bubble)
-        bubble_layout.setContentsMargins(15, 10, 15, 10)
+        self.bubble_layout = QVBoxLayout(bubble)
+        self.bubble_layout.setContentsMargins(15, 10, 15, 10)
         
         # תווית עם ההודעה
-        message_label = QLabel(message)
-        message_label.setWordWrap(True)
-        message_label.setAlignment(Qt.AlignRight if is_user else Qt.AlignLeft)
-        bubble_layout.addWidget(message_label)
+        self.message_label = QLabel(message)
+        self.message_label.setWordWrap(True)
+        self.message_label.setAlignment(Qt.AlignRight if is_user else Qt.AlignLeft)
+        self.bubble_layout.addWidget(self.message_label)
         
         # הוספת זמן תגובה ומידע על מטמון
-        if not is_user and response_time is not None:
-            info_parts = [f"נענה תוך {response_time} שניות"]
-            
-            if from_cache:
-                info_parts.append("(מטמון מהיר)")
-            
-            time_label = QLabel(" • ".join(info_parts))
-            time_label.setStyleSheet("""
-                color: #9ca3af;
-                font-size: 11px;
-                font-style: italic;
-                margin-top: 5px;
-            """)
-            time_label.setAlignment(Qt.AlignLeft)
-            bubble_layout.addWidget(time_label)
+        if not is_user:
+            self.add_info(response_time, from_cache)
         
         # יישור הבועה
         if is_user:
@@ -189,6 +186,34 @@ class ChatBubble(QFrame):
             layout.addWidget(bubble)
             layout.addStretch()
 
+    def add_info(self, response_time: float = None, from_cache: bool = False, first_token_time: float = None):
+        """שורת זמן תגובה מתחת להודעה (גם אחרי שהזרמה הסתיימה)"""
+        if response_time is None:
+            return
+        info_parts = [f"נענה תוך {response_time} שניות"]
+        
+        if first_token_time is not None:
+            info_parts.append(f"התחיל לענות אחרי {first_token_time} שניות")
+        if from_cache:
+            info_parts.append("(מטמון מהיר)")
+        
+        time_label = QLabel(" • ".join(info_parts))
+        time_label.setStyleSheet("""
+            color: #9ca3af;
+            font-size: 11px;
+            font-style: italic;
+            margin-top: 5px;
+        """)
+        time_label.setAlignment(Qt.AlignLeft)
+        self.bubble_layout.addWidget(time_label)
+
+    def append_text(self, text: str):
+        """הוספת קטע להודעה שמוזרמת"""
+        self.message_label.setText(self.message_label.text() + text)
+
+    def set_text(self, text: str):
+        self.message_label.setText(text)
+
 class FastChatWindow(QMainWindow):
     """חלון הצ'אט הראשי - גרסה מואצת"""
     
@@ -199,6 +224,7 @@ class FastChatWindow(QMainWindow):
         self.typing_indicator = None
         self.progress_bar = None
         self.chat_thread = None
+        self.stream_bubble = None  # בועת התשובה שמוזרמת כרגע
         
         # הגדרות מהירות
         self.api_url = api_url or os.getenv("API_BASE_URL", "http://localhost:8000").rstrip("/")
@@ -486,6 +512,7 @@ class FastChatWindow(QMainWindow):
             timeout=self.chat_timeout
         )
         self.chat_thread.response_received.connect(self.on_response_received_fast)
+        self.chat_thread.token_received.connect(self.on_token_received)
         self.chat_thread.error_occurred.connect(self.on_error_occurred_fast)
         self.chat_thread.progress_updated.connect(self.progress_bar.setValue)
         self.chat_thread.start()
@@ -521,6 +548,15 @@ class FastChatWindow(QMainWindow):
         
         self.scroll_to_bottom_fast()
     
+    def on_token_received(self, text: str):
+        """קטע מהתשובה המוזרמת – הבועה נבנית תוך כדי יצירה"""
+        if self.stream_bubble is None:
+            self.remove_typing_indicator()
+            self.stream_bubble = ChatBubble("", is_user=False)
+            self.messages_layout.addWidget(self.stream_bubble)
+        self.stream_bubble.append_text(text)
+        self.scroll_to_bottom_fast()
+    
     def on_response_received_fast(self, response: dict):
         """טיפול בתגובה מהשרת"""
         # עצירת progress bar
@@ -539,9 +575,14 @@ class FastChatWindow(QMainWindow):
             if from_cache:
                 bot_response += "\n\n⚡ תשובה מהמטמון"
             
-            bot_bubble = ChatBubble(bot_response, is_user=False, 
-                                  response_time=response_time, from_cache=from_cache)
-            self.messages_layout.addWidget(bot_bubble)
+            if self.stream_bubble is not None:
+                # התשובה כבר מוצגת – מחליפים בטקסט הסופי (אחרי ניקוי בשרת) ומוסיפים זמנים
+                self.stream_bubble.set_text(bot_response)
+                self.stream_bubble.add_info(response_time, from_cache, response.get("first_token_time"))
+            else:
+                bot_bubble = ChatBubble(bot_response, is_user=False, 
+                                      response_time=response_time, from_cache=from_cache)
+                self.messages_layout.addWidget(bot_bubble)
             
             # שמירה במטמון מקומי
             if not from_cache:  # רק אם זה לא בא ממטמון כבר
@@ -555,6 +596,8 @@ class FastChatWindow(QMainWindow):
             error_bubble = ChatBubble(error_message, is_user=False)
             self.messages_layout.addWidget(error_bubble)
         
+        self.stream_bubble = None
+        
         # החזרת הכפתור למצב רגיל
         self.send_button.setEnabled(True)
         self.send_button.setText("שלח")
@@ -569,6 +612,7 @@ class FastChatWindow(QMainWindow):
         
         # הסרת אינדיקטור הכתיבה
         self.remove_typing_indicator()
+        self.stream_bubble = None
         
         # הוספת הודעת שגיאה
         error_message = f"שגיאה בתקשורת: {error}\n\nנסה שוב או פנה לתמיכה."
@@ -6,6 +6,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QPixmap, QIntValidator
 from typing import Optional
+import uuid
 from services import owner_portal_service as svc
 
 class SimpleQuantityInput(QWidget):
@@ -75,6 +76,8 @@ class OrderCreatePage(QWidget):
         self.supplier_id = supplier_id
         self.products = []
         self.product_widgets = {}
+        # מפתח idempotency לטיוטת ההזמנה הנוכחית – נשמר בין ניסיונות שליחה חוזרים
+        self._idempotency_key = None
 
         self.setLayoutDirection(Qt.RightToLeft)
         self.setup_ui()
@@ -575,6 +578,8 @@ class OrderCreatePage(QWidget):
 
     def _update_summary(self):
         """עדכון תקציר ההזמנה"""
+        # שינוי בבחירה = הזמנה אחרת – מפתח חדש בשליחה הבאה
+        self._idempotency_key = None
         total_qty = 0
         total_price = 0.0
         details = []
@@ -657,8 +662,12 @@ class OrderCreatePage(QWidget):
             self.btn_submit.setEnabled(False)
             self.btn_submit.setText("שולח...")
             
-            svc.create_order(self.owner_id, self.supplier_id, items)
+            if not self._idempotency_key:
+                self._idempotency_key = uuid.uuid4().hex
+            svc.create_order(self.owner_id, self.supplier_id, items,
+                             idempotency_key=self._idempotency_key)
             
+            self._idempotency_key = None
             QMessageBox.information(self, "הצלחה", "ההזמנה נשלחה בהצלחה!")
             self.submitted.emit()
             
@@ -11,6 +11,7 @@ from services.owner_portal_service import (
     get_pending_by_owner as _get_pending,
     request_link as _request_link,
 )
+from services.events_service import apply_link_event
 
 
 class OwnerLinksPage(QWidget):
@@ -350,26 +351,41 @@ class OwnerLinksPage(QWidget):
     @Slot()
     def refresh(self):
         try:
-            # active
-            act = _get_active(self.owner_id) or []
-            self._rebuild(self._active_list, act, self._add_active_card)
-            self._active_scroll.setVisible(bool(act))
-            self.lbl_active_empty.setVisible(not bool(act))
-
-            # pending
-            pend = _get_pending(self.owner_id) or []
-            self._rebuild(self._pending_list, pend, self._add_pending_card)
-            self._pending_scroll.setVisible(bool(pend))
-            self.lbl_pending_empty.setVisible(not bool(pend))
-
-            # find suppliers
-            f_list = _find_suppliers(self.owner_id) or []
-            self._rebuild(self._find_list, f_list, self._add_supplier_card)
-            self._find_scroll.setVisible(bool(f_list))
-            self.lbl_find_empty.setVisible(not bool(f_list))
+            self._active = _get_active(self.owner_id) or []
+            self._pending = _get_pending(self.owner_id) or []
+            self._found = _find_suppliers(self.owner_id) or []
+            self._render_lists()
         except Exception as e:
             QMessageBox.warning(self, "שגיאה", str(e))
 
+    def _render_lists(self):
+        # active
+        act = self._active
+        self._rebuild(self._active_list, act, self._add_active_card)
+        self._active_scroll.setVisible(bool(act))
+        self.lbl_active_empty.setVisible(not bool(act))
+
+        # pending
+        pend = self._pending
+        self._rebuild(self._pending_list, pend, self._add_pending_card)
+        self._pending_scroll.setVisible(bool(pend))
+        self.lbl_pending_empty.setVisible(not bool(pend))
+
+        # find suppliers
+        f_list = self._found
+        self._rebuild(self._find_list, f_list, self._add_supplier_card)
+        self._find_scroll.setVisible(bool(f_list))
+        self.lbl_find_empty.setVisible(not bool(f_list))
+
+    def apply_link_event(self, event: dict):
+        """עדכון הרשימות במקום מאירוע link_status (בלי טעינה מחדש מהשרת)"""
+        if not hasattr(self, "_active"):
+            return
+        self._active, self._pending = apply_link_event(self._active, self._pending, event, "supplier")
+        # ספק שיש איתו חיבור (בכל מצב) לא מוצג בחיפוש
+        self._found = [s for s in self._found if s.get("id") != event.get("supplier_id")]
+        self._render_lists()
+
     def _rebuild(self, lay, items, add_func):
         while lay.count():
             it = lay.takeAt(0)
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
     QScrollArea, QMessageBox, QStackedWidget, QSizePolicy, QGraphicsDropShadowEffect
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QColor
 from typing import Dict
 
@@ -12,6 +12,8 @@ from views.pages.ai_chat_page import AIChatPage
 from views.widgets.store_owner_orders_widget import StoreOwnerOrdersWidget
 from views.widgets.side_menu_store_owner import SideMenu
 from views.pages.owner_links_page import OwnerLinksPage
+from services.events_service import EventsStreamThread
+from services.user_stats_service import UserStatsFetchThread, format_stats
 from views.pages.order_create_page import OrderCreatePage
 
 
@@ -22,8 +24,15 @@ class StoreOwnerHome(QWidget):
         super().__init__()
         self.user_data = user_data
         self.side_menu = None
+        # טעינה מרוכזת של מוני לוח הבקרה אחרי אירועים
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setSingleShot(True)
+        self._stats_timer.setInterval(800)
+        self._stats_timer.timeout.connect(self.load_stats)
         self.setup_ui()
         self.setup_styles()
+        self.load_stats()
+        self.start_events()
 
     def setup_ui(self):
         main_layout = QVBoxLayout(self)
@@ -58,6 +67,7 @@ class StoreOwnerHome(QWidget):
 
         # index 1: Suppliers (for creating orders)
         suppliers_page = self.create_suppliers_page()
+        self.suppliers_page = suppliers_page
         self.content_stack.addWidget(suppliers_page)
 
         # index 2: Order creation (dynamic)
@@ -127,7 +137,7 @@ class StoreOwnerHome(QWidget):
         """יצירת topbar קבוע"""
         topbar = QFrame()
         topbar.setObjectName("topbar")
-        topbar.setFixedHeight(60)
+        topbar.setFixedHeight(72)
         
         layout = QHBoxLayout(topbar)
         layout.setContentsMargins(12, 10, 12, 10)
@@ -150,6 +160,16 @@ class StoreOwnerHome(QWidget):
         title.setObjectName("title")
         title.setAlignment(Qt.AlignCenter)
         
+        # מוני לוח בקרה מתחת לכותרת
+        self.stats_label = QLabel("")
+        self.stats_label.setObjectName("statsLabel")
+        self.stats_label.setAlignment(Qt.AlignCenter)
+        
+        title_box = QVBoxLayout()
+        title_box.setSpacing(2)
+        title_box.addWidget(title)
+        title_box.addWidget(self.stats_label)
+        
         # כפתורי ניווט בצד ימין
         nav_layout = QHBoxLayout()
         nav_layout.setSpacing(8)
@@ -178,7 +198,7 @@ class StoreOwnerHome(QWidget):
 
         # סידור כללי בליאאוט הראשי
         layout.addWidget(logout_btn)
-        layout.addWidget(title, 1)
+        layout.addLayout(title_box, 1)
         layout.addLayout(nav_layout)
         layout.addWidget(menu_btn)
         return topbar
@@ -195,6 +215,7 @@ class StoreOwnerHome(QWidget):
             QPushButton#menuBtn:hover { background:#f9fafb; border-color:#3b82f6; }
             QPushButton#menuBtn:pressed { background:#f3f4f6; }
             QLabel#title { font-size:20px; font-weight:700; color:#111827; }
+            QLabel#statsLabel { font-size:12px; color:#6b7280; }
             
             QPushButton#primaryBtn {
                 background:#3b82f6; color:#fff; border:1px solid #2563eb; border-radius:10px; 
@@ -258,6 +279,7 @@ class StoreOwnerHome(QWidget):
             self.update_buttons_state("new_order")
         elif page == "ai_chat":  # הוספת הטיפול בצ'אט AI
             self.show_ai_chat_page()
+        self.schedule_stats_reload()
 
     def show_orders_page(self): 
         self.show_page("orders")
@@ -342,11 +364,64 @@ class StoreOwnerHome(QWidget):
         """ניהול מערכת - עכשיו מפנה לביצוע הזמנה"""
         self.show_suppliers_page()
 
+    # ---------- אירועי push מהשרת ----------
+    def start_events(self):
+        """האזנה לאירועי הזמנות/חיבורים – עדכון הרשימות במקום טעינה מלאה"""
+        self._events_connected_before = False
+        self.events_thread = EventsStreamThread(self.user_data.get('id'))
+        self.events_thread.event_received.connect(self.on_server_event)
+        self.events_thread.connection_changed.connect(self.on_events_connection_changed)
+        self.events_thread.start()
+
+    def stop_events(self):
+        if getattr(self, 'events_thread', None):
+            self.events_thread.stop()
+            self.events_thread = None
+
+    def on_server_event(self, event: Dict):
+        event_type = event.get("type")
+        if event_type in ("order_created", "order_status") and hasattr(self, 'orders_widget'):
+            self.orders_widget.apply_order_event(event)
+        elif event_type == "link_status" and hasattr(self.suppliers_page, 'apply_link_event'):
+            self.suppliers_page.apply_link_event(event)
+        self.schedule_stats_reload()
+
+    def on_events_connection_changed(self, connected: bool):
+        # אחרי ניתוק – משלימים אירועים שפוספסו דרך סנכרון changes
+        if connected and self._events_connected_before and hasattr(self, 'orders_widget'):
+            self.orders_widget.sync_changes()
+            self.schedule_stats_reload()
+        self._events_connected_before = self._events_connected_before or connected
+
+    # ---------- מוני לוח בקרה (user_stats) ----------
+    def load_stats(self):
+        """טעינת המונים ברקע; בקשה בזמן טעינה – תרוץ שוב כשהנוכחית תסתיים"""
+        if getattr(self, 'stats_thread', None) and self.stats_thread.isRunning():
+            self._stats_reload_pending = True
+            return
+        self._stats_reload_pending = False
+        self.stats_thread = UserStatsFetchThread(self.user_data.get('id'))
+        self.stats_thread.stats_loaded.connect(self.on_stats_loaded)
+        self.stats_thread.finished.connect(self._on_stats_thread_finished)
+        self.stats_thread.start()
+
+    def schedule_stats_reload(self):
+        """כמה אירועים ברצף (למשל עדכון סטטוס מרוכז) – טעינה אחת"""
+        self._stats_timer.start()
+
+    def _on_stats_thread_finished(self):
+        if self._stats_reload_pending:
+            self.load_stats()
+
+    def on_stats_loaded(self, stats: Dict):
+        self.stats_label.setText(format_stats(stats, "StoreOwner"))
+
     def refresh_all_data(self):
         """רענון כל הנתונים"""
         # רענון הזמנות
         if hasattr(self, 'orders_widget'):
             self.orders_widget.refresh_orders()
+        self.load_stats()
         
         # רענון עמוד נוכחי
         current_widget = self.content_stack.currentWidget()
@@ -3,7 +3,7 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
     QScrollArea, QMessageBox, QStackedWidget, QSizePolicy, QGraphicsDropShadowEffect
 )
-from PySide6.QtCore import Qt, Signal, QPropertyAnimation, QEasingCurve
+from PySide6.QtCore import Qt, Signal, QPropertyAnimation, QEasingCurve, QTimer
 from PySide6.QtGui import QColor
 import os
 from typing import Dict
@@ -12,6 +12,8 @@ import json, datetime
 # ייבוא עמוד הצ'אט החדש לספק
 from views.pages.ai_chat_supplier_page import AIChatSupplierPage
 from views.pages.supplier_orders_page import SupplierOrdersPage
+from services.events_service import EventsStreamThread
+from services.user_stats_service import UserStatsFetchThread, format_stats
 
 
 class SideMenu(QFrame):
@@ -149,8 +151,16 @@ class SupplierHome(QWidget):
         # התפריט הצידי
         self.side_menu = None
         
+        # טעינה מרוכזת של מוני לוח הבקרה אחרי אירועים
+        self._stats_timer = QTimer(self)
+        self._stats_timer.setSingleShot(True)
+        self._stats_timer.setInterval(800)
+        self._stats_timer.timeout.connect(self.load_stats)
+        
         self.setup_ui()
         self.setup_styles()
+        self.load_stats()
+        self.start_events()
     
     def setup_ui(self):
         """בניית הממשק עם אזור תוכן מתחלף"""
@@ -182,8 +192,13 @@ class SupplierHome(QWidget):
         products_page = self.create_products_page()
         self.content_stack.addWidget(products_page)
         
+        # אישור הזמנה מוריד מלאי – מעדכנים את כרטיסי המוצרים במקום לטעון מחדש
+        if hasattr(products_page, 'apply_stock_updates'):
+            self.orders_page.stock_updated.connect(products_page.apply_stock_updates)
+        
         # Page 2: Links management
         links_page = self.create_links_page()
+        self.links_page = links_page
         self.content_stack.addWidget(links_page)
         
         # Page 3: AI Chat (חדש!)
@@ -272,7 +287,7 @@ class SupplierHome(QWidget):
         """יצירת topbar קבוע"""
         topbar = QFrame()
         topbar.setObjectName("topbar")
-        topbar.setFixedHeight(60)
+        topbar.setFixedHeight(72)
         
         layout = QHBoxLayout(topbar)
         layout.setContentsMargins(12, 10, 12, 10)
@@ -295,6 +310,16 @@ class SupplierHome(QWidget):
         title.setObjectName("title")
         title.setAlignment(Qt.AlignCenter)
         
+        # מוני לוח בקרה מתחת לכותרת
+        self.stats_label = QLabel("")
+        self.stats_label.setObjectName("statsLabel")
+        self.stats_label.setAlignment(Qt.AlignCenter)
+        
+        title_box = QVBoxLayout()
+        title_box.setSpacing(2)
+        title_box.addWidget(title)
+        title_box.addWidget(self.stats_label)
+        
         # כפתורי ניווט בצד ימין
         nav_layout = QHBoxLayout()
         nav_layout.setSpacing(8)
@@ -323,7 +348,7 @@ class SupplierHome(QWidget):
 
         # סידור כללי בליאאוט הראשי
         layout.addWidget(logout_btn)       # שמאל
-        layout.addWidget(title, 1)         # מרכז עם stretch
+        layout.addLayout(title_box, 1)     # מרכז עם stretch
         layout.addLayout(nav_layout)       # ימין (לפני הmenu button)
         layout.addWidget(menu_btn)         # ימין ביותר
         return topbar
@@ -364,6 +389,11 @@ class SupplierHome(QWidget):
                 color: #111827;
             }
             
+            QLabel#statsLabel {
+                font-size: 12px;
+                color: #6b7280;
+            }
+            
             QPushButton#primaryBtn {
                 background: #10b981;
                 color: #ffffff;
@@ -443,6 +473,7 @@ class SupplierHome(QWidget):
         if page in page_mapping:
             self.content_stack.setCurrentIndex(page_mapping[page])
             self.update_buttons_state(page)
+            self.schedule_stats_reload()
     
     def show_orders_page(self):
         """מעבר לעמוד הזמנות"""
@@ -533,11 +564,64 @@ class SupplierHome(QWidget):
         """ניהול מערכת - עכשיו מפנה לניהול מוצרים"""
         self.show_products_page()
     
+    # ---------- אירועי push מהשרת ----------
+    def start_events(self):
+        """האזנה לאירועי הזמנות/חיבורים – עדכון הרשימות במקום טעינה מלאה"""
+        self._events_connected_before = False
+        self.events_thread = EventsStreamThread(self.user_data.get('id'), self.base_url)
+        self.events_thread.event_received.connect(self.on_server_event)
+        self.events_thread.connection_changed.connect(self.on_events_connection_changed)
+        self.events_thread.start()
+    
+    def stop_events(self):
+        if getattr(self, 'events_thread', None):
+            self.events_thread.stop()
+            self.events_thread = None
+    
+    def on_server_event(self, event: Dict):
+        event_type = event.get("type")
+        if event_type in ("order_created", "order_status"):
+            self.orders_page.apply_order_event(event)
+        elif event_type == "link_status" and hasattr(self.links_page, 'apply_link_event'):
+            self.links_page.apply_link_event(event)
+        self.schedule_stats_reload()
+    
+    def on_events_connection_changed(self, connected: bool):
+        # אחרי ניתוק – משלימים אירועים שפוספסו דרך סנכרון changes
+        if connected and self._events_connected_before:
+            self.orders_page.sync_changes()
+            self.schedule_stats_reload()
+        self._events_connected_before = self._events_connected_before or connected
+
+    # ---------- מוני לוח בקרה (user_stats) ----------
+    def load_stats(self):
+        """טעינת המונים ברקע; בקשה בזמן טעינה – תרוץ שוב כשהנוכחית תסתיים"""
+        if getattr(self, 'stats_thread', None) and self.stats_thread.isRunning():
+            self._stats_reload_pending = True
+            return
+        self._stats_reload_pending = False
+        self.stats_thread = UserStatsFetchThread(self.user_data.get('id'), self.base_url)
+        self.stats_thread.stats_loaded.connect(self.on_stats_loaded)
+        self.stats_thread.finished.connect(self._on_stats_thread_finished)
+        self.stats_thread.start()
+
+    def schedule_stats_reload(self):
+        """כמה אירועים ברצף (למשל עדכון סטטוס מרוכז) – טעינה אחת"""
+        self._stats_timer.start()
+
+    def _on_stats_thread_finished(self):
+        if self._stats_reload_pending:
+            self.load_stats()
+
+    def on_stats_loaded(self, stats: Dict):
+        self.stats_label.setText(format_stats(stats, "Supplier"))
+    
     def refresh_all_data(self):
         """רענון כל הנתונים"""
         # רענון הזמנות - משתמש בעמוד החדש
         if hasattr(self, 'orders_page'):
             self.orders_page.refresh_orders()
+        self.load_stats()
         
         # רענון מוצרים
         current_widget = self.content_stack.currentWidget()
@@ -11,6 +11,7 @@ from services.links_service import (
     approve_link as _approve_link,
     reject_link as _reject_link,
 )
+from services.events_service import apply_link_event
 
 import os
 DEBUG = os.getenv("APP_DEBUG", "0") == "1"
@@ -534,6 +535,15 @@ class SupplierLinksPage(QWidget):
             QMessageBox.warning(self, "שגיאה", str(e))
         self._update_empty_placeholders()
 
+    def apply_link_event(self, event: dict):
+        """עדכון הכרטיסיות במקום מאירוע link_status (בלי טעינה מחדש מהשרת)"""
+        self._active_data, self._pending_data = apply_link_event(
+            self._active_data, self._pending_data, event, "owner"
+        )
+        self._update_active_cards(self._active_data)
+        self._update_pending_cards(self._pending_data)
+        self._update_empty_placeholders()
+
     @Slot()
     def on_approve_selected(self):
         selected_ids = []
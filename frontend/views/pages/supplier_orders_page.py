@@ -6,15 +6,15 @@ Combines service, widgets and handles the main logic
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
-    QScrollArea, QDateEdit, QMessageBox, QSpacerItem, QSizePolicy, QFileDialog
+    QScrollArea, QDateEdit, QMessageBox, QSpacerItem, QSizePolicy
 )
 from PySide6.QtCore import Qt, Signal, QDate
 from typing import List, Dict, Set
 from datetime import datetime
-import pandas as pd
 
 # Import service and widgets
-from services.orders_service import OrdersService, OrdersFetchThread
+from services.orders_service import OrdersService, OrdersFetchThread, OrdersChangesFetchThread
+from services.orders_cache import OrdersCache
 from views.widgets.order_list_widget import OrderRowWidget, OrderDetailsWidget, OrdersHeaderWidget
 
 
@@ -24,6 +24,7 @@ class OrdersFilterBar(QFrame):
     filter_changed = Signal()
     export_requested = Signal()
     history_toggled = Signal()
+    bulk_confirm_requested = Signal()
     
     def __init__(self):
         super().__init__()
@@ -51,8 +52,15 @@ class OrdersFilterBar(QFrame):
         self.export_btn.setObjectName("exportBtn")
         self.export_btn.clicked.connect(self.export_requested.emit)
         
+        # אישור מרוכז של ההזמנות המסומנות
+        self.bulk_confirm_btn = QPushButton("✔ אישור ושליחה למסומנות (0)")
+        self.bulk_confirm_btn.setObjectName("bulkConfirmBtn")
+        self.bulk_confirm_btn.setEnabled(False)
+        self.bulk_confirm_btn.clicked.connect(self.bulk_confirm_requested.emit)
+        
         actions_layout.addWidget(self.history_btn)
         actions_layout.addWidget(self.export_btn)
+        actions_layout.addWidget(self.bulk_confirm_btn)
         
         layout.addLayout(actions_layout)
         layout.addStretch()
@@ -109,6 +117,11 @@ class OrdersFilterBar(QFrame):
         """Update export button text with count"""
         self.export_btn.setText(f"📥 ייצא ל-Excel ({count} הזמנות)")
     
+    def update_selected_count(self, count: int):
+        """Update bulk confirm button with number of selected orders"""
+        self.bulk_confirm_btn.setText(f"✔ אישור ושליחה למסומנות ({count})")
+        self.bulk_confirm_btn.setEnabled(count > 0)
+    
     def toggle_history_button(self, is_history: bool):
         """Toggle history button text"""
         if is_history:
@@ -120,6 +133,9 @@ class OrdersFilterBar(QFrame):
 class SupplierOrdersPage(QWidget):
     """Main orders page for suppliers"""
     
+    # רמות מלאי חדשות אחרי אישור הזמנה: [{product_id, stock}]
+    stock_updated = Signal(list)
+    
     def __init__(self, supplier_id: int = None):
         super().__init__()
         self.supplier_id = supplier_id
@@ -128,10 +144,14 @@ class SupplierOrdersPage(QWidget):
         self.orders_service = OrdersService()
         
         # State
+        self.orders_cache = OrdersCache()
         self.orders = []
         self.filtered_orders = []
         self.expanded_orders: Set[int] = set()
+        self.selected_orders: Set[int] = set()
         self.display_history = False
+        self.next_cursor = ""
+        self._stale_threads = []
         
         self.setup_ui()
         self.setup_styles()
@@ -150,9 +170,10 @@ class SupplierOrdersPage(QWidget):
         
         # פילטר תאריכים ופעולות
         self.filter_bar = OrdersFilterBar()
-        self.filter_bar.filter_changed.connect(self.apply_filters)
+        self.filter_bar.filter_changed.connect(self.load_orders)
         self.filter_bar.export_requested.connect(self.export_to_excel)
         self.filter_bar.history_toggled.connect(self.toggle_history_view)
+        self.filter_bar.bulk_confirm_requested.connect(self.confirm_selected_orders)
         main_layout.addWidget(self.filter_bar)
         
         # כותרות טבלה
@@ -175,25 +196,116 @@ class SupplierOrdersPage(QWidget):
         self.orders_layout.setSpacing(2)
         
         scroll_area.setWidget(self.orders_container)
+        # גלילה עד הסוף טוענת את העמוד הבא
+        scroll_area.verticalScrollBar().valueChanged.connect(self._on_scrolled)
         main_layout.addWidget(scroll_area, 1)
+        
+        # טעינת העמוד הבא לפי ה-cursor מהשרת
+        self.load_more_btn = QPushButton("טען הזמנות נוספות")
+        self.load_more_btn.setObjectName("loadMoreBtn")
+        self.load_more_btn.setVisible(False)
+        self.load_more_btn.clicked.connect(self.load_more_orders)
+        main_layout.addWidget(self.load_more_btn, 0, Qt.AlignCenter)
     
     def load_orders(self):
-        """Load orders from service"""
+        """Load the first page of orders (filters changed / full reload)"""
         if not self.supplier_id:
             self.update_display([])
             return
         
+        # טעינה קודמת עדיין רצה (שינוי סינון מהיר) – מתעלמים מהתוצאה שלה
+        prev = getattr(self, "fetch_thread", None)
+        if prev is not None and prev.isRunning():
+            prev.page_loaded.disconnect(self.on_page_loaded)
+            prev.error_occurred.disconnect(self.on_error)
+            self._stale_threads.append(prev)
+            prev.finished.connect(lambda t=prev: self._stale_threads.remove(t))
+        
+        self.next_cursor = ""
+        self.load_more_btn.setVisible(False)
+        self._start_fetch(None)
+    
+    def load_more_orders(self):
+        """Load the next page after the last one shown"""
+        if not self.next_cursor:
+            return
+        prev = getattr(self, "fetch_thread", None)
+        if prev is not None and prev.isRunning():
+            return
+        self.load_more_btn.setEnabled(False)
+        self._start_fetch(self.next_cursor)
+    
+    def _start_fetch(self, cursor):
+        # הסינון (סטטוס/תאריכים) מתבצע בשרת – לא מורידים את כל ההיסטוריה
+        date_from, date_to = self.filter_bar.get_date_range()
+        params = self.orders_service.build_orders_query(
+            display_history=self.display_history,
+            date_from=date_from,
+            date_to=date_to
+        )
+        
         self.fetch_thread = OrdersFetchThread(
             self.orders_service.base_url, 
-            self.supplier_id
+            self.supplier_id,
+            params,
+            cursor
         )
-        self.fetch_thread.orders_loaded.connect(self.on_orders_loaded)
+        self.fetch_thread.page_loaded.connect(self.on_page_loaded)
         self.fetch_thread.error_occurred.connect(self.on_error)
+        self.fetch_thread.finished.connect(lambda: self.load_more_btn.setEnabled(True))
         self.fetch_thread.start()
     
-    def on_orders_loaded(self, orders: List[Dict]):
-        """Handle loaded orders"""
-        self.orders = orders
+    def on_page_loaded(self, orders: List[Dict], next_cursor: str):
+        """First page replaces the cache, later pages are appended to it"""
+        if self.fetch_thread.cursor is None:
+            self.orders_cache.reset(orders)
+        else:
+            self.orders_cache.merge(orders)
+        self.next_cursor = next_cursor
+        self.load_more_btn.setVisible(bool(next_cursor))
+        self.orders = self.orders_cache.orders()
+        self.apply_filters()
+    
+    def _on_scrolled(self, value: int):
+        bar = self.sender()
+        if self.next_cursor and bar is not None and bar.maximum() > 0 and value >= bar.maximum():
+            self.load_more_orders()
+    
+    def sync_changes(self):
+        """Fetch only orders changed since the last sync and merge them into the cache"""
+        if not self.supplier_id or not self.orders_cache.watermark:
+            self.load_orders()
+            return
+        prev = getattr(self, "changes_thread", None)
+        if prev is not None and prev.isRunning():
+            return
+        
+        self.changes_thread = OrdersChangesFetchThread(
+            self.orders_service.base_url,
+            "supplier",
+            self.supplier_id,
+            self.orders_cache.watermark
+        )
+        self.changes_thread.changes_loaded.connect(self.on_changes_loaded)
+        self.changes_thread.error_occurred.connect(self.on_error)
+        self.changes_thread.start()
+    
+    def on_changes_loaded(self, orders: List[Dict], watermark: str):
+        """Merge a delta into the local cache"""
+        self.orders_cache.merge(orders, watermark)
+        self.orders = self.orders_cache.orders()
+        self.apply_filters()
+    
+    def apply_order_event(self, event: Dict):
+        """Patch the list in place from a pushed order event"""
+        if event.get("type") == "order_created" and event.get("order"):
+            self.orders_cache.upsert(event["order"])
+        elif event.get("type") == "order_status":
+            if not self.orders_cache.patch(event.get("order_id"), status=event.get("status")):
+                return
+        else:
+            return
+        self.orders = self.orders_cache.orders()
         self.apply_filters()
     
     def on_error(self, error: str):
@@ -201,7 +313,7 @@ class SupplierOrdersPage(QWidget):
         QMessageBox.warning(self, "שגיאה", error)
     
     def apply_filters(self):
-        """Apply all filters to orders"""
+        """Re-apply filters locally (e.g. after a status change moved an order out of view)"""
         date_from, date_to = self.filter_bar.get_date_range()
         
         self.filtered_orders = self.orders_service.filter_orders(
@@ -211,6 +323,11 @@ class SupplierOrdersPage(QWidget):
             date_to=date_to
         )
         
+        # סימון נשמר רק להזמנות שעדיין מוצגות וממתינות לאישור
+        pending_ids = {o.get("id") for o in self.filtered_orders if o.get("status") == "בוצעה"}
+        self.selected_orders &= pending_ids
+        self.filter_bar.update_selected_count(len(self.selected_orders))
+        
         self.update_display()
     
     def update_display(self, orders_list: List[Dict] = None):
@@ -258,9 +375,10 @@ class SupplierOrdersPage(QWidget):
         order_id = order.get("id", 0)
         is_expanded = order_id in self.expanded_orders
         
-        row = OrderRowWidget(order, is_expanded)
+        row = OrderRowWidget(order, is_expanded, order_id in self.selected_orders)
         row.expand_requested.connect(self.toggle_expand)
         row.status_update_requested.connect(self.update_order_status)
+        row.selection_changed.connect(self.toggle_selected)
         layout.addWidget(row)
         
         # Details if expanded
@@ -301,11 +419,14 @@ class SupplierOrdersPage(QWidget):
             return
         
         # Call service to update status
-        success, error_msg = self.orders_service.update_order_status(
+        success, error_msg, stock_updates = self.orders_service.update_order_status(
             order_id, new_status, self.supplier_id
         )
         
         if success:
+            if stock_updates:
+                self.stock_updated.emit(stock_updates)
+            
             # Update local status
             for i, order in enumerate(self.orders):
                 if order.get("id") == order_id:
@@ -318,75 +439,80 @@ class SupplierOrdersPage(QWidget):
         else:
             QMessageBox.warning(self, "שגיאה", error_msg)
     
+    def toggle_selected(self, order_id: int, selected: bool):
+        """Track multi-select for bulk confirmation"""
+        if selected:
+            self.selected_orders.add(order_id)
+        else:
+            self.selected_orders.discard(order_id)
+        self.filter_bar.update_selected_count(len(self.selected_orders))
+    
+    def confirm_selected_orders(self):
+        """Confirm all selected orders in one request"""
+        order_ids = sorted(self.selected_orders)
+        if not order_ids:
+            return
+        
+        reply = QMessageBox.question(
+            self, "אישור שינוי סטטוס",
+            f"האם לאשר ולשלוח {len(order_ids)} הזמנות מסומנות?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        
+        success, message, results, stock_updates = self.orders_service.bulk_update_order_status(
+            order_ids, "בתהליך", self.supplier_id
+        )
+        if not success:
+            QMessageBox.warning(self, "שגיאה", message)
+            return
+        
+        confirmed = {r["order_id"] for r in results if r.get("ok")}
+        for order in self.orders:
+            if order.get("id") in confirmed:
+                order["status"] = "בתהליך"
+        self.selected_orders -= confirmed
+        if stock_updates:
+            self.stock_updated.emit(stock_updates)
+        
+        self.apply_filters()
+        
+        failed = [r for r in results if not r.get("ok")]
+        if failed:
+            details = "\n".join(f"#{r['order_id']}: {r.get('error', '')}" for r in failed)
+            QMessageBox.warning(self, "עדכון חלקי", f"{message}\n\n{details}")
+        else:
+            QMessageBox.information(self, "עדכון הצליח", message)
+    
     def toggle_history_view(self):
         """Toggle between active and history view"""
         self.display_history = not self.display_history
         self.filter_bar.toggle_history_button(self.display_history)
-        self.apply_filters()
+        self.load_orders()
     
     def export_to_excel(self):
-        """Export orders to Excel file"""
+        """Export orders to Excel file (background thread, see OrdersExportWidget)"""
         if not self.filtered_orders:
             QMessageBox.information(self, "ייצוא לאקסל", "אין הזמנות לייצא")
             return
         
-        try:
-            # Get data from service
-            orders_data, products_data = self.orders_service.prepare_export_data(
-                self.filtered_orders
-            )
-            
-            # Suggest filename
-            from datetime import date
-            suggested = f"הזמנות_ספק_{self.supplier_id or ''}_{date.today():%Y-%m-%d}_{'היסטוריה' if self.display_history else 'פעילות'}.xlsx"
-            
-            # File dialog
-            path, _ = QFileDialog.getSaveFileName(
-                self,
-                "שמירת דוח הזמנות",
-                suggested,
-                "Excel (*.xlsx);;CSV (*.csv)"
-            )
-            
-            if not path:
-                return
-            
-            # Create DataFrames
-            df_orders = pd.DataFrame(orders_data)
-            df_products = pd.DataFrame(products_data)
-            
-            if path.lower().endswith(".csv"):
-                # Save as CSV files
-                base = path[:-4]
-                orders_csv = base + "_הזמנות.csv"
-                products_csv = base + "_מוצרים.csv"
-                df_orders.to_csv(orders_csv, index=False, encoding="utf-8-sig")
-                df_products.to_csv(products_csv, index=False, encoding="utf-8-sig")
-                
-                QMessageBox.information(
-                    self, "ייצוא הושלם",
-                    f"נשמרו שני קבצי CSV:\n• {orders_csv}\n• {products_csv}"
-                )
-            else:
-                # Save as Excel with two sheets
-                with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
-                    df_orders.to_excel(writer, sheet_name="הזמנות", index=False)
-                    df_products.to_excel(writer, sheet_name="מוצרים", index=False)
-                    
-                    # Adjust column widths
-                    for sheet_name, df in [("הזמנות", df_orders), ("מוצרים", df_products)]:
-                        ws = writer.sheets[sheet_name]
-                        for col_idx, col in enumerate(df.columns):
-                            ws.set_column(col_idx, col_idx, max(12, min(50, len(str(col)) + 6)))
-                
-                QMessageBox.information(self, "ייצוא הושלם", f"הקובץ נשמר בהצלחה:\n{path}")
-        
-        except Exception as e:
-            QMessageBox.critical(self, "שגיאת ייצוא", f"שגיאה בייצוא הקובץ:\n{str(e)}")
+        # יבוא מקומי כמו בווידג'ט של בעל החנות; הרכיב נשמר כי היצוא ממשיך ברקע
+        from views.widgets.orders_export_widget import OrdersExportWidget
+        
+        if getattr(self, "_export_widget", None) is None:
+            self._export_widget = OrdersExportWidget(self)
+        self._export_widget.export_orders(
+            self.filtered_orders,
+            self.orders_service,
+            None,
+            self.display_history,
+            supplier_id=self.supplier_id
+        )
     
     def refresh_orders(self):
         """Refresh orders list"""
-        self.load_orders()
+        self.sync_changes()
         QMessageBox.information(self, "רענון", "רשימת ההזמנות רועננה!")
     
     def set_supplier_id(self, supplier_id: int):
@@ -457,6 +583,23 @@ class SupplierOrdersPage(QWidget):
             background: #228B22;
         }
         
+        QPushButton#bulkConfirmBtn {
+            background: #10b981;
+            color: white;
+            border: none;
+            border-radius: 10px;
+            padding: 10px 20px;
+            font-weight: 600;
+            font-size: 14px;
+        }
+        QPushButton#bulkConfirmBtn:hover {
+            background: #059669;
+        }
+        QPushButton#bulkConfirmBtn:disabled {
+            background: #d1d5db;
+            color: #6b7280;
+        }
+        
         QPushButton#historyBtn {
             background: #0a6b82;
             color: white;
@@ -813,6 +813,17 @@ class SupplierProductsPage(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "שגיאה", f"עדכון מלאי נכשל: {e}")
 
+    def apply_stock_updates(self, updates: List[dict]):
+        """עדכון מלאי מקומי מתשובת השרת (אחרי אישור הזמנה) – בלי טעינה מחדש"""
+        for u in updates:
+            pid = u.get("product_id")
+            p = next((x for x in self._all_products if x.id == pid), None)
+            if not p:
+                continue
+            p.stock = int(u.get("stock", p.stock))
+            if pid in self._cards:
+                self._cards[pid].update_stock_label(p.stock)
+
     # ---- API - ללא שינוי ----
     def reload_from_server(self):
         try:
@@ -6,7 +6,7 @@ Contains reusable UI components
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QTableWidget, QTableWidgetItem, QHeaderView, QCheckBox
 )
 from PySide6.QtCore import Qt, Signal
 from typing import Dict
@@ -18,12 +18,14 @@ class OrderRowWidget(QFrame):
     
     expand_requested = Signal(int)
     status_update_requested = Signal(int, str)
+    selection_changed = Signal(int, bool)
     
-    def __init__(self, order: Dict, is_expanded: bool = False):
+    def __init__(self, order: Dict, is_expanded: bool = False, is_selected: bool = False):
         super().__init__()
         self.order = order
         self.order_id = order.get("id", 0)
         self.is_expanded = is_expanded
+        self.is_selected = is_selected
         self.setup_ui()
     
     def setup_ui(self):
@@ -108,10 +110,23 @@ class OrderRowWidget(QFrame):
         status = self.order.get("status", "בתהליך")
 
         if status == "בוצעה":
+            # תיבת סימון לאישור מרוכז + כפתור לאישור בודד
+            container = QWidget()
+            box = QHBoxLayout(container)
+            box.setContentsMargins(0, 0, 0, 0)
+            box.setSpacing(6)
+            
+            checkbox = QCheckBox()
+            checkbox.setObjectName("selectOrder")
+            checkbox.setChecked(self.is_selected)
+            checkbox.toggled.connect(lambda checked: self.selection_changed.emit(self.order_id, checked))
+            box.addWidget(checkbox)
+            
             btn = QPushButton("אישור ושליחה")
             btn.setObjectName("statusBtnPending")
             btn.clicked.connect(lambda _=False: self.status_update_requested.emit(self.order_id, "בתהליך"))
-            return btn
+            box.addWidget(btn, 1)
+            return container
 
         elif status == "בתהליך":
             lbl = QLabel("נשלח... ממתין להגעה")
@@ -1,56 +1,141 @@
 # frontend/views/widgets/orders_export_widget.py
-from PySide6.QtWidgets import QWidget, QFileDialog, QMessageBox
-from typing import List, Dict
+from PySide6.QtCore import Qt, QThread
+from PySide6.QtWidgets import QWidget, QFileDialog, QMessageBox, QProgressDialog
+from typing import List, Dict, Optional
 from datetime import date
 
+from services.orders_export_service import (
+    COLUMNAR_FORMATS, COUNTERPARTY_STORE, COUNTERPARTY_SUPPLIER,
+    OrdersColumnarExportThread, OrdersFileExportThread, export_params,
+)
+
 
 class OrdersExportWidget:
-    """רכיב ליצוא הזמנות לקבצים"""
-    
+    """
+    רכיב ליצוא הזמנות לקבצים
+    היצוא רץ ב-Thread (שורה-שורה ל-Excel/CSV, או הורדת Parquet/Arrow מהשרת)
+    עם חלון התקדמות וכפתור ביטול – ה-UI לא נחסם גם ביצוא של שנה שלמה.
+    """
+
     def __init__(self, parent: QWidget = None):
         self.parent = parent
-    
-    def export_orders(self, orders: List[Dict], orders_service, 
-                     owner_id: int, display_history: bool) -> bool:
-        """יצוא הזמנות לקובץ Excel או CSV"""
-        
+        self._thread: Optional[QThread] = None
+        self._progress: Optional[QProgressDialog] = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.isRunning()
+
+    def export_orders(self, orders: List[Dict], orders_service,
+                     owner_id: int, display_history: bool,
+                     supplier_id: Optional[int] = None) -> bool:
+        """
+        יצוא הזמנות לקובץ Excel או CSV, או Parquet/Arrow ישירות מהשרת.
+        מחזיר True אם היצוא התחיל; התוצאה מוצגת כשה-Thread מסיים.
+        """
+
         if not orders:
             QMessageBox.information(self.parent, "יצוא לאקסל", "אין הזמנות ליצא")
             return False
-        
+
+        if self.is_running():
+            QMessageBox.information(self.parent, "יצוא", "יצוא קודם עדיין רץ")
+            return False
+
         try:
-            # הכנת נתונים לשתי טבלאות: הזמנות ומוצרים
-            orders_data, products_data = orders_service.prepare_export_data(orders)
-            
             # שם קובץ מוצע
-            suggested = f"הזמנות_בעל_חנות_{owner_id or ''}_{date.today():%Y-%m-%d}_{'היסטוריה' if display_history else 'פעילות'}.xlsx"
+            who = f"ספק_{supplier_id}" if supplier_id else f"בעל_חנות_{owner_id or ''}"
+            suggested = f"הזמנות_{who}_{date.today():%Y-%m-%d}_{'היסטוריה' if display_history else 'פעילות'}.xlsx"
 
             # חלון בחירת קובץ
-            path, _ = QFileDialog.getSaveFileName(
+            path, selected_filter = QFileDialog.getSaveFileName(
                 self.parent,
                 "שמירת דוח הזמנות",
                 suggested,
-                "Excel (*.xlsx);;CSV (*.csv)"
+                "Excel (*.xlsx);;CSV (*.csv);;Parquet (*.parquet);;Arrow (*.arrow)"
             )
             if not path:
                 return False
-            
-            # יצוא לקובץ
-            success, message = orders_service.export_to_files(
-                orders_data, products_data, path, owner_id, display_history
-            )
-            
-            if success:
-                QMessageBox.information(self.parent, "יצוא הושלם", message)
-                return True
+
+            fmt = self._columnar_format(path, selected_filter)
+            if fmt:
+                # Parquet/Arrow – השרת מזרים מה-DB, הקבצים נכתבים ישר לדיסק
+                thread = OrdersColumnarExportThread(
+                    export_params(owner_id=None if supplier_id else owner_id,
+                                  supplier_id=supplier_id, display_history=display_history),
+                    path, fmt
+                )
+                thread.progress.connect(self._on_bytes_progress)
+                total = 0  # גודל לא ידוע מראש
             else:
-                QMessageBox.critical(self.parent, "שגיאת יצוא", message)
-                return False
-                
+                # Excel/CSV מההזמנות שכבר נטענו (אותו סינון שעל המסך)
+                thread = OrdersFileExportThread(
+                    orders, path, COUNTERPARTY_STORE if supplier_id else COUNTERPARTY_SUPPLIER
+                )
+                thread.progress.connect(self._on_rows_progress)
+                total = thread.total_rows
+
+            thread.export_finished.connect(self._on_finished)
+            thread.export_cancelled.connect(self._on_cancelled)
+            thread.error_occurred.connect(self._on_error)
+            self._start(thread, total)
+            return True
+
         except Exception as e:
             QMessageBox.critical(
-                self.parent, 
-                "שגיאת יצוא", 
+                self.parent,
+                "שגיאת יצוא",
                 f"שגיאה בייצוא הקובץ:\n{str(e)}"
             )
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    def _columnar_format(path: str, selected_filter: str) -> Optional[str]:
+        ext = path.lower().rsplit(".", 1)[-1] if "." in path else ""
+        if ext in COLUMNAR_FORMATS:
+            return ext
+        for fmt in COLUMNAR_FORMATS:
+            if fmt in selected_filter.lower() and ext not in ("xlsx", "csv"):
+                return fmt
+        return None
+
+    def _start(self, thread: QThread, total: int):
+        self._progress = QProgressDialog("מייצא הזמנות...", "ביטול", 0, total, self.parent)
+        self._progress.setWindowTitle("יצוא הזמנות")
+        self._progress.setWindowModality(Qt.WindowModal)
+        self._progress.setAutoClose(False)
+        self._progress.setAutoReset(False)
+        self._progress.setMinimumDuration(300)
+        self._progress.canceled.connect(thread.requestInterruption)
+
+        self._thread = thread
+        thread.start()
+
+    def _close_progress(self):
+        if self._progress:
+            self._progress.close()
+            self._progress = None
+
+    def _on_rows_progress(self, rows: int):
+        if self._progress:
+            self._progress.setValue(min(rows, self._progress.maximum()))
+            self._progress.setLabelText(f"נכתבו {rows:,} מתוך {self._progress.maximum():,} שורות...")
+
+    def _on_bytes_progress(self, written: int):
+        if self._progress:
+            self._progress.setLabelText(f"הורדו {written / (1 << 20):.1f} MB...")
+
+    def _on_finished(self, paths: List[str]):
+        self._close_progress()
+        if len(paths) > 1:
+            message = "הקבצים נשמרו:\n" + "\n".join(f"• {p}" for p in paths)
+        else:
+            message = f"הקובץ נשמר בהצלחה:\n{paths[0]}" if paths else "לא נשמרו קבצים"
+        QMessageBox.information(self.parent, "יצוא הושלם", message)
+
+    def _on_cancelled(self):
+        self._close_progress()
+        QMessageBox.information(self.parent, "יצוא", "היצוא בוטל")
+
+    def _on_error(self, message: str):
+        self._close_progress()
+        QMessageBox.critical(self.parent, "שגיאת יצוא", message)
@@ -140,6 +140,8 @@ class ServiceAreasPicker(QWidget):
                 cb.setLayoutDirection(Qt.RightToLeft)
                 # הסרת qproperty-alignment שלא עובד עם QCheckBox
                 cb.setStyleSheet("text-align: right;")
+                if c.get("suppliers_count") is not None:
+                    cb.setToolTip(f"{c['suppliers_count']} ספקים משרתים עיר זו")
                 
                 self._city_boxes[cid] = cb
                 # להצמיד לקצה ימין ולמרכז אנכי כדי להיות בקו אחד עם התיבה
@@ -7,6 +7,8 @@ from PySide6.QtCore import Qt
 from typing import List, Dict, Set
 
 from services.store_owner_orders_service import StoreOwnerOrdersService, StoreOwnerOrdersFetchThread
+from services.orders_service import OrdersChangesFetchThread
+from services.orders_cache import OrdersCache
 from views.widgets.store_owner_orders_filter_bar import StoreOwnerOrdersFilterBar
 from views.widgets.store_owner_orders_row import StoreOwnerOrdersRow
 
@@ -20,6 +22,7 @@ class StoreOwnerOrdersWidget(QWidget):
         self.orders_service = StoreOwnerOrdersService()
         
         # מצב הרכיב
+        self.orders_cache = OrdersCache()
         self.orders = []
         self.expanded_orders: Set[int] = set()
         self.display_history = False
@@ -267,7 +270,45 @@ class StoreOwnerOrdersWidget(QWidget):
     
     def _on_orders_loaded(self, orders: List[Dict]):
         """טיפול בהזמנות שנטענו"""
-        self.orders = orders
+        self.orders_cache.reset(orders)
+        self.orders = self.orders_cache.orders()
+        self._update_orders_display()
+    
+    def sync_changes(self):
+        """סנכרון אינקרמנטלי – רק מה שהשתנה מאז הטעינה האחרונה"""
+        if not self.owner_id or not self.orders_cache.watermark:
+            self.load_orders()
+            return
+        prev = getattr(self, "changes_thread", None)
+        if prev is not None and prev.isRunning():
+            return
+        
+        self.changes_thread = OrdersChangesFetchThread(
+            self.orders_service.base_url,
+            "owner",
+            self.owner_id,
+            self.orders_cache.watermark
+        )
+        self.changes_thread.changes_loaded.connect(self._on_changes_loaded)
+        self.changes_thread.error_occurred.connect(self._on_error)
+        self.changes_thread.start()
+    
+    def _on_changes_loaded(self, orders: List[Dict], watermark: str):
+        """מיזוג השינויים למטמון המקומי"""
+        self.orders_cache.merge(orders, watermark)
+        self.orders = self.orders_cache.orders()
+        self._update_orders_display()
+    
+    def apply_order_event(self, event: Dict):
+        """עדכון הרשימה במקום מאירוע push"""
+        if event.get("type") == "order_created" and event.get("order"):
+            self.orders_cache.upsert(event["order"])
+        elif event.get("type") == "order_status":
+            if not self.orders_cache.patch(event.get("order_id"), status=event.get("status")):
+                return
+        else:
+            return
+        self.orders = self.orders_cache.orders()
         self._update_orders_display()
     
     def _on_error(self, error: str):
@@ -387,8 +428,10 @@ class StoreOwnerOrdersWidget(QWidget):
         # יבוא מקומי כדי למנוע circular import
         from views.widgets.orders_export_widget import OrdersExportWidget
         
-        export_widget = OrdersExportWidget(self)
-        success = export_widget.export_orders(
+        # שמירת הרכיב – היצוא ממשיך ברקע אחרי שהפונקציה חוזרת
+        if getattr(self, "_export_widget", None) is None:
+            self._export_widget = OrdersExportWidget(self)
+        success = self._export_widget.export_orders(
             filtered_orders, 
             self.orders_service, 
             self.owner_id, 
@@ -397,7 +440,7 @@ class StoreOwnerOrdersWidget(QWidget):
     
     def refresh_orders(self):
         """רענון רשימת הזמנות"""
-        self.load_orders()
+        self.sync_changes()
         QMessageBox.information(self, "רענון", "רשימת ההזמנות רוענה בהצלחה!")
     
     def set_owner_id(self, owner_id: int):